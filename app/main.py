@@ -1,19 +1,73 @@
-from fastapi import FastAPI, HTTPException, Depends, Security
+from fastapi import FastAPI, HTTPException, Depends, Security, Body, Request, Query
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel, ValidationError
+from typing import List, Optional, Dict, Any
 from datetime import datetime
+from contextlib import asynccontextmanager
+import asyncio
 import logging
-from app.models.review import ReviewRequest, ReviewResponse, ReviewAnalysis, ConfidenceScores
+import os
+import time
+from app.models.review import ReviewRequest, ReviewResponse, ReviewAnalysis, ConfidenceScores, BatchReviewResult
+from app.models.review import AnalysisRecord
+from app.services.aggregates import GROUP_FIELDS, aggregates_from_env
 from app.services.analyzer import ReviewAnalyzer
+from app.services.cache import cache_from_env
+from app.services.capture import RequestCaptureMiddleware, capture_from_env
+from app.services.preprocess import preprocessor_from_env
+from app.services.sentiment import sentiment_backend_from_env
+from app.services.executor import AnalysisExecutor, ExecutorSaturated
+from app.services.jobs import JobQueue, JobQueueFull
+from app.services.metrics import Metrics, MetricsMiddleware, metrics_enabled_from_env
+from app.services.responses import FastJSONResponse, batch_result, dumps, review_response
+from app.services.results_store import results_store_from_env
+from app.services.streaming import DuplexStreamingResponse, iter_ndjson_lines, ordered_window
 from app.auth.auth_handler import validate_token
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Review Analysis API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the analyzer and start analysis workers before serving traffic;
+    # /ready only reports ready once both are done
+    start = time.perf_counter()
+    analyzer.warmup()
+    executor.start()
+    app.state.warmup_seconds = time.perf_counter() - start
+    app.state.ready = True
+    logger.info(f"Ready to serve after {app.state.warmup_seconds:.2f}s warmup")
+    job_queue.start()
+    snapshots = None
+    if aggregates is not None and aggregates.snapshot_dir:
+        snapshots = asyncio.create_task(snapshot_aggregates())
+    yield
+    app.state.ready = False
+    await job_queue.stop()
+    if snapshots is not None:
+        snapshots.cancel()
+        await asyncio.get_running_loop().run_in_executor(None, aggregates.snapshot)
+    executor.shutdown()
+    if results_store is not None:
+        if results_flush is not None:
+            await asyncio.wait([results_flush])
+        results_store.flush()
+
+async def snapshot_aggregates():
+    # Share this worker's aggregates with the other workers through AGGREGATES_DIR
+    while True:
+        await asyncio.sleep(AGGREGATES_SNAPSHOT_SECONDS)
+        try:
+            # File writes and compaction (which may wait on another worker's lock) stay off the loop
+            await asyncio.get_running_loop().run_in_executor(None, aggregates.snapshot)
+        except OSError as e:
+            logger.error(f"Error writing aggregates snapshot: {str(e)}")
+
+app = FastAPI(title="Review Analysis API", lifespan=lifespan)
+app.state.ready = False
 security = HTTPBearer()
 
 # Add CORS middleware
@@ -25,8 +79,107 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Result cache (ANALYSIS_CACHE_SIZE=0 without ANALYSIS_CACHE_DB disables caching)
+cache = cache_from_env()
+
+# Queryable store of every analysis served (only when RESULTS_DB is set)
+results_store = results_store_from_env()
+
+# Running sentiment statistics per (subreddit, topic, time bucket) behind GET /aggregates
+aggregates = aggregates_from_env()
+AGGREGATES_SNAPSHOT_SECONDS = float(os.getenv("AGGREGATES_SNAPSHOT_SECONDS", "5"))
+
+# Latency histograms, counters and Server-Timing headers (METRICS_ENABLED=false turns them off)
+metrics = Metrics(enabled=metrics_enabled_from_env())
+
 # Initialize the analyzer service
-analyzer = ReviewAnalyzer()
+analyzer = ReviewAnalyzer(
+    cache=cache,
+    sentiment_backend=sentiment_backend_from_env(),
+    stage_observer=metrics.observe_analyzer_stage if metrics.enabled else None,
+    preprocessor=preprocessor_from_env()
+)
+
+# Where analyses run: inline on the event loop, in a thread pool, or in a process pool
+executor = AnalysisExecutor(
+    analyzer,
+    mode=os.getenv("ANALYSIS_EXECUTOR", "thread"),
+    workers=int(os.getenv("ANALYSIS_WORKERS", "0")) or None,
+    queue_limit=int(os.getenv("ANALYSIS_QUEUE_LIMIT", "64")),
+    call_observer=metrics.observe_analysis if metrics.enabled else None
+)
+
+if metrics.enabled:
+    app.add_middleware(MetricsMiddleware, metrics=metrics)
+    metrics.gauge("analysis_queue_depth", "Analyses running or waiting in the executor", lambda: executor.pending)
+    metrics.gauge("analysis_rejected_total", "Analyses rejected because the queue was full",
+                  lambda: executor.rejected, kind="counter")
+    if cache is not None and executor.mode != "process":
+        metrics.gauge("analysis_cache_entries", "Entries in the in-memory result cache", lambda: len(cache))
+        for counter in ("hits", "misses", "evictions"):
+            metrics.gauge(f"analysis_cache_{counter}_total", f"Result cache {counter}",
+                          lambda counter=counter: getattr(cache, counter), kind="counter")
+
+# Sanitized copies of incoming payloads for replay load tests (only when CAPTURE_ENABLED is set).
+# Added after the metrics middleware so it wraps it, and its timings match what clients see
+capture = capture_from_env()
+if capture is not None:
+    app.add_middleware(RequestCaptureMiddleware, capture=capture)
+
+# Asynchronous jobs (POST /jobs), analyzed most urgent first by their own workers
+job_wait_seconds = metrics.histogram(
+    "job_item_wait_seconds", "Time job items spend queued, by pre-scored urgency", ("urgency",))
+job_queue = JobQueue(
+    executor,
+    estimate_urgency=analyzer.estimate_urgency,
+    workers=int(os.getenv("JOBS_WORKERS", "2")),
+    batch_size=int(os.getenv("JOBS_BATCH_SIZE", "16")),
+    max_pending=int(os.getenv("JOBS_QUEUE_LIMIT", "10000")),
+    result_ttl=float(os.getenv("JOBS_RESULT_TTL", "3600")),
+    on_result=lambda review, record, result: record_result(review, record, result),
+    wait_observer=(lambda urgency, seconds: job_wait_seconds.observe(seconds, str(urgency)))
+    if job_wait_seconds is not None else None
+)
+MAX_JOB_SIZE = int(os.getenv("MAX_JOB_SIZE", "10000"))
+if metrics.enabled:
+    metrics.gauge("job_queue_depth", "Job items waiting to be analyzed", lambda: job_queue.pending)
+    metrics.gauge("jobs_active", "Jobs with items still pending", lambda: job_queue.active_jobs)
+    metrics.gauge("job_items_processed_total", "Job items analyzed", lambda: job_queue.processed, kind="counter")
+
+# Upper bound on the number of reviews accepted by /analyze-reviews
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "1000"))
+
+# Streaming endpoint limits: analyses in flight per connection and maximum NDJSON line size
+STREAM_WINDOW = int(os.getenv("STREAM_WINDOW", "8"))
+STREAM_MAX_LINE_BYTES = int(os.getenv("STREAM_MAX_LINE_BYTES", str(1 << 20)))
+
+def record_result(review: ReviewRequest, record: AnalysisRecord, response: Dict[str, Any]):
+    # Feed the aggregates and the results store with a served analysis
+    if aggregates is not None:
+        aggregates.add(record, review.metadata.subreddit, review.metadata.created_utc)
+    if results_store is not None and results_store.add(response, review.metadata.model_dump()):
+        flush_results()
+
+# Results store batch being written, if any
+results_flush: Optional[asyncio.Future] = None
+
+def flush_results():
+    # Write the batch from a thread so the event loop never waits on SQLite. One
+    # flush at a time: while one runs, rows keep buffering and the next add that
+    # finds a batch due starts the following flush
+    global results_flush
+    if results_flush is not None and not results_flush.done():
+        return
+    results_flush = asyncio.get_running_loop().run_in_executor(None, results_store.flush)
+    results_flush.add_done_callback(log_flush_error)
+
+def log_flush_error(future: asyncio.Future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(f"Error flushing results store: {str(future.exception())}")
+
+def saturated_error(e: ExecutorSaturated) -> HTTPException:
+    logger.warning(f"Rejecting request, analysis queue is full: {str(e)}")
+    return HTTPException(status_code=503, detail="Analysis queue is full, retry later", headers={"Retry-After": "1"})
 
 @app.post("/analyze-review", response_model=ReviewResponse)
 async def analyze_review(
@@ -35,27 +188,247 @@ async def analyze_review(
 ):
     try:
         # Validate token
-        validate_token(credentials.credentials)
+        with metrics.stage("auth"):
+            validate_token(credentials.credentials)
         
         # Perform the analysis
-        result = analyzer.analyze(
+        record = await executor.run(
+            "analyze_record",
             text=review.text,
             source=review.metadata.source if review.metadata else None
         )
         
-        # Construct the response
-        response = ReviewResponse(
-            review_id=review.review_id,
-            analysis=result["analysis"],
-            confidence_scores=result["confidence_scores"]
-        )
-        
-        return response
+        # Encode the record directly; the request was validated on the way in
+        # and the analyzer builds values within the ReviewResponse constraints
+        response = review_response(review.review_id, record)
+        record_result(review, record, response)
+        return FastJSONResponse(response)
         
+    except HTTPException:
+        raise
+    except ExecutorSaturated as e:
+        raise saturated_error(e)
     except Exception as e:
         logger.error(f"Error processing review: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/analyze-reviews", response_model=List[BatchReviewResult])
+async def analyze_reviews(
+    reviews: List[Any] = Body(...),
+    credentials: HTTPAuthorizationCredentials = Security(security)
+):
+    # Validate token once for the whole batch
+    with metrics.stage("auth"):
+        validate_token(credentials.credentials)
+    
+    if len(reviews) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {MAX_BATCH_SIZE} reviews")
+    
+    try:
+        # Validate each review on its own so a malformed item only fails its slot
+        results: List[Optional[Dict[str, Any]]] = [None] * len(reviews)
+        valid_indices = []
+        valid_reviews = []
+        items = []
+        for i, raw in enumerate(reviews):
+            try:
+                review = ReviewRequest.model_validate(raw)
+            except ValidationError as e:
+                review_id = raw.get("review_id") if isinstance(raw, dict) else None
+                results[i] = batch_result(review_id, error=str(e))
+                continue
+            valid_indices.append(i)
+            valid_reviews.append(review)
+            items.append({
+                "review_id": review.review_id,
+                "text": review.text,
+                "source": review.metadata.source if review.metadata else None
+            })
+        
+        # Perform the analysis for all valid reviews at once and assemble the
+        # response from plain records, without per-item model objects
+        batch_results = await executor.run("analyze_batch_records", items)
+        for i, review, result in zip(valid_indices, valid_reviews, batch_results):
+            if isinstance(result, dict):
+                results[i] = batch_result(review.review_id, error=result["error"])
+            else:
+                results[i] = batch_result(review.review_id, result)
+                record_result(review, result, results[i])
+        
+        return FastJSONResponse(results)
+        
+    except ExecutorSaturated as e:
+        raise saturated_error(e)
+    except Exception as e:
+        logger.error(f"Error processing review batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/analyze-reviews/stream")
+async def analyze_reviews_stream(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Security(security)
+):
+    """
+    Analyze an NDJSON body (one ReviewRequest per line) and stream back one
+    NDJSON result per line, in input order, as each analysis finishes.
+    """
+    with metrics.stage("auth"):
+        validate_token(credentials.credentials)
+    
+    async def analyze_line(line: Optional[bytes]) -> bytes:
+        if line is None:
+            return dumps(batch_result(None, error=f"Line exceeds {STREAM_MAX_LINE_BYTES} bytes")) + b"\n"
+        try:
+            review = ReviewRequest.model_validate_json(line)
+        except ValidationError as e:
+            return dumps(batch_result(None, error=str(e))) + b"\n"
+        
+        while True:
+            try:
+                record = await executor.run(
+                    "analyze_record",
+                    text=review.text,
+                    source=review.metadata.source if review.metadata else None
+                )
+                break
+            except ExecutorSaturated:
+                # Mid-stream we can't answer 503; wait for capacity instead
+                await asyncio.sleep(0.05)
+            except Exception as e:
+                logger.error(f"Error processing streamed review {review.review_id}: {str(e)}")
+                return dumps(batch_result(review.review_id, error=str(e))) + b"\n"
+        
+        response = review_response(review.review_id, record)
+        record_result(review, record, response)
+        return dumps(response) + b"\n"
+    
+    lines = iter_ndjson_lines(request.stream(), max_line_bytes=STREAM_MAX_LINE_BYTES)
+    return DuplexStreamingResponse(ordered_window(lines, analyze_line, STREAM_WINDOW), media_type="application/x-ndjson")
+
+@app.post("/jobs", status_code=202)
+async def submit_job(
+    reviews: List[Dict[str, Any]] = Body(...),
+    credentials: HTTPAuthorizationCredentials = Security(security)
+):
+    """Queue reviews for asynchronous analysis; poll GET /jobs/{job_id} for progress and results."""
+    with metrics.stage("auth"):
+        validate_token(credentials.credentials)
+    if not reviews:
+        raise HTTPException(status_code=422, detail="Job must contain at least one review")
+    if len(reviews) > MAX_JOB_SIZE:
+        raise HTTPException(status_code=413, detail=f"Job exceeds {MAX_JOB_SIZE} reviews")
+    
+    # Malformed items fail in their own slot, like /analyze-reviews
+    entries: List[Any] = []
+    for raw in reviews:
+        try:
+            entries.append(ReviewRequest.model_validate(raw))
+        except ValidationError as e:
+            entries.append(batch_result(raw.get("review_id") if isinstance(raw, dict) else None, error=str(e)))
+    try:
+        job = await job_queue.submit(entries)
+    except JobQueueFull as e:
+        logger.warning(f"Rejecting job: {str(e)}")
+        raise HTTPException(status_code=503, detail="Job queue is full, retry later", headers={"Retry-After": "5"})
+    return FastJSONResponse(job.to_dict(include_results=False), status_code=202)
+
+@app.get("/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    include_results: bool = True,
+    credentials: HTTPAuthorizationCredentials = Security(security)
+):
+    """Job status and progress, with results so far (None for items still queued)."""
+    validate_token(credentials.credentials)
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return FastJSONResponse(job.to_dict(include_results=include_results))
+
+@app.get("/jobs")
+async def job_stats(credentials: HTTPAuthorizationCredentials = Security(security)):
+    validate_token(credentials.credentials)
+    return job_queue.stats()
+
+@app.get("/results")
+async def query_results(
+    sentiment: Optional[str] = None,
+    topic: Optional[str] = None,
+    subreddit: Optional[str] = None,
+    min_urgency: Optional[int] = Query(None, ge=1, le=5),
+    max_urgency: Optional[int] = Query(None, ge=1, le=5),
+    since: Optional[float] = Query(None, description="Earliest created_utc (inclusive)"),
+    until: Optional[float] = Query(None, description="Latest created_utc (exclusive)"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(100, ge=1, le=1000),
+    credentials: HTTPAuthorizationCredentials = Security(security)
+):
+    """Stored analyses matching every given filter, newest first, with keyset pagination."""
+    validate_token(credentials.credentials)
+    if results_store is None:
+        raise HTTPException(status_code=404, detail="Results store is not enabled (set RESULTS_DB)")
+    try:
+        results, next_cursor = await asyncio.get_running_loop().run_in_executor(None, lambda: results_store.query(
+            sentiment=sentiment, topic=topic, subreddit=subreddit, min_urgency=min_urgency,
+            max_urgency=max_urgency, since=since, until=until, cursor=cursor, limit=limit
+        ))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse({"results": results, "next_cursor": next_cursor})
+
+@app.get("/aggregates")
+async def query_aggregates(
+    subreddit: Optional[str] = None,
+    topic: Optional[str] = None,
+    since: Optional[float] = Query(None, description="Earliest time bucket start (inclusive)"),
+    until: Optional[float] = Query(None, description="Latest time bucket start (exclusive)"),
+    group_by: str = Query(",".join(GROUP_FIELDS), description="Comma-separated subset of subreddit, topic, bucket"),
+    credentials: HTTPAuthorizationCredentials = Security(security)
+):
+    """Sentiment counts, polarity mean/variance and urgency histograms, rolled up over every worker."""
+    validate_token(credentials.credentials)
+    if aggregates is None:
+        raise HTTPException(status_code=404, detail="Aggregates are disabled (AGGREGATES_ENABLED=false)")
+    fields = [field.strip() for field in group_by.split(",") if field.strip()]
+    try:
+        # Reads the other workers' snapshot files, so keep it off the loop
+        groups = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: aggregates.query(subreddit=subreddit, topic=topic, since=since, until=until, group_by=fields)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse({"bucket_seconds": aggregates.bucket_seconds, "groups": groups})
+
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"} 
\ No newline at end of file
+    # The analysis settings let clients keep their own result caches per configuration
+    return {"status": "healthy", "analysis": analyzer.cache_namespace}
+
+@app.get("/ready")
+async def readiness_check():
+    # Unlike /health, fails until warmup has finished, so load balancers only
+    # route traffic to workers that won't stall on their first request
+    if not app.state.ready:
+        return JSONResponse(status_code=503, content={"status": "starting"})
+    return {"status": "ready", "warmup_seconds": round(app.state.warmup_seconds, 3), "pid": os.getpid()}
+
+@app.get("/executor/stats")
+async def executor_stats(credentials: HTTPAuthorizationCredentials = Security(security)):
+    validate_token(credentials.credentials)
+    return executor.stats()
+
+@app.get("/cache/stats")
+async def cache_stats(credentials: HTTPAuthorizationCredentials = Security(security)):
+    validate_token(credentials.credentials)
+    if cache is None:
+        return {"enabled": False}
+    if executor.mode == "process":
+        # Worker processes build their own caches; this process's one never serves an analysis
+        return {"enabled": True, "per_worker": True,
+                "detail": "Each analysis worker process keeps its own cache; its counters are not collected"}
+    return {"enabled": True, **cache.stats()}
+
+if metrics.enabled:
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def prometheus_metrics():
+        return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict
+from typing import Any, List, Optional, Dict
+from dataclasses import dataclass
 from datetime import datetime
 
 class ReviewMetadata(BaseModel):
@@ -54,4 +55,71 @@ class ReviewRequest(BaseModel):
 class ReviewResponse(BaseModel):
     review_id: str
     analysis: ReviewAnalysis
-    confidence_scores: ConfidenceScores 
\ No newline at end of file
+    confidence_scores: ConfidenceScores
+
+class BatchReviewResult(BaseModel):
+    review_id: Optional[str] = None
+    analysis: Optional[ReviewAnalysis] = None
+    confidence_scores: Optional[ConfidenceScores] = None
+    error: Optional[str] = None
+
+@dataclass(slots=True)
+class AnalysisRecord:
+    """
+    Analysis result as produced by ReviewAnalyzer, before any pydantic model is built.
+    
+    The API encodes records straight to JSON; ``to_models`` gives the
+    ReviewAnalysis/ConfidenceScores pair for callers that want models.
+    ``polarity`` is the signed sentiment score behind them. It feeds the
+    aggregates and is not part of the response shape.
+    """
+    sentiment: str
+    key_topics: List[str]
+    response_recommendation: str
+    urgency_score: int
+    sentiment_confidence: float
+    topic_accuracy: float = 0.85
+    polarity: Optional[float] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        # Same shape as the "analysis"/"confidence_scores" part of a ReviewResponse
+        return {
+            "analysis": {
+                "sentiment": self.sentiment,
+                "key_topics": list(self.key_topics),
+                "response_recommendation": self.response_recommendation,
+                "urgency_score": self.urgency_score
+            },
+            "confidence_scores": {
+                "sentiment": self.sentiment_confidence,
+                "topic_accuracy": self.topic_accuracy
+            }
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "AnalysisRecord":
+        analysis = data["analysis"]
+        scores = data["confidence_scores"]
+        return cls(
+            sentiment=analysis["sentiment"],
+            key_topics=list(analysis["key_topics"]),
+            response_recommendation=analysis["response_recommendation"],
+            urgency_score=analysis["urgency_score"],
+            sentiment_confidence=scores["sentiment"],
+            topic_accuracy=scores["topic_accuracy"],
+            polarity=data.get("polarity")
+        )
+    
+    def to_models(self) -> Dict[str, Any]:
+        return {
+            "analysis": ReviewAnalysis(
+                sentiment=self.sentiment,
+                key_topics=list(self.key_topics),
+                response_recommendation=self.response_recommendation,
+                urgency_score=self.urgency_score
+            ),
+            "confidence_scores": ConfidenceScores(
+                sentiment=self.sentiment_confidence,
+                topic_accuracy=self.topic_accuracy
+            )
+        }
@@ -0,0 +1,178 @@
+import asyncio
+import bisect
+import hashlib
+import itertools
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+from urllib.parse import urlsplit, urlunsplit
+import logging
+
+import aiohttp
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ("least-outstanding", "hash")
+
+# Points per endpoint on the hash ring; more points spread keys more evenly
+_RING_REPLICAS = 100
+
+
+def _ring_hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+
+class Endpoint:
+    """One analyzer endpoint: its in-flight count, health and request statistics."""
+
+    def __init__(self, url: str):
+        self.url = url
+        parts = urlsplit(url)
+        self.health_url = urlunsplit((parts.scheme, parts.netloc, "/health", "", ""))
+        self.outstanding = 0
+        self.healthy = True
+        self.ejected_at = 0.0
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.latencies: List[float] = []
+        self.failures = 0
+
+    def report(self, elapsed: float) -> Dict:
+        ok = len(self.latencies)
+        report = {
+            "url": self.url,
+            "healthy": self.healthy,
+            "requests": ok + self.failures,
+            "ok": ok,
+            "failed": self.failures,
+            "ejections": self.ejections,
+            "posts_per_s": round(ok / elapsed, 2) if elapsed > 0 else 0.0
+        }
+        if ok:
+            p50, p95 = np.percentile(np.array(self.latencies) * 1000, [50, 95])
+            report.update({"p50_ms": round(p50, 1), "p95_ms": round(p95, 1)})
+        return report
+
+
+class EndpointPool:
+    """
+    Spreads requests over several analyzer endpoints.
+
+    ``least-outstanding`` sends each request to the healthy endpoint with the
+    fewest requests in flight, so faster servers take more work.
+    ``hash`` places endpoints on a consistent-hash ring and sends a post id
+    to the same endpoint every time, so results cached by that server are
+    reused on reruns. When an endpoint leaves, only its own ids move, to the
+    next endpoint on the ring.
+
+    After ``failure_threshold`` consecutive connection errors or 5xx
+    responses, an endpoint is ejected. ``check_health`` (run every
+    ``health_interval`` seconds by ``health_loop``) ejects endpoints whose
+    ``/health`` fails. An ejected endpoint returns once it has been out for
+    ``eject_seconds`` and, with health checks on, answers ``/health`` again;
+    a server failing requests may still report itself healthy.
+    If every endpoint is ejected, requests go to all of them rather than
+    failing outright.
+    """
+
+    def __init__(self, urls: Sequence[str], strategy: str = "least-outstanding", failure_threshold: int = 3,
+                 eject_seconds: float = 30.0, health_interval: float = 10.0, health_timeout: float = 5.0):
+        if not urls:
+            raise ValueError("At least one endpoint URL is required")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown balancing strategy '{strategy}', expected one of {list(STRATEGIES)}")
+        self.endpoints = [Endpoint(url) for url in dict.fromkeys(urls)]
+        self.strategy = strategy
+        self.failure_threshold = failure_threshold
+        self.eject_seconds = eject_seconds
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.started_at = time.perf_counter()
+        # Rotates ties between equally loaded endpoints
+        self._turn = itertools.count()
+        ring = sorted((_ring_hash(f"{endpoint.url}#{i}"), n)
+                      for n, endpoint in enumerate(self.endpoints) for i in range(_RING_REPLICAS))
+        self._ring_keys = [point for point, _ in ring]
+        self._ring_endpoints = [n for _, n in ring]
+
+    def __len__(self) -> int:
+        return len(self.endpoints)
+
+    def reset_stats(self):
+        self.started_at = time.perf_counter()
+        for endpoint in self.endpoints:
+            endpoint.latencies = []
+            endpoint.failures = 0
+            endpoint.ejections = 0
+
+    def _available(self, endpoint: Endpoint, now: float) -> bool:
+        if endpoint.healthy:
+            return True
+        if self.health_interval <= 0 and now - endpoint.ejected_at >= self.eject_seconds:
+            # No health checks to restore it: give it another chance
+            endpoint.healthy = True
+            endpoint.consecutive_failures = self.failure_threshold - 1
+            return True
+        return False
+
+    def choose(self, key: Optional[str] = None, exclude: Iterable[Endpoint] = ()) -> Endpoint:
+        """Endpoint for the next request; ``exclude`` lists endpoints that already failed this request."""
+        if len(self.endpoints) == 1:
+            return self.endpoints[0]
+        now = time.monotonic()
+        exclude = set(exclude)
+        candidates = [e for e in self.endpoints if e not in exclude and self._available(e, now)]
+        if not candidates:
+            # Everything is ejected or already tried: any endpoint beats failing the post
+            candidates = [e for e in self.endpoints if e not in exclude] or self.endpoints
+        if self.strategy == "hash" and key is not None:
+            allowed = set(map(id, candidates))
+            start = bisect.bisect(self._ring_keys, _ring_hash(key))
+            for i in range(len(self._ring_endpoints)):
+                endpoint = self.endpoints[self._ring_endpoints[(start + i) % len(self._ring_endpoints)]]
+                if id(endpoint) in allowed:
+                    return endpoint
+        turn = next(self._turn)
+        return min(candidates, key=lambda e: (e.outstanding, (self.endpoints.index(e) - turn) % len(self.endpoints)))
+
+    def on_success(self, endpoint: Endpoint, latency: float):
+        endpoint.latencies.append(latency)
+        endpoint.consecutive_failures = 0
+
+    def on_failure(self, endpoint: Endpoint):
+        endpoint.failures += 1
+        endpoint.consecutive_failures += 1
+        if endpoint.healthy and endpoint.consecutive_failures >= self.failure_threshold and len(self.endpoints) > 1:
+            self._eject(endpoint, f"{endpoint.consecutive_failures} consecutive failures")
+
+    def _eject(self, endpoint: Endpoint, reason: str):
+        endpoint.healthy = False
+        endpoint.ejected_at = time.monotonic()
+        endpoint.ejections += 1
+        logger.warning(f"Ejecting endpoint {endpoint.url}: {reason}")
+
+    async def check_health(self, session: aiohttp.ClientSession):
+        async def check(endpoint: Endpoint):
+            try:
+                async with session.get(endpoint.health_url,
+                                       timeout=aiohttp.ClientTimeout(total=self.health_timeout)) as response:
+                    ok = response.status == 200
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                ok = False
+            if ok and not endpoint.healthy and time.monotonic() - endpoint.ejected_at >= self.eject_seconds:
+                endpoint.healthy = True
+                endpoint.consecutive_failures = 0
+                logger.info(f"Endpoint {endpoint.url} is healthy again")
+            elif not ok and endpoint.healthy:
+                self._eject(endpoint, "health check failed")
+
+        await asyncio.gather(*(check(endpoint) for endpoint in self.endpoints))
+
+    async def health_loop(self, session: aiohttp.ClientSession):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            await self.check_health(session)
+
+    def report(self) -> List[Dict]:
+        elapsed = time.perf_counter() - self.started_at
+        return [endpoint.report(elapsed) for endpoint in self.endpoints]
@@ -0,0 +1,338 @@
+import json
+import math
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from app.processing.json_stream import iter_json_array
+
+logger = logging.getLogger(__name__)
+
+FORMAT = "columnar-results"
+VERSION = 1
+
+SENTIMENTS = ("positive", "negative", "mixed")
+
+# name -> dtype of each fixed-width column, stored little-endian
+COLUMNS = {
+    "urgency": "<u1",
+    "sentiment": "<i1",
+    "confidence": "<f4",
+    "created_utc": "<f8",
+    "topics": "<u8",
+    "subreddit": "<i4",
+    "template": "<i4",
+    "review_id_offsets": "<i8"
+}
+# Dictionary-encoded columns; a code of -1 means missing
+DICTIONARY_COLUMNS = ("subreddit", "template")
+
+# Topics are a set per post, stored as a bitmask over the topic dictionary
+MAX_TOPICS = 64
+
+HEADER_FILE = "header.json"
+REVIEW_ID_FILE = "review_id.bin"
+
+
+class ColumnarWriter:
+    """
+    Writes analysis results as a directory of memory-mappable columns.
+
+    Each fixed-width column is a raw little-endian array in ``<name>.bin``,
+    appended ``chunk_size`` rows at a time, so memory stays flat however
+    many results are written:
+
+    - ``urgency`` (uint8, 0 for failed analyses)
+    - ``sentiment`` (int8 index into ``SENTIMENTS``, -1 for failed analyses)
+    - ``confidence`` (float32 sentiment confidence, NaN for failed analyses)
+    - ``created_utc`` (float64, NaN when unknown)
+    - ``topics`` (uint64 bitmask over the ``topic`` dictionary)
+    - ``subreddit`` and ``template`` (int32 codes into their dictionaries,
+      ``template`` being the response recommendation)
+
+    Review ids are stored as UTF-8 bytes in ``review_id.bin``, with
+    ``review_id_offsets`` holding row boundaries. ``header.json`` holds the
+    row count, dtypes, dictionaries and scrape metadata. It is written last,
+    on ``close``, so a directory without one is an unfinished write. When
+    the writing run fails, ``close(complete=False)`` (or leaving a ``with``
+    block by an exception) still flushes the rows written so far and
+    records ``"complete": false`` in the header.
+    """
+
+    def __init__(self, path: str, chunk_size: int = 65536, metadata: Optional[Dict[str, Any]] = None):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.metadata = dict(metadata or {})
+        self.rows = 0
+        self.errors = 0
+        self.dictionaries: Dict[str, List[str]] = {"topic": [], "subreddit": [], "template": []}
+        self._codes: Dict[str, Dict[str, int]] = {name: {} for name in self.dictionaries}
+        self._buffer: Dict[str, list] = {name: [] for name in COLUMNS}
+        self._ids: List[bytes] = []
+        self._id_bytes = 0
+        os.makedirs(path, exist_ok=True)
+        # A stale header would describe the previous contents while these are rewritten
+        if os.path.exists(os.path.join(path, HEADER_FILE)):
+            os.remove(os.path.join(path, HEADER_FILE))
+        self._files = {name: open(os.path.join(path, f"{name}.bin"), "wb") for name in COLUMNS}
+        self._files["review_id"] = open(os.path.join(path, REVIEW_ID_FILE), "wb")
+        self._buffer["review_id_offsets"].append(0)
+
+    def __enter__(self) -> "ColumnarWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(complete=exc_type is None)
+
+    def _code(self, dictionary: str, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        codes = self._codes[dictionary]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(codes)
+            self.dictionaries[dictionary].append(value)
+        return code
+
+    def add(self, result: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None):
+        """Append one result; ``subreddit`` and ``created_utc`` come from ``metadata`` or the result's own."""
+        metadata = metadata or result.get("metadata") or {}
+        analysis = result.get("analysis")
+        buffer = self._buffer
+        if isinstance(analysis, dict) and not result.get("error"):
+            sentiment = analysis.get("sentiment")
+            buffer["sentiment"].append(SENTIMENTS.index(sentiment) if sentiment in SENTIMENTS else -1)
+            buffer["urgency"].append(analysis.get("urgency_score") or 0)
+            buffer["confidence"].append((result.get("confidence_scores") or {}).get("sentiment", math.nan))
+            mask = 0
+            for topic in analysis.get("key_topics") or ():
+                code = self._code("topic", topic)
+                if code >= MAX_TOPICS:
+                    raise ValueError(f"More than {MAX_TOPICS} distinct topics; '{topic}' has no bit left")
+                mask |= 1 << code
+            buffer["topics"].append(mask)
+            buffer["template"].append(self._code("template", analysis.get("response_recommendation")))
+        else:
+            self.errors += 1
+            buffer["sentiment"].append(-1)
+            buffer["urgency"].append(0)
+            buffer["confidence"].append(math.nan)
+            buffer["topics"].append(0)
+            buffer["template"].append(-1)
+        created = metadata.get("created_utc")
+        buffer["created_utc"].append(float(created) if isinstance(created, (int, float)) else math.nan)
+        buffer["subreddit"].append(self._code("subreddit", metadata.get("subreddit")))
+        review_id = str(result.get("review_id") or "").encode("utf-8")
+        self._ids.append(review_id)
+        self._id_bytes += len(review_id)
+        buffer["review_id_offsets"].append(self._id_bytes)
+        self.rows += 1
+        if len(self._ids) >= self.chunk_size:
+            self._flush()
+
+    def add_many(self, rows: Iterable[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]]):
+        for result, metadata in rows:
+            self.add(result, metadata)
+
+    def _flush(self):
+        for name, dtype in COLUMNS.items():
+            values = self._buffer[name]
+            if values:
+                np.asarray(values, dtype=dtype).tofile(self._files[name])
+                values.clear()
+        self._files["review_id"].write(b"".join(self._ids))
+        self._ids.clear()
+
+    def _close_files(self):
+        for f in self._files.values():
+            f.close()
+
+    def close(self, complete: bool = True):
+        if self._files["review_id"].closed:
+            return
+        try:
+            self._flush()
+        finally:
+            self._close_files()
+        header = {
+            "format": FORMAT,
+            "version": VERSION,
+            "complete": complete,
+            "rows": self.rows,
+            "errors": self.errors,
+            "columns": COLUMNS,
+            "sentiments": list(SENTIMENTS),
+            "dictionaries": self.dictionaries,
+            **self.metadata
+        }
+        tmp_file = os.path.join(self.path, f"{HEADER_FILE}.tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(header, f, indent=2)
+        os.replace(tmp_file, os.path.join(self.path, HEADER_FILE))
+
+
+class ColumnarResults:
+    """
+    Read side of a ``ColumnarWriter`` directory.
+
+    Every column is an ``np.memmap``, so opening is instant and only the
+    pages a computation touches are read. Filters and aggregates are plain
+    vectorized NumPy::
+
+        results = ColumnarResults("results_columnar")
+        urgent = (results["urgency"] >= 4) & results.has_topic("technical")
+        results.counts("subreddit", urgent)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, HEADER_FILE), "r", encoding="utf-8") as f:
+            self.header = json.load(f)
+        if self.header.get("format") != FORMAT:
+            raise ValueError(f"{path} is not a columnar results directory")
+        if self.header.get("version", 0) > VERSION:
+            raise ValueError(f"{path} uses columnar format version {self.header['version']}, newer than {VERSION}")
+        self.rows = self.header["rows"]
+        self.dictionaries: Dict[str, List[str]] = self.header["dictionaries"]
+        self.dictionaries["sentiment"] = self.header["sentiments"]
+        self._columns: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        column = self._columns.get(name)
+        if column is None:
+            dtype = np.dtype(self.header["columns"][name])
+            shape = self.rows + 1 if name == "review_id_offsets" else self.rows
+            if shape == 0:
+                column = np.zeros(0, dtype=dtype)
+            else:
+                column = np.memmap(os.path.join(self.path, f"{name}.bin"), dtype=dtype, mode="r", shape=(shape,))
+            self._columns[name] = column
+        return column
+
+    def code(self, name: str, value: str) -> int:
+        """Code of ``value`` in a dictionary column, or -1 when no row has it."""
+        try:
+            return self.dictionaries[name].index(value)
+        except ValueError:
+            return -1
+
+    def equals(self, name: str, value: str) -> np.ndarray:
+        """Boolean mask of rows whose sentiment, subreddit or template is ``value``."""
+        code = self.code(name, value)
+        return self[name] == code if code >= 0 else np.zeros(self.rows, dtype=bool)
+
+    def has_topic(self, topic: str) -> np.ndarray:
+        code = self.code("topic", topic)
+        if code < 0:
+            return np.zeros(self.rows, dtype=bool)
+        return (self["topics"] & np.uint64(1 << code)) != 0
+
+    def counts(self, name: str, mask: Optional[np.ndarray] = None) -> Dict[str, int]:
+        """Row count per value of a dictionary column (or per topic), optionally over ``mask`` rows only."""
+        if name == "topic":
+            topics = self["topics"] if mask is None else self["topics"][mask]
+            return {topic: int(np.count_nonzero(topics & np.uint64(1 << code)))
+                    for code, topic in enumerate(self.dictionaries["topic"])}
+        codes = self[name] if mask is None else self[name][mask]
+        labels = self.dictionaries[name]
+        valid = codes[codes >= 0]
+        totals = np.bincount(valid, minlength=len(labels)) if len(valid) else np.zeros(len(labels), dtype=np.int64)
+        return {label: int(total) for label, total in zip(labels, totals)}
+
+    def review_id(self, row: int) -> str:
+        offsets = self["review_id_offsets"]
+        start, end = int(offsets[row]), int(offsets[row + 1])
+        with open(os.path.join(self.path, REVIEW_ID_FILE), "rb") as f:
+            f.seek(start)
+            return f.read(end - start).decode("utf-8")
+
+    def review_ids(self, rows: Optional[np.ndarray] = None) -> List[str]:
+        """Review ids of ``rows`` (indices or a boolean mask), or of every row."""
+        offsets = self["review_id_offsets"]
+        if rows is None:
+            rows = np.arange(self.rows)
+        elif rows.dtype == bool:
+            rows = np.flatnonzero(rows)
+        if self.rows == 0 or offsets[-1] == 0:
+            return [""] * len(rows)
+        blob = np.memmap(os.path.join(self.path, REVIEW_ID_FILE), dtype=np.uint8, mode="r")
+        return [bytes(blob[offsets[i]:offsets[i + 1]]).decode("utf-8") for i in rows]
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """One row decoded back to the JSON result shape, plus its metadata."""
+        sentiment = int(self["sentiment"][index])
+        subreddit = int(self["subreddit"][index])
+        created = float(self["created_utc"][index])
+        metadata = {
+            "subreddit": self.dictionaries["subreddit"][subreddit] if subreddit >= 0 else None,
+            "created_utc": None if math.isnan(created) else created
+        }
+        if sentiment < 0:
+            return {"review_id": self.review_id(index), "error": "analysis failed", "metadata": metadata}
+        mask = int(self["topics"][index])
+        template = int(self["template"][index])
+        return {
+            "review_id": self.review_id(index),
+            "analysis": {
+                "sentiment": self.dictionaries["sentiment"][sentiment],
+                "key_topics": [topic for code, topic in enumerate(self.dictionaries["topic"]) if mask >> code & 1],
+                "response_recommendation": self.dictionaries["template"][template] if template >= 0 else None,
+                "urgency_score": int(self["urgency"][index])
+            },
+            "confidence_scores": {"sentiment": float(self["confidence"][index])},
+            "metadata": metadata
+        }
+
+
+def iter_json_results(path: str, header: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Results from a ``process_reviews`` output, streamed without loading the file.
+
+    Accepts the JSON output (an object with a ``results`` array, or a bare
+    array of results) and the ``--stream`` JSONL output.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+        first = f.read(1)
+        while first and first.isspace():
+            first = f.read(1)
+        f.seek(0)
+        yield from iter_json_array(f, () if first == "[" else ("results",), header)
+
+
+def scrape_metadata(scrape_file: str) -> Dict[str, Dict[str, Any]]:
+    """subreddit and created_utc of every post in a scrape, by post id."""
+    with open(scrape_file, "r", encoding="utf-8") as f:
+        return {
+            post["id"]: {"subreddit": post.get("subreddit"), "created_utc": post.get("created_utc")}
+            for post in iter_json_array(f, ("raw_data", "reddit", "posts")) if isinstance(post, dict) and "id" in post
+        }
+
+
+def convert_json_results(results_file: str, output_dir: str, scrape_file: Optional[str] = None,
+                         chunk_size: int = 65536) -> ColumnarResults:
+    """
+    Convert ``process_reviews`` JSON or JSONL results into a columnar directory.
+
+    Results carry no post metadata, so ``scrape_file`` (the scrape they were
+    produced from) supplies subreddit and created_utc when given.
+    """
+    metadata = scrape_metadata(scrape_file) if scrape_file else {}
+    header: Dict[str, Any] = {}
+    with ColumnarWriter(output_dir, chunk_size=chunk_size) as writer:
+        for result in iter_json_results(results_file, header):
+            if isinstance(result, dict):
+                writer.add(result, metadata.get(result.get("review_id")))
+        writer.metadata.update({k: header[k] for k in ("query", "timestamp", "platforms") if k in header})
+        writer.metadata["source_file"] = os.path.abspath(results_file)
+    logger.info(f"Converted {writer.rows} results ({writer.errors} failed analyses) from {results_file} to {output_dir}")
+    return ColumnarResults(output_dir)
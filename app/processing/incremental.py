@@ -0,0 +1,132 @@
+import json
+import os
+import re
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import logging
+
+from app.services.cache import make_cache_key
+
+logger = logging.getLogger(__name__)
+
+# Reddit stops accepting edits once a post is archived; 30 days covers nearly all edits
+DEFAULT_EDIT_WINDOW_DAYS = 30.0
+
+NEW, EDITED, UNCHANGED, SETTLED = "new", "edited", "unchanged", "settled"
+
+
+def default_state_file(query: str) -> str:
+    slug = re.sub(r"[^\w-]+", "_", query.strip().lower()).strip("_") or "query"
+    return f"state_{slug}.json"
+
+
+def post_fingerprint(post_dict: Dict) -> str:
+    """Short hash of the analyzed text (title and body), so edits are detected without storing the text."""
+    title = post_dict.get("title") or ""
+    text = post_dict.get("text") or ""
+    combined = f"{title}\n\n{text}" if text else title
+    return make_cache_key(combined, "reddit")[:16]
+
+
+class WatermarkState:
+    """
+    What earlier runs over one query's scrapes already analyzed.
+
+    Holds the newest ``created_utc`` seen (the watermark) and, for each post
+    created within ``edit_window_days`` of it, its id, creation time and text
+    fingerprint. Once an analyzed post falls behind that horizon it can no
+    longer change, so only its id is kept, in ``settled``, and it is skipped
+    from then on. A post id no run has analyzed is new however old the post
+    is: it may have failed before, surfaced late in search results, or
+    predate a shortened edit window. ``output_file`` names the merged results
+    written by the last run.
+    """
+
+    def __init__(self, path: str, query: str, edit_window_days: float = DEFAULT_EDIT_WINDOW_DAYS):
+        self.path = path
+        self.query = query
+        self.edit_window = edit_window_days * 86400
+        self.watermark: Optional[float] = None
+        self.posts: Dict[str, Tuple[float, str]] = {}
+        self.settled: Set[str] = set()
+        self.output_file: Optional[str] = None
+
+    @classmethod
+    def load(cls, path: str, query: str, edit_window_days: float = DEFAULT_EDIT_WINDOW_DAYS) -> "WatermarkState":
+        state = cls(path, query, edit_window_days)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return state
+        if data.get("query") != query:
+            raise ValueError(f"State file {path} belongs to query '{data.get('query')}', not '{query}'")
+        state.watermark = data.get("watermark")
+        state.posts = {post_id: (created, fingerprint) for post_id, (created, fingerprint) in data.get("posts", {}).items()}
+        state.settled = set(data.get("settled", []))
+        state.output_file = data.get("output_file")
+        return state
+
+    @property
+    def horizon(self) -> Optional[float]:
+        return self.watermark - self.edit_window if self.watermark is not None else None
+
+    def classify(self, post_dict: Dict) -> str:
+        """NEW, EDITED, UNCHANGED or SETTLED (analyzed, then aged past the edit window; never re-analyzed)."""
+        post_id = post_dict.get("id")
+        seen = self.posts.get(post_id)
+        if seen is not None:
+            return UNCHANGED if seen[1] == post_fingerprint(post_dict) else EDITED
+        return SETTLED if post_id in self.settled else NEW
+
+    def partition(self, posts: Iterable[Dict]) -> Tuple[List[Dict], Dict[str, int]]:
+        """Posts that need analysis, plus how many posts fell in each class."""
+        pending = []
+        counts = {NEW: 0, EDITED: 0, UNCHANGED: 0, SETTLED: 0}
+        for post_dict in posts:
+            kind = self.classify(post_dict)
+            counts[kind] += 1
+            if kind in (NEW, EDITED):
+                pending.append(post_dict)
+        return pending, counts
+
+    def mark(self, post_dict: Dict):
+        created = post_dict.get("created_utc")
+        created = float(created) if isinstance(created, (int, float)) else 0.0
+        self.posts[post_dict["id"]] = (created, post_fingerprint(post_dict))
+        self.settled.discard(post_dict["id"])
+        if self.watermark is None or created > self.watermark:
+            self.watermark = created
+
+    def save(self):
+        horizon = self.horizon
+        if horizon is not None:
+            # Aged-out posts keep only their id, which is all classify() needs once they can't change
+            self.settled.update(post_id for post_id, seen in self.posts.items() if seen[0] < horizon)
+            self.posts = {post_id: seen for post_id, seen in self.posts.items() if seen[0] >= horizon}
+        state = {
+            "query": self.query,
+            "watermark": self.watermark,
+            "output_file": self.output_file,
+            "updated_at": datetime.now().isoformat(),
+            "posts": {post_id: list(seen) for post_id, seen in self.posts.items()},
+            "settled": sorted(self.settled)
+        }
+        # Write then rename, so a crash never leaves a half-written state file
+        tmp_file = f"{self.path}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(state, f, separators=(",", ":"))
+        os.replace(tmp_file, self.path)
+
+
+def load_prior_results(output_file: Optional[str]) -> Dict[str, Dict]:
+    """Results of the last incremental run by review id, or nothing when its output is gone."""
+    if not output_file:
+        return {}
+    try:
+        with open(output_file, 'r', encoding='utf-8') as f:
+            results = json.load(f).get("results", [])
+    except FileNotFoundError:
+        logger.warning(f"Previous output {output_file} is missing; only this run's results will be written")
+        return {}
+    return {result["review_id"]: result for result in results if isinstance(result, dict) and "review_id" in result}
@@ -0,0 +1,124 @@
+import json
+from typing import Any, Dict, Iterator, Optional, Sequence, TextIO
+
+_WHITESPACE = " \t\n\r"
+_NUMBER_CHARS = "0123456789.eE+-"
+
+
+class _BufferedReader:
+    """Sliding text buffer over a file that decodes one JSON value at a time."""
+
+    def __init__(self, f: TextIO, chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        # Read at least as much as is already buffered, so a value spanning
+        # many chunks is re-decoded O(log n) times rather than O(n) times
+        chunk = self.f.read(max(self.chunk_size, len(self.buf) - self.pos))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected '{char}' but found '{found or 'end of file'}'")
+        self.pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A value ending at the buffer edge may be cut short, and a number
+            # may have stopped at a chunk boundary inside "7.5" or "1e3"
+            truncated = end == len(self.buf) or (
+                isinstance(value, (int, float)) and self.buf[end] in _NUMBER_CHARS
+            )
+            if truncated and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_array(f: TextIO, path: Sequence[str], header: Optional[Dict[str, Any]] = None,
+                    chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """
+    Yield the items of the array found at ``path`` in a JSON document, one at a time.
+
+    Only one item (plus one read chunk) is held in memory at once, so the
+    document can be far larger than RAM. Top-level values outside ``path``
+    are decoded whole and stored in ``header`` when given, which is how
+    scrape metadata such as ``query`` and ``timestamp`` is recovered. An
+    empty ``path`` streams a document that is itself an array.
+    """
+    reader = _BufferedReader(f, chunk_size)
+    if path:
+        yield from _walk_object(reader, list(path), header)
+    else:
+        yield from _walk_array(reader)
+    if reader.peek():
+        raise ValueError("Unexpected data after JSON document")
+
+
+def _walk_object(reader: _BufferedReader, path: Sequence[str], header: Optional[Dict[str, Any]]) -> Iterator[Any]:
+    reader.expect("{")
+    if reader.peek() == "}":
+        reader.pos += 1
+        return
+    while True:
+        key = reader.value()
+        reader.expect(":")
+        if key == path[0]:
+            if len(path) == 1:
+                yield from _walk_array(reader)
+            else:
+                yield from _walk_object(reader, path[1:], None)
+        else:
+            value = reader.value()
+            if header is not None:
+                header[key] = value
+        separator = reader.peek()
+        reader.pos += 1
+        if separator == "}":
+            return
+        if separator != ",":
+            raise ValueError(f"Expected ',' or '}}' but found '{separator or 'end of file'}'")
+
+
+def _walk_array(reader: _BufferedReader) -> Iterator[Any]:
+    reader.expect("[")
+    if reader.peek() == "]":
+        reader.pos += 1
+        return
+    while True:
+        yield reader.value()
+        separator = reader.peek()
+        reader.pos += 1
+        if separator == "]":
+            return
+        if separator != ",":
+            raise ValueError(f"Expected ',' or ']' but found '{separator or 'end of file'}'")
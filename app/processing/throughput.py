@@ -0,0 +1,128 @@
+import asyncio
+import random
+import time
+from collections import Counter, deque
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# The latency baseline is this quantile of the recent window, judged after this many samples
+_BASELINE_QUANTILE = 0.1
+_MIN_BASELINE_SAMPLES = 10
+
+
+class ConcurrencyLimiter:
+    """
+    Bounds the number of requests in flight.
+
+    With ``adaptive=False`` the limit stays at ``max_limit``. With
+    ``adaptive=True`` it starts lower and follows an AIMD policy: it grows by
+    one after a full window of healthy responses, shrinks by one when latency
+    exceeds ``latency_tolerance`` times the baseline latency, and halves on
+    overload responses (429/5xx). The baseline is the 10th percentile of the
+    last ``baseline_window`` latencies, so a rare very fast response (a
+    server-side cache hit) doesn't make every normal one look like a spike,
+    and it rises again when the server gets slower for good. Latency spikes
+    are only judged once ``_MIN_BASELINE_SAMPLES`` latencies have been seen.
+    Decreases happen at most once per ``cooldown`` seconds so a burst of
+    failures already in flight doesn't collapse the limit to one.
+    """
+
+    def __init__(self, max_limit: int, adaptive: bool = False, min_limit: int = 1,
+                 latency_tolerance: float = 2.0, cooldown: float = 1.0, baseline_window: int = 100):
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.adaptive = adaptive
+        self.limit = max(self.min_limit, self.max_limit // 2) if adaptive else self.max_limit
+        self.latency_tolerance = latency_tolerance
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.peak_limit = self.limit
+        self._healthy = 0
+        self._recent_latencies: deque = deque(maxlen=max(baseline_window, _MIN_BASELINE_SAMPLES))
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    async def release(self):
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self, latency: float):
+        if not self.adaptive:
+            return
+        recent = self._recent_latencies
+        recent.append(latency)
+        if len(recent) >= _MIN_BASELINE_SAMPLES:
+            baseline = sorted(recent)[int(len(recent) * _BASELINE_QUANTILE)]
+            if latency > baseline * self.latency_tolerance:
+                self._decrease(self.limit - 1)
+                return
+        self._healthy += 1
+        if self._healthy >= self.limit and self.limit < self.max_limit:
+            self._healthy = 0
+            self.limit += 1
+            self.peak_limit = max(self.peak_limit, self.limit)
+            self._wake()
+
+    def on_overload(self):
+        if self.adaptive:
+            self._decrease(self.limit // 2)
+
+    def _decrease(self, new_limit: int):
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self._healthy = 0
+        self.limit = max(self.min_limit, new_limit)
+
+    def _wake(self):
+        # Let waiters re-check the raised limit without holding the condition
+        async def notify():
+            async with self._condition:
+                self._condition.notify_all()
+        asyncio.ensure_future(notify())
+
+
+def backoff_delay(attempt: int, base: float = 0.25, cap: float = 10.0) -> float:
+    """Exponential backoff with full jitter for retry ``attempt`` (0-based)."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class ThroughputStats:
+    """Collects per-post latencies and outcomes for an end-of-run report."""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.finished_at: Optional[float] = None
+        self.latencies: List[float] = []
+        self.outcomes: Counter = Counter()
+        self.retries = 0
+
+    def record(self, latency: float, outcome: str):
+        self.latencies.append(latency)
+        self.outcomes[outcome] += 1
+
+    def finish(self):
+        self.finished_at = time.perf_counter()
+
+    def report(self) -> Dict:
+        elapsed = (self.finished_at or time.perf_counter()) - self.started_at
+        count = len(self.latencies)
+        report = {
+            "posts": count,
+            "elapsed_s": round(elapsed, 3),
+            "posts_per_s": round(count / elapsed, 2) if elapsed > 0 else 0.0,
+            "retries": self.retries,
+            "outcomes": dict(self.outcomes)
+        }
+        if count:
+            p50, p95, p99 = np.percentile(np.array(self.latencies) * 1000, [50, 95, 99])
+            report.update({"p50_ms": round(p50, 1), "p95_ms": round(p95, 1), "p99_ms": round(p99, 1)})
+        return report
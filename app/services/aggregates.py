@@ -0,0 +1,360 @@
+import fcntl
+import glob
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import logging
+
+from app.models.review import AnalysisRecord
+
+logger = logging.getLogger(__name__)
+
+SENTIMENTS = ("positive", "negative", "mixed")
+URGENCY_LEVELS = 5
+GROUP_FIELDS = ("subreddit", "topic", "bucket")
+
+# (subreddit, topic, bucket start); topic None counts every post once, whatever its topics
+Key = Tuple[Optional[str], Optional[str], int]
+
+# Snapshots of workers that are gone are merged into this file
+ARCHIVE_FILE = "aggregates-archive.json"
+
+
+class RunningStats:
+    """
+    Constant-size statistics of a stream of analyses.
+
+    Counts per sentiment, a fixed-bucket urgency histogram and Welford's
+    running mean/variance of polarity. ``merge`` combines two instances as
+    if one had seen both streams (Chan et al.'s parallel update), so
+    per-worker statistics can be rolled up without the underlying results.
+    """
+
+    __slots__ = ("count", "sentiments", "urgency", "polarity_count", "polarity_mean", "polarity_m2")
+
+    def __init__(self):
+        self.count = 0
+        self.sentiments = dict.fromkeys(SENTIMENTS, 0)
+        self.urgency = [0] * URGENCY_LEVELS
+        self.polarity_count = 0
+        self.polarity_mean = 0.0
+        self.polarity_m2 = 0.0
+
+    def add(self, sentiment: str, urgency: int, polarity: Optional[float] = None):
+        self.count += 1
+        self.sentiments[sentiment] = self.sentiments.get(sentiment, 0) + 1
+        self.urgency[min(max(urgency, 1), URGENCY_LEVELS) - 1] += 1
+        # Results cached before polarity was recorded only count towards the rest
+        if polarity is not None:
+            self.polarity_count += 1
+            delta = polarity - self.polarity_mean
+            self.polarity_mean += delta / self.polarity_count
+            self.polarity_m2 += delta * (polarity - self.polarity_mean)
+
+    def merge(self, other: "RunningStats"):
+        self.count += other.count
+        for sentiment, count in other.sentiments.items():
+            self.sentiments[sentiment] = self.sentiments.get(sentiment, 0) + count
+        self.urgency = [a + b for a, b in zip(self.urgency, other.urgency)]
+        n = self.polarity_count + other.polarity_count
+        if n:
+            delta = other.polarity_mean - self.polarity_mean
+            self.polarity_mean += delta * other.polarity_count / n
+            self.polarity_m2 += other.polarity_m2 + delta * delta * self.polarity_count * other.polarity_count / n
+        self.polarity_count = n
+
+    @property
+    def polarity_variance(self) -> float:
+        # Sample variance; 0 until there are two observations
+        return self.polarity_m2 / (self.polarity_count - 1) if self.polarity_count > 1 else 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sentiment": dict(self.sentiments),
+            "polarity": {
+                "count": self.polarity_count,
+                "mean": self.polarity_mean,
+                "variance": self.polarity_variance,
+                "stddev": math.sqrt(self.polarity_variance)
+            },
+            "urgency_histogram": {str(level + 1): count for level, count in enumerate(self.urgency)}
+        }
+
+    def to_list(self) -> list:
+        return [self.count, self.sentiments, self.urgency, self.polarity_count, self.polarity_mean, self.polarity_m2]
+
+    @classmethod
+    def from_list(cls, data: list) -> "RunningStats":
+        stats = cls()
+        stats.count, sentiments, urgency, stats.polarity_count, stats.polarity_mean, stats.polarity_m2 = data
+        stats.sentiments.update(sentiments)
+        stats.urgency = list(urgency)
+        return stats
+
+
+class Aggregates:
+    """
+    Running sentiment statistics keyed by (subreddit, topic, time bucket).
+
+    ``add`` updates a few constant-size entries per analysis, so rollups need
+    no recomputation at query time. Posts are bucketed by ``created_utc``
+    (or the time they were analyzed) into ``bucket_seconds`` windows. With a
+    ``snapshot_dir``, each instance (one per worker process) periodically
+    writes its entries to its own file there, and ``query`` merges the other
+    workers' files into the result. Parsed files are cached by modification
+    time, so a query only re-reads snapshots that changed. A live worker's
+    ``snapshot`` keeps its file's modification time fresh. Files left
+    untouched for ``stale_seconds`` belong to workers that are gone, and
+    ``compact`` folds them into one archive file, so totals survive restarts
+    without the directory growing with every one.
+    """
+
+    def __init__(self, bucket_seconds: int = 3600, snapshot_dir: Optional[str] = None,
+                 stale_seconds: float = 300.0):
+        self.bucket_seconds = bucket_seconds
+        self.snapshot_dir = snapshot_dir
+        self.stale_seconds = stale_seconds
+        self._entries: Dict[Key, RunningStats] = {}
+        self._lock = threading.Lock()
+        # Snapshots run in executor threads; one at a time, as they share a temp file
+        self._snapshot_lock = threading.Lock()
+        self._version = 0
+        self._snapshot_version = 0
+        self._snapshot_path = None
+        self._last_compaction = 0.0
+        # path -> (mtime_ns, size, parsed snapshot)
+        self._peer_cache: Dict[str, Tuple[int, int, Dict[str, Any]]] = {}
+        if snapshot_dir:
+            os.makedirs(snapshot_dir, exist_ok=True)
+            self.reopen()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def reopen(self):
+        """Write snapshots to a new file of its own, e.g. in a forked worker."""
+        if self.snapshot_dir:
+            self._snapshot_path = os.path.join(self.snapshot_dir, f"aggregates-{uuid.uuid4().hex}.json")
+            self._snapshot_version = 0
+            self._peer_cache = {}
+            self.compact()
+
+    def _update(self, key: Key, record: AnalysisRecord):
+        stats = self._entries.get(key)
+        if stats is None:
+            stats = self._entries[key] = RunningStats()
+        stats.add(record.sentiment, record.urgency_score, record.polarity)
+
+    def add(self, record: AnalysisRecord, subreddit: Optional[str] = None, created_utc: Optional[float] = None):
+        when = created_utc if created_utc is not None else time.time()
+        bucket = int(when // self.bucket_seconds) * self.bucket_seconds
+        with self._lock:
+            self._update((subreddit, None, bucket), record)
+            for topic in set(record.key_topics):
+                self._update((subreddit, topic, bucket), record)
+            self._version += 1
+
+    def merge(self, other: "Aggregates"):
+        with self._lock:
+            for key, stats in other._entries.items():
+                mine = self._entries.get(key)
+                if mine is None:
+                    mine = self._entries[key] = RunningStats()
+                mine.merge(stats)
+            self._version += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = [[*key, stats.to_list()] for key, stats in self._entries.items()]
+        return {"bucket_seconds": self.bucket_seconds, "entries": entries}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Aggregates":
+        aggregates = cls(bucket_seconds=data["bucket_seconds"])
+        for subreddit, topic, bucket, stats in data["entries"]:
+            aggregates._entries[(subreddit, topic, bucket)] = RunningStats.from_list(stats)
+        return aggregates
+
+    def snapshot(self):
+        """Write this instance's entries to its snapshot file if they changed since the last write."""
+        if self._snapshot_path is None:
+            return
+        with self._snapshot_lock:
+            if self._version == self._snapshot_version:
+                # Unchanged, but still alive: keep the file from being compacted as stale
+                if self._snapshot_version:
+                    os.utime(self._snapshot_path)
+            else:
+                version = self._version
+                tmp_path = f"{self._snapshot_path}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self.to_dict(), f, separators=(",", ":"))
+                os.replace(tmp_path, self._snapshot_path)
+                self._snapshot_version = version
+            if time.monotonic() - self._last_compaction >= self.stale_seconds:
+                self.compact()
+
+    def compact(self):
+        """
+        Merge snapshots untouched for ``stale_seconds`` into the archive file and delete them.
+
+        The archive lists the files it absorbed, so a crash between writing
+        it and deleting them never counts them twice. Workers compact under
+        an exclusive lock on the directory.
+        """
+        if not self.snapshot_dir:
+            return
+        self._last_compaction = time.monotonic()
+        archive_path = os.path.join(self.snapshot_dir, ARCHIVE_FILE)
+        with open(os.path.join(self.snapshot_dir, ".compact.lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            archive = self._read_snapshot(archive_path) or {"bucket_seconds": self.bucket_seconds, "entries": []}
+            merged_names = set(archive.get("merged", ()))
+            now = time.time()
+            stale = []
+            for path in self._snapshot_files():
+                name = os.path.basename(path)
+                if path == self._snapshot_path or name in merged_names:
+                    continue
+                try:
+                    if now - os.path.getmtime(path) < self.stale_seconds:
+                        continue
+                except OSError:
+                    continue
+                stale.append(path)
+            if stale:
+                combined = Aggregates.from_dict(archive)
+                absorbed = []
+                for path in stale:
+                    data = self._read_snapshot(path)
+                    if data is not None and data["bucket_seconds"] == combined.bucket_seconds:
+                        combined.merge(Aggregates.from_dict(data))
+                        absorbed.append(os.path.basename(path))
+                existing = {os.path.basename(path) for path in glob.glob(os.path.join(self.snapshot_dir, "aggregates-*.json"))}
+                # Names of files already deleted can't be double counted any more
+                merged_names = {name for name in merged_names if name in existing} | set(absorbed)
+                data = {**combined.to_dict(), "merged": sorted(merged_names)}
+                tmp_path = f"{archive_path}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f, separators=(",", ":"))
+                os.replace(tmp_path, archive_path)
+                logger.info(f"Compacted {len(absorbed)} stale aggregates snapshots into {archive_path}")
+            for name in merged_names:
+                try:
+                    os.remove(os.path.join(self.snapshot_dir, name))
+                except FileNotFoundError:
+                    pass
+
+    def _snapshot_files(self) -> List[str]:
+        return [path for path in glob.glob(os.path.join(self.snapshot_dir, "aggregates-*.json"))
+                if os.path.basename(path) != ARCHIVE_FILE]
+
+    def _read_snapshot(self, path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if not isinstance(data, dict) or "bucket_seconds" not in data or "entries" not in data:
+                raise ValueError("not an aggregates snapshot")
+            return data
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Skipping unreadable aggregates snapshot {path}: {str(e)}")
+            return None
+
+    def _peer_snapshots(self) -> Iterable[Dict[Key, RunningStats]]:
+        """Entries of the other workers' snapshots and the archive, parsing only files that changed."""
+        if not self.snapshot_dir:
+            return
+        cache = {}
+        peers = []
+        for path in glob.glob(os.path.join(self.snapshot_dir, "aggregates-*.json")):
+            if path == self._snapshot_path:
+                continue
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            cached = self._peer_cache.get(path)
+            if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+                cache[path] = cached
+            else:
+                data = self._read_snapshot(path)
+                if data is None:
+                    continue
+                entries = Aggregates.from_dict(data)._entries if data["bucket_seconds"] == self.bucket_seconds else {}
+                cache[path] = (stat.st_mtime_ns, stat.st_size, {"merged": set(data.get("merged", ())), "entries": entries})
+            peers.append(path)
+        self._peer_cache = cache
+        archive = cache.get(os.path.join(self.snapshot_dir, ARCHIVE_FILE))
+        merged = archive[2]["merged"] if archive is not None else set()
+        for path in peers:
+            if os.path.basename(path) not in merged:
+                yield cache[path][2]["entries"]
+
+    def query(self, subreddit: Optional[str] = None, topic: Optional[str] = None,
+              since: Optional[float] = None, until: Optional[float] = None,
+              group_by: Sequence[str] = GROUP_FIELDS) -> List[Dict[str, Any]]:
+        """
+        Statistics of the matching entries, merged over the fields not in ``group_by``.
+
+        Includes the other workers' snapshots. ``since``/``until`` select the
+        time buckets that start in [since, until).
+        """
+        unknown = set(group_by) - set(GROUP_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown group_by fields: {sorted(unknown)}")
+
+        by_topic = "topic" in group_by
+        groups: Dict[tuple, RunningStats] = {}
+
+        def collect(entries: Dict[Key, RunningStats]):
+            # Only matching entries are merged, into one accumulator per output group
+            for (entry_subreddit, entry_topic, bucket), stats in entries.items():
+                if subreddit is not None and entry_subreddit != subreddit:
+                    continue
+                # Per-topic entries overlap (a post can have several topics); the
+                # topic-less entries count each post once
+                if topic is not None:
+                    if entry_topic != topic:
+                        continue
+                elif (entry_topic is None) == by_topic:
+                    continue
+                if (since is not None and bucket < since) or (until is not None and bucket >= until):
+                    continue
+                values = {"subreddit": entry_subreddit, "topic": entry_topic, "bucket": bucket}
+                group = tuple(values[field] for field in group_by)
+                merged = groups.get(group)
+                if merged is None:
+                    merged = groups[group] = RunningStats()
+                merged.merge(stats)
+
+        with self._lock:
+            collect(self._entries)
+        for entries in self._peer_snapshots():
+            collect(entries)
+
+        results = []
+        for group in sorted(groups, key=lambda g: tuple((v is not None, v) for v in g)):
+            results.append({**dict(zip(group_by, group)), **groups[group].summary()})
+        return results
+
+
+def aggregates_from_env() -> Optional[Aggregates]:
+    """
+    Build the aggregates configured by AGGREGATES_* environment variables.
+
+    Returns None when AGGREGATES_ENABLED is false.
+    """
+    if os.getenv("AGGREGATES_ENABLED", "true").strip().lower() in ("0", "false", "no", "off"):
+        return None
+    return Aggregates(
+        bucket_seconds=int(os.getenv("AGGREGATES_BUCKET_SECONDS", "3600")),
+        snapshot_dir=os.getenv("AGGREGATES_DIR") or None,
+        stale_seconds=float(os.getenv("AGGREGATES_STALE_SECONDS", "300"))
+    )
@@ -1,13 +1,43 @@
-from textblob import TextBlob
 import numpy as np
-from app.models.review import ReviewAnalysis, ConfidenceScores
-from typing import Optional, Dict, Any
+from app.models.review import AnalysisRecord
+from app.services.keyword_matcher import KeywordMatcher
+from app.services.cache import AnalysisCache, make_cache_key
+from app.services.dedup import DEFAULT_THRESHOLD, DuplicateClusters
+from app.services.metrics import NULL_LAPS, StageLaps
+from app.services.preprocess import PreparedText, TextPreprocessor
+from app.services.sentiment import SentimentBackend, TextBlobBackend
+from typing import Callable, Optional, Dict, Any, List, Set, Tuple, Union
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Bump when a change to the analysis itself (keywords, urgency rules, templates) alters results
+ANALYSIS_VERSION = 1
+
+def analysis_namespace(backend_name: str, preprocessor: TextPreprocessor) -> str:
+    """Everything besides a review's text and source that decides its analysis, for keying cached results."""
+    return f"analysis-v{ANALYSIS_VERSION}:{backend_name}:{preprocessor.cache_tag}"
+
 class ReviewAnalyzer:
-    def __init__(self):
+    def __init__(self, cache: Optional[AnalysisCache] = None,
+                 sentiment_backend: Optional[SentimentBackend] = None,
+                 stage_observer: Optional[Callable[[str, float], None]] = None,
+                 preprocessor: Optional[TextPreprocessor] = None):
+        # Optional result cache, keyed by normalized text and source plus cache_namespace
+        self.cache = cache
+        
+        # Optional callback receiving (stage, seconds) after each analyze/analyze_batch call
+        self.stage_observer = stage_observer
+        
+        # Polarity/subjectivity scorer; TextBlob unless another backend is given
+        self.sentiment_backend = sentiment_backend or TextBlobBackend()
+        
+        # Markdown/URL stripping and optional length cap, applied once per text
+        self.preprocessor = preprocessor or TextPreprocessor()
+        
+        # Everything besides the text that decides a result; part of every cache key
+        self.cache_namespace = analysis_namespace(self.sentiment_backend.name, self.preprocessor)
+        
         # Load response generation templates
         self.response_templates = {
             "positive": "Thank you for your positive feedback! {}",
@@ -71,49 +101,271 @@ class ReviewAnalyzer:
             "contact": "customer_service",
             "response": "customer_service"
         }
+        
+        # Keywords that raise the urgency score
+        self.urgent_keywords = ["crash", "error", "bug", "broken", "unusable", "urgent", "not working", "down", "outage"]
+        
+        # High-visibility indicators for Reddit posts
+        self.visibility_keywords = ["everyone", "anyone else", "down for all", "global", "widespread"]
+        
+        # Verb forms matched besides plurals; generic suffixes would also match
+        # unrelated words such as "shower" or "helper"
+        self.keyword_inflections = {
+            "stream": ["streamed", "streaming"],
+            "buffer": ["buffered", "buffering"],
+            "download": ["downloaded", "downloading"],
+            "crash": ["crashed", "crashing"],
+            "freeze": ["freezing", "froze", "frozen"],
+            "glitch": ["glitched", "glitching", "glitchy"],
+            "bug": ["bugged", "buggy"]
+        }
+        
+        # Single matcher for topic and urgency signals, built once per analyzer
+        self.keyword_matcher = KeywordMatcher(
+            [(keyword, ("topic", topic)) for keyword, topic in self.reddit_keywords.items()]
+            + [(keyword, ("urgency", "urgent")) for keyword in self.urgent_keywords]
+            + [(keyword, ("urgency", "visibility")) for keyword in self.visibility_keywords],
+            inflections=self.keyword_inflections
+        )
+    
+    def warmup(self):
+        # Sentiment lexicons load lazily on first use; run every stage once so
+        # the first real request doesn't pay for it. Bypasses cache and metrics.
+        text = "Netflix warmup review: the new show is great but the app keeps crashing"
+        self.sentiment_backend.warmup()
+        prepared = self.preprocessor.prepare(text)
+        polarity = float(self.sentiment_backend.score_prepared([prepared])[0, 0])
+        sentiment = self._map_sentiment(polarity)
+        signals = self._scan(prepared)
+        topics = self._extract_topics(prepared.lower, signals)
+        response = self._generate_response(sentiment, topics)
+        urgency = self._calculate_urgency(sentiment, prepared.lower, "reddit", signals)
+        self._build_result(sentiment, topics, response, urgency, polarity).to_models()
+    
+    def _laps(self):
+        return StageLaps(self.stage_observer) if self.stage_observer is not None else NULL_LAPS
+    
+    def _scan(self, prepared: PreparedText) -> Set[Tuple[str, str]]:
+        return self.keyword_matcher.scan(prepared.lower, lowered=True)
     
     def analyze(self, text: str, source: Optional[str] = None, language: Optional[str] = None) -> Dict[str, Any]:
+        """Analyze one review; returns ``{"analysis": ReviewAnalysis, "confidence_scores": ConfidenceScores}``."""
+        return self.analyze_record(text, source).to_models()
+    
+    def analyze_record(self, text: str, source: Optional[str] = None) -> AnalysisRecord:
+        """Analyze one review into a plain AnalysisRecord, without building pydantic models."""
         try:
-            # Perform sentiment analysis using TextBlob
-            blob = TextBlob(text)
-            polarity = blob.sentiment.polarity
-            subjectivity = blob.sentiment.subjectivity
+            laps = self._laps()
+            
+            # Reuse the result of an identical text (reposts, repeated scrapes)
+            cache_key = None
+            if self.cache is not None:
+                cache_key = make_cache_key(text, source, self.cache_namespace)
+                cached = self.cache.get(cache_key)
+                laps.lap("cache_lookup")
+                if cached is not None:
+                    laps.flush()
+                    return AnalysisRecord.from_dict(cached)
+            
+            # Strip markup and lowercase once for every stage below
+            prepared = self.preprocessor.prepare(text)
+            laps.lap("preprocess")
+            
+            # Perform sentiment analysis
+            polarity = float(self.sentiment_backend.score_prepared([prepared])[0, 0])
+            laps.lap("sentiment")
             
             # Map polarity to sentiment categories
             sentiment = self._map_sentiment(polarity)
-            sentiment_confidence = abs(polarity)  # Use absolute polarity as confidence
+            
+            # Find topic and urgency keywords in a single pass
+            signals = self._scan(prepared)
+            laps.lap("keyword_scan")
             
             # Extract key topics
-            topics = self._extract_topics(text)
+            topics = self._extract_topics(prepared.lower, signals)
+            laps.lap("extract_topics")
             
             # Generate response recommendation
             response = self._generate_response(sentiment, topics)
+            laps.lap("generate_response")
             
             # Calculate urgency score
-            urgency = self._calculate_urgency(sentiment, text, source)
-            
-            # Create analysis result
-            analysis = ReviewAnalysis(
-                sentiment=sentiment,
-                key_topics=topics,
-                response_recommendation=response,
-                urgency_score=urgency
-            )
-            
-            confidence_scores = ConfidenceScores(
-                sentiment=float(sentiment_confidence),
-                topic_accuracy=0.85  # This would be dynamic in a production environment
-            )
-            
-            return {
-                "analysis": analysis,
-                "confidence_scores": confidence_scores
-            }
+            urgency = self._calculate_urgency(sentiment, prepared.lower, source, signals)
+            laps.lap("calculate_urgency")
+            
+            record = self._build_result(sentiment, topics, response, urgency, polarity)
+            laps.lap("build_result")
+            if cache_key is not None:
+                self.cache.set(cache_key, {**record.to_dict(), "polarity": record.polarity})
+                laps.lap("cache_store")
+            
+            laps.flush()
+            return record
             
         except Exception as e:
             logger.error(f"Error in review analysis: {str(e)}")
             raise
     
+    def analyze_batch(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Analyze a list of reviews in one call.
+        
+        Each item is a dict with a ``text`` key and an optional ``source``.
+        Results are returned in input order. An item that fails yields
+        ``{"error": "..."}`` in its slot instead of failing the whole batch.
+        """
+        return [
+            result.to_models() if isinstance(result, AnalysisRecord) else result
+            for result in self.analyze_batch_records(items)
+        ]
+    
+    def analyze_batch_records(self, items: List[Dict[str, Any]]) -> List[Union[AnalysisRecord, Dict[str, str]]]:
+        """Like ``analyze_batch``, but returns AnalysisRecords (or error dicts) without building models."""
+        results: List[Union[AnalysisRecord, Dict[str, str], None]] = [None] * len(items)
+        cache_keys: List[Optional[str]] = [None] * len(items)
+        prepared: List[Optional[PreparedText]] = [None] * len(items)
+        laps = self._laps()
+        
+        # Stage 1: sentiment polarity for every item not already cached,
+        # scored in one backend call
+        polarities = np.zeros(len(items), dtype=float)
+        ok = np.zeros(len(items), dtype=bool)
+        pending: List[int] = []
+        for i, item in enumerate(items):
+            try:
+                text = item["text"]
+                if self.cache is not None:
+                    cache_keys[i] = make_cache_key(text, item.get("source"), self.cache_namespace)
+                    cached = self.cache.get(cache_keys[i])
+                    if cached is not None:
+                        results[i] = AnalysisRecord.from_dict(cached)
+                        continue
+                pending.append(i)
+            except Exception as e:
+                logger.error(f"Error in batch review analysis (item {i}): {str(e)}")
+                results[i] = {"error": str(e)}
+        laps.lap("cache_lookup")
+        
+        # Clean each text once; every later stage reads the prepared form
+        for i in pending:
+            try:
+                prepared[i] = self.preprocessor.prepare(items[i]["text"])
+            except Exception as e:
+                logger.error(f"Error in batch review analysis (item {i}): {str(e)}")
+                results[i] = {"error": str(e)}
+        pending = [i for i in pending if prepared[i] is not None]
+        laps.lap("preprocess")
+        
+        if pending:
+            try:
+                scores = self.sentiment_backend.score_prepared([prepared[i] for i in pending])
+                polarities[pending] = scores[:, 0]
+                ok[pending] = True
+            except Exception:
+                # Score one by one so a single bad text only fails its own slot
+                for i in pending:
+                    try:
+                        polarities[i] = self.sentiment_backend.score_prepared([prepared[i]])[0, 0]
+                        ok[i] = True
+                    except Exception as e:
+                        logger.error(f"Error in batch review analysis (item {i}): {str(e)}")
+                        results[i] = {"error": str(e)}
+        
+        # Map polarities to sentiment categories for the whole batch at once
+        sentiments = np.where(polarities > 0.1, "positive",
+                              np.where(polarities < -0.1, "negative", "mixed"))
+        laps.lap("sentiment")
+        
+        # Stage 2: topics, responses and urgency. Responses only depend on
+        # (sentiment, topics), so they are rendered once per distinct pair.
+        responses: Dict[tuple, str] = {}
+        for i in np.flatnonzero(ok):
+            item = items[i]
+            try:
+                sentiment = str(sentiments[i])
+                signals = self._scan(prepared[i])
+                laps.lap("keyword_scan")
+                topics = self._extract_topics(prepared[i].lower, signals)
+                laps.lap("extract_topics")
+                response_key = (sentiment, frozenset(topics))
+                if response_key not in responses:
+                    responses[response_key] = self._generate_response(sentiment, topics)
+                laps.lap("generate_response")
+                urgency = self._calculate_urgency(sentiment, prepared[i].lower, item.get("source"), signals)
+                laps.lap("calculate_urgency")
+                results[i] = self._build_result(
+                    sentiment, topics, responses[response_key], urgency, float(polarities[i])
+                )
+                laps.lap("build_result")
+                if cache_keys[i] is not None:
+                    self.cache.set(cache_keys[i], {**results[i].to_dict(), "polarity": results[i].polarity})
+                    laps.lap("cache_store")
+            except Exception as e:
+                logger.error(f"Error in batch review analysis (item {i}): {str(e)}")
+                results[i] = {"error": str(e)}
+        
+        laps.flush()
+        return results
+    
+    def analyze_batch_deduplicated(self, items: List[Dict[str, Any]], threshold: float = DEFAULT_THRESHOLD
+                                   ) -> Tuple[List[Union[AnalysisRecord, Dict[str, str]]], List[Optional[int]], int]:
+        """
+        Analyze only one representative per cluster of near-duplicate texts.
+
+        Returns ``(results, duplicate_of, saved)``: every item gets the result
+        of its representative, ``duplicate_of[i]`` is that representative's
+        index (None for items analyzed themselves) and ``saved`` is the number
+        of analyses skipped. Items with other sources never share a result.
+        """
+        results: List[Union[AnalysisRecord, Dict[str, str], None]] = [None] * len(items)
+        duplicate_of: List[Optional[int]] = [None] * len(items)
+        clusters: Dict[Optional[str], DuplicateClusters] = {}
+        pending: List[int] = []
+        for i, item in enumerate(items):
+            # Malformed items are analyzed on their own and fail in their own slot
+            if isinstance(item, dict) and isinstance(item.get("text"), str):
+                source_clusters = clusters.setdefault(item.get("source"), DuplicateClusters(threshold))
+                if not source_clusters.admit(i, item["text"]):
+                    continue
+            pending.append(i)
+        
+        while pending:
+            retry = []
+            for i, record in zip(pending, self.analyze_batch_records([items[i] for i in pending])):
+                results[i] = record
+                source_clusters = clusters.get(items[i].get("source")) if isinstance(items[i], dict) else None
+                if source_clusters is not None:
+                    # A failed representative hands its cluster to the next member
+                    member = source_clusters.finish(i, record)
+                    if member is not None:
+                        retry.append(member)
+            pending = retry
+        
+        for source_clusters in clusters.values():
+            for member, analyzed, record in source_clusters.take_ready():
+                results[member], duplicate_of[member] = record, analyzed
+        return results, duplicate_of, sum(source_clusters.saved for source_clusters in clusters.values())
+    
+    def _build_result(self, sentiment: str, topics: list, response: str, urgency: int,
+                      polarity: float) -> AnalysisRecord:
+        # Create analysis result; absolute polarity is the sentiment confidence, and
+        # topic accuracy would be dynamic in a production environment
+        return AnalysisRecord(
+            sentiment=sentiment,
+            key_topics=topics,
+            response_recommendation=response,
+            urgency_score=urgency,
+            sentiment_confidence=abs(float(polarity)),
+            topic_accuracy=0.85,
+            polarity=float(polarity)
+        )
+    
+    def estimate_urgency(self, text: str, source: Optional[str] = None) -> int:
+        """Cheap urgency pre-score from keyword signals alone, without sentiment analysis."""
+        prepared = self.preprocessor.prepare(text)
+        return self._calculate_urgency("unknown", prepared.lower, source, self._scan(prepared))
+    
     def _map_sentiment(self, polarity: float) -> str:
         # Map TextBlob polarity to our sentiment categories
         if polarity > 0.1:
@@ -122,14 +374,11 @@ class ReviewAnalyzer:
             return "negative"
         return "mixed"
     
-    def _extract_topics(self, text: str) -> list:
+    def _extract_topics(self, text: str, signals: Optional[Set[Tuple[str, str]]] = None) -> list:
         # Topic extraction using Reddit-specific keywords
-        topics = set()
-        text_lower = text.lower()
-        
-        for keyword, topic in self.reddit_keywords.items():
-            if keyword in text_lower:
-                topics.add(topic)
+        if signals is None:
+            signals = self.keyword_matcher.scan(text)
+        topics = {value for kind, value in signals if kind == "topic"}
         
         return list(topics) if topics else ["general"]
     
@@ -154,10 +403,12 @@ class ReviewAnalyzer:
         
         return base_template.format(detail)
     
-    def _calculate_urgency(self, sentiment: str, text: str, source: Optional[str] = None) -> int:
+    def _calculate_urgency(self, sentiment: str, text: str, source: Optional[str] = None,
+                           signals: Optional[Set[Tuple[str, str]]] = None) -> int:
         # Enhanced urgency scoring logic for Reddit
         base_score = 1
-        text_lower = text.lower()
+        if signals is None:
+            signals = self.keyword_matcher.scan(text)
         
         # Increase score for negative sentiment
         if sentiment == "negative":
@@ -166,19 +417,13 @@ class ReviewAnalyzer:
             base_score += 1
             
         # Check for urgent keywords
-        urgent_keywords = ["crash", "error", "bug", "broken", "unusable", "urgent", "not working", "down", "outage"]
-        for keyword in urgent_keywords:
-            if keyword in text_lower:
-                base_score += 1
-                break
+        if ("urgency", "urgent") in signals:
+            base_score += 1
         
         # For Reddit, consider post visibility
         if source == "reddit":
             # Check for high-visibility indicators
-            visibility_keywords = ["everyone", "anyone else", "down for all", "global", "widespread"]
-            for keyword in visibility_keywords:
-                if keyword in text_lower:
-                    base_score += 1
-                    break
+            if ("urgency", "visibility") in signals:
+                base_score += 1
                 
-        return min(base_score, 5)  # Cap at 5 
\ No newline at end of file
+        return min(base_score, 5)  # Cap at 5
\ No newline at end of file
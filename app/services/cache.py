@@ -0,0 +1,187 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(text: str, source: Optional[str] = None, namespace: str = "") -> str:
+    """
+    Content-addressed key for an analysis: a hash of the normalized text plus source.
+
+    Normalization folds unicode to NFC and collapses whitespace, so reposts that
+    only differ in line breaks or trailing spaces share one entry. ``namespace``
+    names the settings that produced the result, so changing them never
+    serves results computed under the old ones.
+    """
+    normalized = " ".join(unicodedata.normalize("NFC", text).split())
+    digest = hashlib.sha256()
+    if namespace:
+        digest.update(namespace.encode("utf-8"))
+        digest.update(b"\x00")
+    digest.update((source or "").encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update(normalized.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class SQLiteCacheBackend:
+    """On-disk cache tier storing JSON values in a SQLite table."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connect()
+
+    def _connect(self):
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS analysis_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM analysis_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key: str, value: Dict[str, Any], created_at: float):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analysis_cache (key, value, created_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value, separators=(",", ":")), created_at)
+            )
+            self._conn.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM analysis_cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def reopen(self):
+        """Open a fresh connection, e.g. in a forked worker (SQLite connections must not cross fork)."""
+        self._lock = threading.Lock()
+        self._connect()
+
+
+class AnalysisCache:
+    """
+    Bounded LRU cache for analysis results with an optional TTL.
+
+    Values must be JSON-serializable. When a ``backend`` is given it acts as a
+    second, persistent tier: misses in memory fall through to it, and hits
+    found there are promoted back into memory.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: Optional[float] = None,
+                 backend: Optional[SQLiteCacheBackend] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.backend = backend
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl is not None and now - created_at > self.ttl
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if not self._expired(entry[1], now):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                del self._entries[key]
+
+        if self.backend is not None:
+            stored = self.backend.get(key)
+            if stored is not None:
+                if not self._expired(stored[1], now):
+                    with self._lock:
+                        self._insert(key, stored)
+                        self.hits += 1
+                    return stored[0]
+                self.backend.delete(key)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value: Dict[str, Any]):
+        created_at = time.time()
+        with self._lock:
+            self._insert(key, (value, created_at))
+        if self.backend is not None:
+            try:
+                self.backend.set(key, value, created_at)
+            except sqlite3.Error as e:
+                logger.error(f"Error writing analysis cache entry: {str(e)}")
+
+    def _insert(self, key: str, entry: Tuple[Dict[str, Any], float]):
+        # Caller holds the lock
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "backend": self.backend.path if self.backend is not None else None
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def cache_from_env() -> Optional[AnalysisCache]:
+    """
+    Build the analysis cache configured by ANALYSIS_CACHE_* environment variables.
+
+    Returns None when ANALYSIS_CACHE_SIZE is 0 and no ANALYSIS_CACHE_DB is set.
+    """
+    size = int(os.getenv("ANALYSIS_CACHE_SIZE", "10000"))
+    ttl = os.getenv("ANALYSIS_CACHE_TTL")
+    db = os.getenv("ANALYSIS_CACHE_DB")
+    if size <= 0 and not db:
+        return None
+    return AnalysisCache(
+        max_size=size,
+        ttl=float(ttl) if ttl else None,
+        backend=SQLiteCacheBackend(db) if db else None
+    )
@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+import random
+import re
+import time
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional
+import logging
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CAPTURE_FILE = "captured_requests.jsonl"
+DEFAULT_CAPTURE_PATHS = ("/analyze-review",)
+
+# Metadata kept in captured payloads; anything else a client sends is dropped
+METADATA_FIELDS = ("source", "subreddit", "score", "upvote_ratio", "num_comments", "created_utc", "language")
+
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_USER_MENTION = re.compile(r"(?<!\w)/?u/[\w-]+", re.IGNORECASE)
+_PHONE = re.compile(r"(?<![\w+])(?:\+\d{1,3}[ .-]?)?\(?\d{3}\)?[ .-]?\d{3}[ .-]?\d{4}(?!\w)")
+
+
+def sanitize_text(text: str) -> str:
+    # Personal details are replaced with placeholders of the same kind, so
+    # replayed texts still exercise the analyzer realistically
+    if "@" in text:
+        text = _EMAIL.sub("user@example.com", text)
+    if "u/" in text or "U/" in text:
+        text = _USER_MENTION.sub("u/redacted", text)
+    return _PHONE.sub("000-000-0000", text)
+
+
+def _sanitize_review(review: Any) -> Any:
+    if not isinstance(review, dict):
+        return review
+    sanitized: Dict[str, Any] = {}
+    if "review_id" in review:
+        # Stable pseudonym: repeated ids stay repeated, but don't reveal the post
+        digest = hashlib.sha256(str(review["review_id"]).encode("utf-8")).hexdigest()[:16]
+        sanitized["review_id"] = f"cap_{digest}"
+    if isinstance(review.get("text"), str):
+        sanitized["text"] = sanitize_text(review["text"])
+    elif "text" in review:
+        sanitized["text"] = review["text"]
+    if isinstance(review.get("metadata"), dict):
+        sanitized["metadata"] = {k: review["metadata"][k] for k in METADATA_FIELDS if k in review["metadata"]}
+    return sanitized
+
+
+def sanitize_payload(payload: Any) -> Any:
+    """A request body (one review or a list of them) with ids pseudonymized and personal details removed."""
+    if isinstance(payload, list):
+        return [_sanitize_review(review) for review in payload]
+    return _sanitize_review(payload)
+
+
+class RequestCapture:
+    """
+    Appends sanitized request payloads and timings to a JSONL file.
+
+    Each line is one request: its start time, method, path, response status,
+    duration and sanitized JSON body. Headers (and so tokens) are never
+    recorded. Every line is appended with a single ``write`` on an
+    ``O_APPEND`` descriptor, so several worker processes can share one file
+    without interleaving. ``sample_rate`` below 1 captures that fraction of
+    requests.
+    """
+
+    def __init__(self, path: str = DEFAULT_CAPTURE_FILE, paths: Iterable[str] = DEFAULT_CAPTURE_PATHS,
+                 sample_rate: float = 1.0, max_body_bytes: int = 1 << 20):
+        self.path = path
+        self.paths: FrozenSet[str] = frozenset(paths)
+        self.sample_rate = sample_rate
+        self.max_body_bytes = max_body_bytes
+        self.captured = 0
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+
+    def wants(self, scope: Scope) -> bool:
+        return (scope["method"] == "POST" and scope["path"] in self.paths
+                and (self.sample_rate >= 1.0 or random.random() < self.sample_rate))
+
+    def record(self, scope: Scope, started: float, duration: float, status: int,
+               body: Optional[bytes]) -> Dict[str, Any]:
+        entry: Dict[str, Any] = {
+            "ts": round(started, 6),
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status,
+            "duration_ms": round(duration * 1000, 3)
+        }
+        if scope.get("query_string"):
+            entry["query"] = scope["query_string"].decode("latin-1")
+        if body is None:
+            entry["body_truncated"] = True
+        else:
+            try:
+                entry["body"] = sanitize_payload(json.loads(body))
+            except ValueError:
+                # Malformed bodies are part of real traffic too; keep their size only
+                entry["invalid_body_bytes"] = len(body)
+        return entry
+
+    def write(self, entry: Dict[str, Any]):
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n"
+        try:
+            os.write(self._fd, line.encode("utf-8"))
+            self.captured += 1
+        except OSError as e:
+            logger.error(f"Error writing captured request to {self.path}: {str(e)}")
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class RequestCaptureMiddleware:
+    """ASGI middleware feeding matching requests to a ``RequestCapture``, body streamed through untouched."""
+
+    def __init__(self, app: ASGIApp, capture: RequestCapture):
+        self.app = app
+        self.capture = capture
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.capture.wants(scope):
+            await self.app(scope, receive, send)
+            return
+
+        capture = self.capture
+        chunks: List[bytes] = []
+        size = 0
+        truncated = False
+        status = 500
+
+        async def receive_and_record() -> Message:
+            nonlocal size, truncated
+            message = await receive()
+            if message["type"] == "http.request" and not truncated:
+                body = message.get("body", b"")
+                size += len(body)
+                if size > capture.max_body_bytes:
+                    truncated = True
+                    chunks.clear()
+                else:
+                    chunks.append(body)
+            return message
+
+        async def send_and_record(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.time()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive_and_record, send_and_record)
+        finally:
+            duration = time.perf_counter() - start
+            try:
+                capture.write(capture.record(scope, started, duration, status,
+                                             None if truncated else b"".join(chunks)))
+            except Exception as e:
+                logger.error(f"Error capturing request: {str(e)}")
+
+
+def capture_from_env() -> Optional[RequestCapture]:
+    """
+    Request capture configured by CAPTURE_* environment variables.
+
+    Returns None unless CAPTURE_ENABLED is true.
+    """
+    if os.getenv("CAPTURE_ENABLED", "false").strip().lower() not in ("1", "true", "yes", "on"):
+        return None
+    paths = [p.strip() for p in os.getenv("CAPTURE_PATHS", ",".join(DEFAULT_CAPTURE_PATHS)).split(",") if p.strip()]
+    return RequestCapture(
+        path=os.getenv("CAPTURE_FILE", DEFAULT_CAPTURE_FILE),
+        paths=paths,
+        sample_rate=float(os.getenv("CAPTURE_SAMPLE_RATE", "1.0")),
+        max_body_bytes=int(os.getenv("CAPTURE_MAX_BODY_BYTES", str(1 << 20)))
+    )
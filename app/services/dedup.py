@@ -0,0 +1,223 @@
+import re
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+# Estimated Jaccard similarity of character shingles above which two posts count as duplicates
+DEFAULT_THRESHOLD = 0.8
+
+_MASK32 = np.uint64(0xFFFFFFFF)
+# Shingles hashed per step, bounding the num_perm x chunk work array (4 MiB at 128 x 4096)
+_SIGNATURE_CHUNK = 4096
+_SHINGLE_BASE = np.uint64(1099511628211)
+
+
+_WORD = re.compile(r"\w+")
+
+
+def words(lowered: str) -> List[str]:
+    """Word tokens of an already lowercased text."""
+    return _WORD.findall(lowered)
+
+
+def normalize(text: str) -> str:
+    # Case, punctuation and whitespace differences don't make a post new
+    return " ".join(words(text.lower()))
+
+
+def _optimal_bands(num_perm: int, threshold: float, recall: float = 0.95) -> Tuple[int, int]:
+    # With b bands of r rows, texts of similarity s share a bucket with
+    # probability 1 - (1 - s^r)^b. Take the most rows per band (fewest
+    # spurious candidates) that still catch ``recall`` of the pairs right at
+    # the threshold; candidates are verified against the full signature.
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        if 1.0 - (1.0 - threshold ** rows) ** bands >= recall:
+            best = (bands, rows)
+    return best
+
+
+class NearDuplicateIndex:
+    """
+    Streaming near-duplicate detector using MinHash signatures and LSH buckets.
+
+    Texts are normalized and cut into character shingles. Each text gets a
+    MinHash signature of ``num_perm`` values, and the signature is split into
+    bands that are hashed into buckets. ``add`` only compares a text with
+    the representatives sharing one of its buckets, so indexing n texts takes
+    roughly linear time. Only representatives are indexed. A duplicate
+    always points at the representative it matched, never at another
+    duplicate, so clusters don't drift by chaining. Texts shorter than one
+    shingle after normalization (empty, emoji or punctuation only) carry too
+    little to compare and are never matched or indexed.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, num_perm: int = 128,
+                 shingle_size: int = 5, seed: int = 1):
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError(f"threshold must be in (0, 1], got {threshold}")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = _optimal_bands(num_perm, threshold)
+
+        # Multiply-add-shift hash family over 32-bit shingle hashes
+        rng = np.random.default_rng(seed)
+        self._a = (rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64) << np.uint64(1)) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64)
+
+        self._buckets: List[Dict[bytes, List[Hashable]]] = [{} for _ in range(self.bands)]
+        self._signatures: Dict[Hashable, np.ndarray] = {}
+        self.checked = 0
+        self.duplicates = 0
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def shingles(self, text: str) -> np.ndarray:
+        data = np.frombuffer(normalize(text).encode("utf-8"), dtype=np.uint8).astype(np.uint64)
+        k = self.shingle_size
+        n = len(data) - k + 1
+        if n <= 0:
+            return np.zeros(0, dtype=np.uint64)
+        # Rolling polynomial hash of every k-byte window, k vector operations
+        hashes = np.zeros(n, dtype=np.uint64)
+        for j in range(k):
+            hashes = hashes * _SHINGLE_BASE + data[j:j + n]
+        return np.unique(hashes & _MASK32)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """MinHash signature of ``text``, or None when it is shorter than one shingle."""
+        shingles = self.shingles(text)
+        if not len(shingles):
+            return None
+        a, b = self._a[:, None], self._b[:, None]
+        signature = np.full(self.num_perm, np.iinfo(np.uint64).max, dtype=np.uint64)
+        for start in range(0, len(shingles), _SIGNATURE_CHUNK):
+            chunk = shingles[None, start:start + _SIGNATURE_CHUNK]
+            np.minimum(signature, ((a * chunk + b) >> np.uint64(32)).min(axis=1), out=signature)
+        return signature
+
+    def similarity(self, a: np.ndarray, b: np.ndarray) -> float:
+        """Estimated Jaccard similarity of the texts behind two signatures."""
+        return float(np.count_nonzero(a == b)) / self.num_perm
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def _best_match(self, signature: np.ndarray, band_keys: List[bytes]) -> Optional[Hashable]:
+        best, best_similarity, seen = None, self.threshold, set()
+        for bucket, band_key in zip(self._buckets, band_keys):
+            for key in bucket.get(band_key, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                similarity = self.similarity(signature, self._signatures[key])
+                if similarity >= best_similarity and (best is None or similarity > best_similarity):
+                    best, best_similarity = key, similarity
+        return best
+
+    def query(self, text: str) -> Optional[Hashable]:
+        """Key of the most similar indexed representative, or None."""
+        signature = self.signature(text)
+        if signature is None:
+            return None
+        return self._best_match(signature, self._band_keys(signature))
+
+    def add(self, key: Hashable, text: str) -> Optional[Hashable]:
+        """
+        Check ``text`` against the index.
+
+        Returns the key of the representative it duplicates, or None after
+        registering ``key`` as the representative of a new cluster (or, for
+        a text shorter than one shingle, without registering it).
+        """
+        self.checked += 1
+        signature = self.signature(text)
+        if signature is None:
+            return None
+        band_keys = self._band_keys(signature)
+        match = self._best_match(signature, band_keys)
+        if match is not None:
+            self.duplicates += 1
+            return match
+        self._signatures[key] = signature
+        for bucket, band_key in zip(self._buckets, band_keys):
+            bucket.setdefault(band_key, []).append(key)
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        return {"checked": self.checked, "duplicates": self.duplicates, "representatives": len(self)}
+
+
+def find_near_duplicates(texts: Sequence[str], threshold: float = DEFAULT_THRESHOLD) -> List[Optional[int]]:
+    """For each text, the index of the earlier text it duplicates, or None for cluster representatives."""
+    index = NearDuplicateIndex(threshold)
+    return [index.add(i, text) for i, text in enumerate(texts)]
+
+
+class DuplicateClusters:
+    """
+    Clusters of near-duplicate texts that share one analysis.
+
+    ``admit`` tells whether a text needs analyzing: the first text of each
+    cluster does, and later ones wait for its result. ``finish`` records a
+    result. Once a cluster has a successful one, its members are handed out
+    by ``take_ready`` as ``(member, analyzed, result)``. If the analysis
+    fails, the error belongs to that text only, and the next waiting member
+    is analyzed in its place, so one transient failure doesn't fail the
+    whole cluster. ``saved`` counts the analyses skipped.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD):
+        self.index = NearDuplicateIndex(threshold)
+        self.saved = 0
+        self._analyzing: Dict[Hashable, Hashable] = {}  # key being analyzed -> its cluster
+        self._busy: Set[Hashable] = set()  # clusters with an analysis in flight
+        self._results: Dict[Hashable, Tuple[Hashable, Any]] = {}  # cluster -> (analyzed key, result)
+        self._waiting: Dict[Hashable, List[Hashable]] = {}
+        self._ready: List[Tuple[Hashable, Hashable, Any]] = []
+
+    def admit(self, key: Hashable, text: str) -> bool:
+        """True when ``key`` must be analyzed; otherwise its result comes from its cluster."""
+        cluster = self.index.add(key, text)
+        if cluster is None:
+            cluster = key
+        elif cluster in self._results:
+            self._release(key, *self._results[cluster])
+            return False
+        elif cluster in self._busy:
+            self._waiting.setdefault(cluster, []).append(key)
+            return False
+        # A new cluster, or one whose every analysis so far failed
+        self._analyzing[key] = cluster
+        self._busy.add(cluster)
+        return True
+
+    def finish(self, key: Hashable, result: Any) -> Optional[Hashable]:
+        """Record the result for ``key``; returns the member to analyze next when it failed."""
+        cluster = self._analyzing.pop(key, None)
+        if cluster is None:
+            return None
+        if isinstance(result, dict) and "error" in result:
+            waiting = self._waiting.get(cluster)
+            if waiting:
+                member = waiting.pop(0)
+                self._analyzing[member] = cluster
+                return member
+            self._busy.discard(cluster)
+            return None
+        self._busy.discard(cluster)
+        self._results[cluster] = (key, result)
+        for member in self._waiting.pop(cluster, ()):
+            self._release(member, key, result)
+        return None
+
+    def _release(self, member: Hashable, analyzed: Hashable, result: Any):
+        self.saved += 1
+        self._ready.append((member, analyzed, result))
+
+    def take_ready(self) -> List[Tuple[Hashable, Hashable, Any]]:
+        ready, self._ready = self._ready, []
+        return ready
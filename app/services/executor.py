@@ -0,0 +1,140 @@
+import asyncio
+import functools
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import logging
+
+from app.services.analyzer import ReviewAnalyzer
+from app.services.cache import cache_from_env
+from app.services.metrics import metrics_enabled_from_env
+from app.services.preprocess import preprocessor_from_env
+from app.services.sentiment import sentiment_backend_from_env
+
+logger = logging.getLogger(__name__)
+
+EXECUTION_MODES = ("inline", "thread", "process")
+
+# Analyzer owned by each process-pool worker, and the stage timings it
+# recorded since they were last sent back to the parent process
+_worker_analyzer: Optional[ReviewAnalyzer] = None
+_worker_stage_samples: List[Tuple[str, float]] = []
+
+
+class ExecutorSaturated(Exception):
+    """Raised when the executor already has ``queue_limit`` analyses in flight."""
+
+
+def init_worker():
+    # Build and warm the worker's analyzer once, before it takes any task
+    global _worker_analyzer
+    _worker_analyzer = ReviewAnalyzer(cache=cache_from_env(), sentiment_backend=sentiment_backend_from_env(),
+                                      preprocessor=preprocessor_from_env())
+    if metrics_enabled_from_env():
+        _worker_analyzer.stage_observer = lambda stage, seconds: _worker_stage_samples.append((stage, seconds))
+    _worker_analyzer.warmup()
+    _worker_stage_samples.clear()
+
+
+def run_in_worker(method: str, args: tuple, kwargs: Dict[str, Any]) -> Any:
+    return run_in_worker_timed(method, args, kwargs)[0]
+
+
+def run_in_worker_timed(method: str, args: tuple, kwargs: Dict[str, Any]) -> Tuple[Any, List[Tuple[str, float]]]:
+    """Like ``run_in_worker``, also returning the analyzer stage timings recorded during the call."""
+    try:
+        return getattr(_worker_analyzer, method)(*args, **kwargs), list(_worker_stage_samples)
+    finally:
+        _worker_stage_samples.clear()
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+class AnalysisExecutor:
+    """
+    Runs ``ReviewAnalyzer`` calls off the event loop.
+
+    Modes:
+      - ``inline``: call the analyzer directly on the event loop (no isolation)
+      - ``thread``: run calls in a thread pool so the loop keeps serving requests
+      - ``process``: run calls in a pool of worker processes, each with its own
+        warmed analyzer, so one API worker can use several cores
+
+    At most ``queue_limit`` calls may be running or waiting at once; further
+    submissions raise ``ExecutorSaturated`` instead of queueing without bound.
+
+    ``call_observer``, when given, receives (method, seconds) for every call,
+    queueing included. In process mode the analyzer stage timings recorded
+    by the worker are replayed into ``analyzer.stage_observer``.
+    """
+
+    def __init__(self, analyzer: ReviewAnalyzer, mode: str = "thread",
+                 workers: Optional[int] = None, queue_limit: int = 64,
+                 call_observer: Optional[Callable[[str, float], None]] = None):
+        if mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode '{mode}', expected one of {EXECUTION_MODES}")
+        self.analyzer = analyzer
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_limit = queue_limit
+        self.call_observer = call_observer
+        self.pending = 0
+        self.rejected = 0
+        self._pool: Optional[Executor] = None
+
+    def start(self):
+        if self._pool is not None or self.mode == "inline":
+            return
+        if self.mode == "thread":
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="analyzer")
+        else:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker)
+            # Start every worker now so warmup happens before traffic arrives
+            for future in [self._pool.submit(_ping) for _ in range(self.workers)]:
+                future.result()
+        logger.info(f"Analysis executor started: mode={self.mode}, workers={self.workers}, queue_limit={self.queue_limit}")
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    async def run(self, method: str, *args, **kwargs) -> Any:
+        """Call ``analyzer.<method>(*args, **kwargs)`` according to the execution mode."""
+        if self.pending >= self.queue_limit:
+            self.rejected += 1
+            raise ExecutorSaturated(f"{self.pending} analyses already in flight")
+
+        self.pending += 1
+        start = time.perf_counter()
+        try:
+            if self.mode == "inline":
+                return getattr(self.analyzer, method)(*args, **kwargs)
+            if self._pool is None:
+                self.start()
+            loop = asyncio.get_running_loop()
+            if self.mode == "thread":
+                call = functools.partial(getattr(self.analyzer, method), *args, **kwargs)
+                return await loop.run_in_executor(self._pool, call)
+            if self.analyzer.stage_observer is None:
+                return await loop.run_in_executor(self._pool, run_in_worker, method, args, kwargs)
+            result, samples = await loop.run_in_executor(self._pool, run_in_worker_timed, method, args, kwargs)
+            for stage, seconds in samples:
+                self.analyzer.stage_observer(stage, seconds)
+            return result
+        finally:
+            self.pending -= 1
+            if self.call_observer is not None:
+                self.call_observer(method, time.perf_counter() - start)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "workers": self.workers if self.mode != "inline" else 0,
+            "pending": self.pending,
+            "queue_limit": self.queue_limit,
+            "rejected": self.rejected
+        }
@@ -0,0 +1,234 @@
+import asyncio
+import itertools
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+import logging
+
+from app.models.review import AnalysisRecord, ReviewRequest
+from app.services.executor import AnalysisExecutor, ExecutorSaturated
+from app.services.responses import batch_result
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFull(Exception):
+    """Raised when accepting a job would exceed the queue's item limit."""
+
+
+class Job:
+    __slots__ = ("job_id", "created_at", "started_at", "finished_at", "results", "urgency",
+                 "completed", "failed")
+
+    def __init__(self, job_id: str, size: int):
+        self.job_id = job_id
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.results: List[Optional[Dict[str, Any]]] = [None] * size
+        # Items per pre-scored urgency
+        self.urgency: Dict[int, int] = {}
+        self.completed = 0
+        self.failed = 0
+        if size == 0:
+            # Nothing to wait for; otherwise the job would count as active forever
+            self.started_at = self.finished_at = self.created_at
+
+    @property
+    def status(self) -> str:
+        if self.finished_at is not None:
+            return "completed"
+        return "running" if self.started_at is not None else "queued"
+
+    def finish_item(self, index: int, result: Dict[str, Any]):
+        if self.started_at is None:
+            self.started_at = time.time()
+        self.results[index] = result
+        self.completed += 1
+        if result.get("error") is not None:
+            self.failed += 1
+        if self.completed == len(self.results):
+            self.finished_at = time.time()
+
+    def to_dict(self, include_results: bool = True) -> Dict[str, Any]:
+        total = len(self.results)
+        end = self.finished_at if self.finished_at is not None else time.time()
+        data = {
+            "job_id": self.job_id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "elapsed_seconds": round(end - self.created_at, 3),
+            "progress": {
+                "total": total,
+                "completed": self.completed,
+                "failed": self.failed,
+                "pending": total - self.completed,
+                "percent": round(100.0 * self.completed / total, 1) if total else 100.0
+            },
+            "urgency": {str(level): count for level, count in sorted(self.urgency.items())}
+        }
+        if include_results:
+            data["results"] = self.results
+        return data
+
+
+class JobQueue:
+    """
+    Asynchronous analysis jobs served from one urgency-ordered queue.
+
+    ``submit`` pre-scores every review with ``estimate_urgency`` (keyword
+    signals only, no sentiment analysis) and queues its items by that score.
+    ``workers`` tasks repeatedly take the ``batch_size`` most urgent items,
+    across all jobs, and analyze them in one ``analyze_batch_records`` call.
+    An outage report submitted behind thousands of routine reviews is
+    analyzed within about one batch. Items of equal urgency run first-in,
+    first-out.
+
+    At most ``max_pending`` items wait in the queue; larger submissions
+    raise ``JobQueueFull``. Finished jobs are kept for ``result_ttl`` seconds.
+    """
+
+    def __init__(self, executor: AnalysisExecutor, estimate_urgency: Callable[[str, Optional[str]], int],
+                 workers: int = 2, batch_size: int = 16, max_pending: int = 10000,
+                 result_ttl: float = 3600.0,
+                 on_result: Optional[Callable[[ReviewRequest, AnalysisRecord, Dict[str, Any]], None]] = None,
+                 wait_observer: Optional[Callable[[int, float], None]] = None):
+        self.executor = executor
+        self.estimate_urgency = estimate_urgency
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        # Called with each successful analysis, e.g. to feed aggregates
+        self.on_result = on_result
+        # Receives (pre-scored urgency, seconds queued) for every item
+        self.wait_observer = wait_observer
+        self.jobs: Dict[str, Job] = {}
+        self.processed = 0
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._sequence = itertools.count()
+        self._tasks: List[asyncio.Task] = []
+        # Items admitted by submit() but still being pre-scored
+        self._reserved = 0
+
+    @property
+    def pending(self) -> int:
+        return (self._queue.qsize() if self._queue is not None else 0) + self._reserved
+
+    @property
+    def active_jobs(self) -> int:
+        return sum(1 for job in self.jobs.values() if job.finished_at is None)
+
+    def start(self):
+        if self._tasks:
+            return
+        # A fresh queue bound to the running loop, keeping anything submitted before start
+        queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        while self._queue is not None and not self._queue.empty():
+            queue.put_nowait(self._queue.get_nowait())
+        self._queue = queue
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    async def submit(self, reviews: Sequence[Union[ReviewRequest, Dict[str, Any]]]) -> Job:
+        """
+        Queue a job. Each entry is a validated review, or a final result dict
+        for an entry that failed validation.
+        """
+        self._prune()
+        if self._queue is None:
+            # Items wait here until start() launches the workers
+            self._queue = asyncio.PriorityQueue()
+        valid = [(i, review) for i, review in enumerate(reviews) if isinstance(review, ReviewRequest)]
+        if self.pending + len(valid) > self.max_pending:
+            raise JobQueueFull(f"{self.pending} items already queued, limit is {self.max_pending}")
+        # Hold the slots across the await below, so concurrent submits can't overshoot max_pending
+        self._reserved += len(valid)
+
+        job = Job(uuid.uuid4().hex, len(reviews))
+        self.jobs[job.job_id] = job
+        for i, review in enumerate(reviews):
+            if not isinstance(review, ReviewRequest):
+                job.finish_item(i, review)
+
+        # Keyword pre-scoring is cheap but runs over the whole batch, so keep it off the loop
+        estimate = self.estimate_urgency
+        try:
+            scores = await asyncio.get_running_loop().run_in_executor(
+                None, lambda: [estimate(review.text, review.metadata.source) for _, review in valid]
+            )
+        except BaseException:
+            del self.jobs[job.job_id]
+            raise
+        finally:
+            self._reserved -= len(valid)
+        enqueued_at = time.monotonic()
+        for (i, review), urgency in zip(valid, scores):
+            job.urgency[urgency] = job.urgency.get(urgency, 0) + 1
+            self._queue.put_nowait((-urgency, next(self._sequence), enqueued_at, job, i, review))
+        return job
+
+    def _prune(self):
+        cutoff = time.time() - self.result_ttl
+        for job_id in [job_id for job_id, job in self.jobs.items()
+                       if job.finished_at is not None and job.finished_at < cutoff]:
+            del self.jobs[job_id]
+
+    async def _work(self):
+        while True:
+            entries = [await self._queue.get()]
+            while len(entries) < self.batch_size and not self._queue.empty():
+                entries.append(self._queue.get_nowait())
+            now = time.monotonic()
+            if self.wait_observer is not None:
+                for priority, _, enqueued_at, _, _, _ in entries:
+                    self.wait_observer(-priority, now - enqueued_at)
+
+            items = [{"text": review.text, "source": review.metadata.source} for *_, review in entries]
+            while True:
+                try:
+                    records = await self.executor.run("analyze_batch_records", items)
+                    break
+                except ExecutorSaturated:
+                    # Synchronous requests have the executor; wait for capacity
+                    await asyncio.sleep(0.05)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Error processing job batch: {str(e)}")
+                    records = [{"error": str(e)}] * len(items)
+                    break
+
+            for (_, _, _, job, i, review), record in zip(entries, records):
+                if isinstance(record, dict):
+                    job.finish_item(i, batch_result(review.review_id, error=record["error"]))
+                    continue
+                result = batch_result(review.review_id, record)
+                job.finish_item(i, result)
+                if self.on_result is not None:
+                    try:
+                        self.on_result(review, record, result)
+                    except Exception as e:
+                        logger.error(f"Error recording job result {review.review_id}: {str(e)}")
+            self.processed += len(entries)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "batch_size": self.batch_size,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "jobs": len(self.jobs),
+            "active_jobs": self.active_jobs,
+            "processed": self.processed
+        }
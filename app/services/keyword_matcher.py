@@ -0,0 +1,86 @@
+import re
+from typing import Dict, FrozenSet, Hashable, Iterable, List, Mapping, Optional, Set, Tuple
+
+# Plural endings accepted after any single-word keyword ("crash" -> "crashes").
+# Other endings are too often different words ("show" -> "shower", "help" ->
+# "helper"), so those forms are listed per keyword instead.
+_SUFFIXES = ("s", "es")
+
+
+class KeywordMatcher:
+    """
+    Finds a fixed set of keywords in a text with one precompiled regex.
+
+    Each keyword maps to one or more labels, and ``scan`` returns the labels
+    of every keyword found in a single pass over the text. Keywords only match
+    whole words (so "app" doesn't match "happy"), single words also match
+    their plurals plus any forms listed for them in ``inflections`` (e.g.
+    ``{"crash": ["crashed", "crashing"]}``), and multi-word keywords match
+    across any run of whitespace.
+    """
+
+    def __init__(self, keywords: Iterable[Tuple[str, Hashable]],
+                 inflections: Optional[Mapping[str, Iterable[str]]] = None):
+        inflections = {k.lower(): [form.lower() for form in v] for k, v in (inflections or {}).items()}
+        labels_by_keyword: Dict[str, Set[Hashable]] = {}
+        for keyword, label in keywords:
+            labels_by_keyword.setdefault(keyword.lower(), set()).add(label)
+
+        # Every surface form we match, mapped to the labels it signals
+        self._labels: Dict[str, FrozenSet[Hashable]] = {}
+        for keyword in labels_by_keyword:
+            labels = set(labels_by_keyword[keyword])
+            # A phrase also signals the shorter keywords it contains,
+            # e.g. "down for all" implies "down"
+            for other, other_labels in labels_by_keyword.items():
+                if other != keyword and re.search(rf"(?<!\w){re.escape(other)}(?!\w)", keyword):
+                    labels |= other_labels
+            for form in self._forms(keyword) + inflections.get(keyword, []):
+                self._labels[form] = frozenset(labels | self._labels.get(form, frozenset()))
+
+        self.all_labels = frozenset().union(*labels_by_keyword.values()) if labels_by_keyword else frozenset()
+        self._pattern = re.compile(rf"(?<!\w)({self._trie_pattern(self._labels)})(?!\w)")
+
+    @staticmethod
+    def _forms(keyword: str) -> List[str]:
+        if " " in keyword:
+            return [keyword]
+        return [keyword] + [keyword + suffix for suffix in _SUFFIXES]
+
+    @staticmethod
+    def _trie_pattern(words: Iterable[str]) -> str:
+        # Factor common prefixes so the regex engine only branches once per
+        # distinct next character instead of trying every keyword in turn
+        trie: Dict[str, dict] = {}
+        for word in words:
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[""] = {}
+
+        def build(node: Dict[str, dict]) -> str:
+            branches = []
+            for char in sorted(k for k in node if k):
+                atom = r"\s+" if char == " " else re.escape(char)
+                branches.append(atom + build(node[char]))
+            if not branches:
+                return ""
+            body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+            return f"(?:{body})?" if "" in node else body
+
+        return build(trie)
+
+    def scan(self, text: str, lowered: bool = False) -> Set[Hashable]:
+        """Return the labels of all keywords found in ``text`` (pass ``lowered`` if it is lowercase already)."""
+        found: Set[Hashable] = set()
+        target = len(self.all_labels)
+        for match in self._pattern.finditer(text if lowered else text.lower()):
+            form = match.group(1)
+            if " " not in form:
+                found |= self._labels[form]
+            else:
+                found |= self._labels[" ".join(form.split())]
+            if len(found) == target:
+                # Every label has been seen; the rest of the text can't add anything
+                break
+        return found
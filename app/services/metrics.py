@@ -0,0 +1,261 @@
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Latency buckets in seconds, from sub-millisecond stages to slow batches
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Per-request stage durations, reported in the Server-Timing header
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+
+def metrics_enabled_from_env() -> bool:
+    """METRICS_ENABLED=false (or 0/no/off) turns all instrumentation off."""
+    return os.getenv("METRICS_ENABLED", "true").strip().lower() not in ("0", "false", "no", "off")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labelvalues, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labelvalues)} {value:g}")
+        return lines
+
+
+class Gauge:
+    """Value read from ``fn`` at scrape time; ``kind="counter"`` for totals kept elsewhere."""
+
+    def __init__(self, name: str, help: str, fn: Callable[[], float], kind: str = "gauge"):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.kind = kind
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", f"{self.name} {self.fn():g}"]
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labelvalues -> [per-bucket counts (last is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = sorted((labels, list(counts), total) for labels, (counts, total) in self._series.items())
+        for labelvalues, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                bucket_labels = _format_labels(self.labelnames, labelvalues, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            labels = _format_labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {total:.6f}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class StageLaps:
+    """
+    Splits the time of one analyzer call between its consecutive stages.
+
+    ``lap(stage)`` charges the time since the previous lap to ``stage``;
+    ``flush()`` reports the per-stage totals, so a batch call reports one
+    observation per stage for the whole batch.
+    """
+
+    __slots__ = ("observe", "last", "totals")
+
+    def __init__(self, observe: Callable[[str, float], None]):
+        self.observe = observe
+        self.last = time.perf_counter()
+        self.totals: Dict[str, float] = {}
+
+    def lap(self, stage: str):
+        now = time.perf_counter()
+        self.totals[stage] = self.totals.get(stage, 0.0) + (now - self.last)
+        self.last = now
+
+    def flush(self):
+        for stage, seconds in self.totals.items():
+            self.observe(stage, seconds)
+
+
+class _NullLaps:
+    __slots__ = ()
+
+    def lap(self, stage: str):
+        pass
+
+    def flush(self):
+        pass
+
+
+NULL_LAPS = _NullLaps()
+
+
+class Metrics:
+    """
+    Hot-path instrumentation for the API, rendered in Prometheus text format.
+
+    With ``enabled=False`` every helper is a no-op and no collectors are
+    created, so the app can run without any instrumentation overhead.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._collectors: list = []
+        if not enabled:
+            return
+        self.requests = self._add(Counter(
+            "http_requests_total", "HTTP requests by handler, method and status", ("handler", "method", "status")))
+        self.request_seconds = self._add(Histogram(
+            "http_request_duration_seconds", "HTTP request latency by handler", ("handler",)))
+        self.in_progress = 0
+        self._add(Gauge("http_requests_in_progress", "HTTP requests currently being served", lambda: self.in_progress))
+        self.request_stage_seconds = self._add(Histogram(
+            "request_stage_seconds", "Time spent in request stages such as token validation", ("stage",)))
+        self.analysis_seconds = self._add(Histogram(
+            "analysis_seconds", "Executor call latency including queueing, by analyzer method", ("method",)))
+        self.analyzer_stage_seconds = self._add(Histogram(
+            "analyzer_stage_seconds", "Time per ReviewAnalyzer stage, per analyze or analyze_batch call", ("stage",)))
+
+    def _add(self, collector):
+        self._collectors.append(collector)
+        return collector
+
+    def gauge(self, name: str, help: str, fn: Callable[[], float], kind: str = "gauge"):
+        if self.enabled:
+            self._add(Gauge(name, help, fn, kind))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Optional[Histogram]:
+        return self._add(Histogram(name, help, labelnames)) if self.enabled else None
+
+    def stage(self, name: str):
+        """Context manager timing one request stage (histogram and Server-Timing)."""
+        if not self.enabled:
+            return nullcontext()
+        return self._timed_stage(name)
+
+    @contextmanager
+    def _timed_stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_request_stage(name, time.perf_counter() - start)
+
+    def record_request_stage(self, name: str, seconds: float):
+        self.request_stage_seconds.observe(seconds, name)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + seconds
+
+    def observe_analysis(self, method: str, seconds: float):
+        self.analysis_seconds.observe(seconds, method)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings["analysis"] = timings.get("analysis", 0.0) + seconds
+
+    def observe_analyzer_stage(self, stage: str, seconds: float):
+        self.analyzer_stage_seconds.observe(seconds, stage)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for collector in self._collectors:
+            lines.extend(collector.render())
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting requests, timing them and adding a Server-Timing header.
+
+    Requests are labelled by endpoint function rather than raw path, so
+    unknown URLs don't create new series. Written as plain ASGI rather than
+    ``BaseHTTPMiddleware`` so streaming responses pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp, metrics: Metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = self.metrics
+        timings: Dict[str, float] = {}
+        token = _request_timings.set(timings)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                header = ", ".join(
+                    [f"{name};dur={seconds * 1000:.2f}" for name, seconds in timings.items()]
+                    + [f"total;dur={(time.perf_counter() - start) * 1000:.2f}"]
+                )
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", header.encode())]
+            await send(message)
+
+        metrics.in_progress += 1
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            metrics.in_progress -= 1
+            _request_timings.reset(token)
+            endpoint = scope.get("endpoint")
+            handler = endpoint.__name__ if endpoint is not None else "unmatched"
+            metrics.requests.inc(handler, scope["method"], str(status))
+            metrics.request_seconds.observe(time.perf_counter() - start, handler)
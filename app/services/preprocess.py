@@ -0,0 +1,177 @@
+import html
+import os
+import re
+from typing import List, Optional
+
+# Markdown and link syntax found in Reddit self-posts
+_IMAGE = re.compile(r"!\[([^\]]*)\]\([^)]*\)")
+_LINK = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+_URL = re.compile(r"(?:https?://|www\.)\S+", re.IGNORECASE)
+_CODE = re.compile(r"`+([^`]*)`+")
+_EMPHASIS = re.compile(r"\*\*|__|~~|\*|(?<!\w)_(?=\S)|(?<=\S)_(?!\w)")
+_ESCAPE = re.compile(r"\\([\\`*_{}\[\]()#+\-.!>~|^])")
+_LINE_MARKUP = re.compile(r"^(?:#{1,6}\s+|>\s*|[-*+]\s+|\d+[.)]\s+)+")
+# First characters of a line that may start a heading, quote or list marker
+_LINE_MARKERS = frozenset("#>-*+0123456789")
+_TABLE_RULE = re.compile(r"^[ \t]*\|?[ \t]*:?-{3,}.*$", re.MULTILINE)
+_BLANK_LINES = re.compile(r"\n{3,}")
+_SENTENCE_BREAK = re.compile(r"[.!?]\s+|\n+")
+
+# Characters per sampled window of a capped text
+_SAMPLE_WINDOW = 400
+# Raw text kept before cleanup, as a multiple of the cap, leaving room for markup
+_RAW_ALLOWANCE = 2
+
+# Bump when strip_markup or sampling changes what the analyzer sees, so cached results are recomputed
+PREPROCESS_VERSION = 1
+
+
+def strip_markup(text: str) -> str:
+    """
+    Plain text of a Reddit post: markdown, links and URLs removed.
+
+    Link and image texts are kept, and so are paragraph breaks, which the
+    sentiment tokenizers treat as sentence ends.
+    """
+    if "&" in text:
+        # Reddit's API HTML-escapes markdown (&gt; quotes, &amp;#x200B; spacers)
+        text = html.unescape(html.unescape(text))
+    # Most posts are plain text, so each rule only runs when its marker is present
+    if "](" in text:
+        text = _LINK.sub(r"\1", _IMAGE.sub(r"\1", text))
+    if "://" in text or "www." in text:
+        text = _URL.sub(" ", text)
+    if "`" in text:
+        text = _CODE.sub(r"\1", text)
+    if "\\" in text:
+        text = _ESCAPE.sub(r"\1", text)
+    if "|" in text:
+        text = _TABLE_RULE.sub("", text).replace("|", " ")
+    if "*" in text or "_" in text or "~" in text:
+        text = _EMPHASIS.sub("", text)
+    if "​" in text:
+        text = text.replace("​", "")
+    lines = []
+    for line in text.split("\n"):
+        line = line.strip()
+        if line[:1] in _LINE_MARKERS:
+            line = _LINE_MARKUP.sub("", line, count=1)
+        if "  " in line or "\t" in line or "\xa0" in line:
+            line = " ".join(line.split())
+        lines.append(line)
+    text = "\n".join(lines)
+    if "\n\n\n" in text:
+        text = _BLANK_LINES.sub("\n\n", text)
+    return text.strip()
+
+
+def _snap(text: str, start: int, end: int) -> str:
+    # Trim the window text[start:end] to whole sentences, or to whole words
+    # when it holds no sentence break; only the window itself is searched
+    if start > 0:
+        found = _SENTENCE_BREAK.search(text, start, end)
+        if found is not None and found.end() < end:
+            start = found.end()
+        else:
+            space = text.find(" ", start, end)
+            start = space + 1 if space >= 0 else start
+    if end < len(text):
+        last = None
+        for last in _SENTENCE_BREAK.finditer(text, start, end):
+            pass
+        if last is not None and last.start() > start:
+            end = last.start() + 1
+        else:
+            space = text.rfind(" ", start, end)
+            end = space if space > start else end
+    return text[start:end].strip()
+
+
+def sample_sentences(text: str, max_chars: int) -> str:
+    """
+    At most ``max_chars`` of ``text``: evenly spaced windows trimmed to whole sentences.
+
+    Long rants often state the problem up front and the verdict at the end;
+    windows spread from the first to the last character keep both. Only the
+    windows are scanned, so the cost depends on ``max_chars``, not on the
+    length of ``text``.
+    """
+    if len(text) <= max_chars:
+        return text
+    # At least the beginning and the end
+    windows = max(2, max_chars // _SAMPLE_WINDOW)
+    # Leave room for the spaces joining the windows
+    size = (max_chars - windows + 1) // windows
+    pieces = []
+    for k in range(windows):
+        start = (len(text) - size) * k // max(windows - 1, 1)
+        piece = _snap(text, start, start + size)
+        if piece:
+            pieces.append(piece)
+    return " ".join(pieces)
+
+
+class PreparedText:
+    """
+    One review text, cleaned once and shared by every analysis stage.
+
+    ``text`` has markdown and URLs stripped (and is sampled down to the
+    preprocessor's length cap) for the sentiment backend; ``lower`` is its
+    lowercase form for keyword matching. ``tokens`` are its lowercased
+    tokens as TextBlob splits them, computed on first use and then reused
+    by every backend that scores tokens.
+    """
+
+    __slots__ = ("raw", "text", "lower", "truncated", "_tokens")
+
+    def __init__(self, raw: str, text: str, truncated: bool = False):
+        self.raw = raw
+        self.text = text
+        self.lower = text.lower()
+        self.truncated = truncated
+        self._tokens: Optional[List[str]] = None
+
+    @property
+    def tokens(self) -> List[str]:
+        if self._tokens is None:
+            # Imported here: the tokenizer lives with the lexicon tables it mirrors
+            from app.services.sentiment import tokenize
+            self._tokens = tokenize(self.text)
+        return self._tokens
+
+
+class TextPreprocessor:
+    """
+    Cleans review texts before analysis.
+
+    With ``max_chars``, longer posts are reduced to evenly spaced sentences
+    totalling at most that many characters, so the cost of analyzing one
+    post is bounded however long it is.
+    """
+
+    def __init__(self, max_chars: Optional[int] = None):
+        if max_chars is not None and max_chars <= 0:
+            raise ValueError(f"max_chars must be positive, got {max_chars}")
+        self.max_chars = max_chars
+
+    @property
+    def cache_tag(self) -> str:
+        """Preprocessing version and settings, for keying cached results."""
+        return f"preprocess-v{PREPROCESS_VERSION}:max_chars={self.max_chars or 0}"
+
+    def prepare(self, text: str) -> PreparedText:
+        if self.max_chars is None:
+            return PreparedText(text, strip_markup(text))
+        # Huge posts are sampled before cleanup as well, so no stage reads
+        # more than a fixed multiple of the cap
+        raw = sample_sentences(text, self.max_chars * _RAW_ALLOWANCE)
+        cleaned = strip_markup(raw)
+        if raw is not text or len(cleaned) > self.max_chars:
+            return PreparedText(text, sample_sentences(cleaned, self.max_chars), truncated=True)
+        return PreparedText(text, cleaned)
+
+
+def preprocessor_from_env() -> TextPreprocessor:
+    """Preprocessor with the ANALYSIS_MAX_CHARS length cap (unset or 0 for none)."""
+    max_chars = int(os.getenv("ANALYSIS_MAX_CHARS", "0"))
+    return TextPreprocessor(max_chars=max_chars or None)
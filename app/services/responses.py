@@ -0,0 +1,48 @@
+import json
+from typing import Any, Dict, Optional
+
+from fastapi.responses import Response
+
+from app.models.review import AnalysisRecord
+
+try:
+    import orjson
+except ImportError:  # optional speedup, the standard library encoder is used instead
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """Encode ``content`` to compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response encoded straight from plain dicts/lists (or pre-encoded bytes).
+
+    Returning it from an endpoint bypasses FastAPI's ``response_model``
+    validation and serialization; the declared model still documents the
+    response in OpenAPI.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+def review_response(review_id: str, record: AnalysisRecord) -> Dict[str, Any]:
+    # Same shape as ReviewResponse
+    return {"review_id": review_id, **record.to_dict()}
+
+
+def batch_result(review_id: Optional[str], record: Optional[AnalysisRecord] = None,
+                 error: Optional[str] = None) -> Dict[str, Any]:
+    # Same shape as BatchReviewResult
+    if record is None:
+        return {"review_id": review_id, "analysis": None, "confidence_scores": None, "error": error}
+    return {"review_id": review_id, **record.to_dict(), "error": None}
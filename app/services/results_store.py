@@ -0,0 +1,243 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS results ("
+    "id INTEGER PRIMARY KEY, review_id TEXT NOT NULL UNIQUE, source TEXT, subreddit TEXT, created_utc REAL NOT NULL, "
+    "sentiment TEXT NOT NULL, urgency_score INTEGER NOT NULL, key_topics TEXT NOT NULL, "
+    "response_recommendation TEXT NOT NULL, sentiment_confidence REAL NOT NULL, topic_accuracy REAL NOT NULL, "
+    "duplicate_of TEXT, stored_at REAL NOT NULL)",
+    # One row per (topic, result). The primary key is the topic index, and
+    # carrying created_utc in it makes topic + time range one range scan
+    "CREATE TABLE IF NOT EXISTS result_topics ("
+    "topic TEXT NOT NULL, created_utc REAL NOT NULL, result_id INTEGER NOT NULL, "
+    "PRIMARY KEY (topic, created_utc, result_id)) WITHOUT ROWID",
+    # Pages are ordered by (created_utc, id), so every index ends with them
+    "CREATE INDEX IF NOT EXISTS results_sentiment ON results (sentiment, created_utc, id)",
+    "CREATE INDEX IF NOT EXISTS results_urgency ON results (urgency_score, created_utc, id)",
+    "CREATE INDEX IF NOT EXISTS results_subreddit ON results (subreddit, created_utc, id)",
+    "CREATE INDEX IF NOT EXISTS results_created ON results (created_utc, id)",
+]
+
+UPSERT = (
+    "INSERT INTO results (review_id, source, subreddit, created_utc, sentiment, urgency_score, key_topics, "
+    "response_recommendation, sentiment_confidence, topic_accuracy, duplicate_of, stored_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (review_id) DO UPDATE SET source = excluded.source, subreddit = excluded.subreddit, "
+    "created_utc = excluded.created_utc, sentiment = excluded.sentiment, urgency_score = excluded.urgency_score, "
+    "key_topics = excluded.key_topics, response_recommendation = excluded.response_recommendation, "
+    "sentiment_confidence = excluded.sentiment_confidence, topic_accuracy = excluded.topic_accuracy, "
+    "duplicate_of = excluded.duplicate_of, stored_at = excluded.stored_at"
+)
+
+COLUMNS = ("r.id, r.review_id, r.source, r.subreddit, r.created_utc, r.sentiment, r.urgency_score, r.key_topics, "
+           "r.response_recommendation, r.sentiment_confidence, r.topic_accuracy, r.duplicate_of")
+
+# SQLite's default limit on bound parameters per statement is 999 on older builds
+_ID_LOOKUP_CHUNK = 500
+
+
+class ResultsStore:
+    """
+    Queryable SQLite store of analysis results.
+
+    Results are buffered and written in batches of ``batch_size`` (or once
+    the oldest buffered result is ``flush_interval`` seconds old), each batch
+    in one transaction on a WAL-mode database. Storing a review id again
+    replaces its row. ``query`` returns the newest posts first, filtered on
+    indexed columns, and pages with a keyset cursor (the last row's
+    ``created_utc`` and id). Each page starts with an index seek, however
+    deep it is. Posts without ``created_utc`` are dated when they are stored.
+    """
+
+    def __init__(self, path: str, batch_size: int = 500, flush_interval: float = 1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending: Dict[str, tuple] = {}
+        self._pending_since = 0.0
+        # _lock guards the buffer, _db_lock the connection, so adding never waits for a write
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._connect()
+
+    def _connect(self):
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+    def add(self, result: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Buffer one API-shaped result; results without an analysis (errors) are skipped.
+
+        Returns True when a batch is due, and the caller should ``flush()``
+        (from a thread, in async code).
+        """
+        analysis = result.get("analysis")
+        if not analysis or "review_id" not in result:
+            return False
+        metadata = metadata or {}
+        confidence = result.get("confidence_scores") or {}
+        now = time.time()
+        try:
+            created_utc = float(metadata["created_utc"])
+        except (KeyError, TypeError, ValueError):
+            created_utc = now
+        row = (
+            result["review_id"], metadata.get("source"), metadata.get("subreddit"), created_utc,
+            analysis["sentiment"], analysis["urgency_score"], json.dumps(analysis["key_topics"]),
+            analysis["response_recommendation"], confidence.get("sentiment", 0.0),
+            confidence.get("topic_accuracy", 0.0), result.get("duplicate_of"), now
+        )
+        with self._lock:
+            if not self._pending:
+                self._pending_since = time.monotonic()
+            self._pending[result["review_id"]] = row
+            return (len(self._pending) >= self.batch_size
+                    or time.monotonic() - self._pending_since >= self.flush_interval)
+
+    def flush(self):
+        with self._db_lock:
+            with self._lock:
+                rows = list(self._pending.values())
+                self._pending = {}
+            if not rows:
+                return
+            try:
+                self._write(rows)
+            except sqlite3.Error as e:
+                logger.error(f"Error writing {len(rows)} results to {self.path}: {str(e)}")
+
+    def _lookup(self, review_ids: List[str], columns: str) -> List[tuple]:
+        rows: List[tuple] = []
+        for start in range(0, len(review_ids), _ID_LOOKUP_CHUNK):
+            chunk = review_ids[start:start + _ID_LOOKUP_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows.extend(self._conn.execute(
+                f"SELECT {columns} FROM results WHERE review_id IN ({placeholders})", chunk
+            ))
+        return rows
+
+    def _write(self, rows: List[tuple]):
+        # Caller holds _db_lock
+        review_ids = [row[0] for row in rows]
+        with self._conn:
+            # Drop the topics of results being replaced, by primary key
+            self._conn.executemany(
+                "DELETE FROM result_topics WHERE topic = ? AND created_utc = ? AND result_id = ?",
+                [(topic, created_utc, result_id) for result_id, created_utc, key_topics
+                 in self._lookup(review_ids, "id, created_utc, key_topics") for topic in json.loads(key_topics)]
+            )
+            self._conn.executemany(UPSERT, rows)
+            ids = dict(self._lookup(review_ids, "review_id, id"))
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO result_topics (topic, created_utc, result_id) VALUES (?, ?, ?)",
+                [(topic, row[3], ids[row[0]]) for row in rows for topic in json.loads(row[6])]
+            )
+
+    def query(self, sentiment: Optional[str] = None, topic: Optional[str] = None,
+              subreddit: Optional[str] = None, min_urgency: Optional[int] = None,
+              max_urgency: Optional[int] = None, since: Optional[float] = None,
+              until: Optional[float] = None, cursor: Optional[str] = None,
+              limit: int = 100) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Results matching every given filter, newest ``created_utc`` first.
+
+        ``since`` is inclusive and ``until`` exclusive. Returns
+        ``(results, next_cursor)``; pass ``next_cursor`` back as ``cursor``
+        for the next page. It is None on the last page. Raises ValueError for
+        a malformed cursor.
+        """
+        self.flush()
+        # With a topic, the time range and page order come from the topic index
+        created, row_id = ("t.created_utc", "t.result_id") if topic is not None else ("r.created_utc", "r.id")
+        sql = f"SELECT {COLUMNS} FROM results r"
+        clauses: List[str] = []
+        params: List[Any] = []
+        if topic is not None:
+            sql += " JOIN result_topics t ON t.result_id = r.id AND t.topic = ?"
+            params.append(topic)
+        for clause, value in (
+            ("r.sentiment = ?", sentiment),
+            ("r.subreddit = ?", subreddit),
+            ("r.urgency_score >= ?", min_urgency),
+            ("r.urgency_score <= ?", max_urgency),
+            (f"{created} >= ?", since),
+            (f"{created} < ?", until),
+        ):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        if cursor is not None:
+            clauses.append(f"({created}, {row_id}) < (?, ?)")
+            params.extend(decode_cursor(cursor))
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {created} DESC, {row_id} DESC LIMIT ?"
+        params.append(limit + 1)
+
+        with self._db_lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        next_cursor = encode_cursor(rows[limit - 1][4], rows[limit - 1][0]) if len(rows) > limit else None
+        return [self._row_to_result(row) for row in rows[:limit]], next_cursor
+
+    def _row_to_result(self, row: tuple) -> Dict[str, Any]:
+        return {
+            "review_id": row[1],
+            "analysis": {
+                "sentiment": row[5],
+                "key_topics": json.loads(row[7]),
+                "response_recommendation": row[8],
+                "urgency_score": row[6]
+            },
+            "confidence_scores": {"sentiment": row[9], "topic_accuracy": row[10]},
+            "metadata": {"source": row[2], "subreddit": row[3], "created_utc": row[4]},
+            "duplicate_of": row[11]
+        }
+
+    def count(self) -> int:
+        self.flush()
+        with self._db_lock:
+            return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self):
+        self.flush()
+        with self._db_lock:
+            # Refresh the planner statistics the indexes are chosen by
+            self._conn.execute("PRAGMA optimize")
+            self._conn.close()
+
+    def reopen(self):
+        """Open a fresh connection, e.g. in a forked worker (SQLite connections must not cross fork)."""
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._pending = {}
+        self._connect()
+
+
+def encode_cursor(created_utc: float, result_id: int) -> str:
+    return f"{created_utc!r}:{result_id}"
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    created_utc, _, result_id = cursor.rpartition(":")
+    try:
+        return float(created_utc), int(result_id)
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+
+def results_store_from_env() -> Optional[ResultsStore]:
+    """The results store at RESULTS_DB, or None when it is not set."""
+    path = os.getenv("RESULTS_DB")
+    return ResultsStore(path) if path else None
@@ -0,0 +1,326 @@
+import os
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from textblob import TextBlob
+from textblob._text import (
+    ABBREVIATIONS, EMOTICONS, EOS, PUNCTUATION, RE_ABBR1, RE_ABBR2, RE_ABBR3,
+    RE_EMOTICONS, RE_SARCASM, replacements as CONTRACTIONS
+)
+
+from app.services.preprocess import PreparedText
+
+
+class SentimentBackend:
+    """
+    Scores texts for polarity (-1.0 to 1.0) and subjectivity (0.0 to 1.0).
+
+    Subclasses implement ``score``; ``score_batch`` may be overridden when a
+    backend can share work across texts, and ``score_prepared`` when it can
+    use the tokens of a ``PreparedText``.
+    """
+
+    name = "base"
+
+    def score(self, text: str) -> Tuple[float, float]:
+        raise NotImplementedError
+
+    def score_batch(self, texts: Sequence[str]) -> np.ndarray:
+        """Return an (n, 2) array of (polarity, subjectivity) rows."""
+        scores = np.zeros((len(texts), 2), dtype=float)
+        for i, text in enumerate(texts):
+            scores[i] = self.score(text)
+        return scores
+
+    def score_prepared(self, prepared: Sequence[PreparedText]) -> np.ndarray:
+        """Like ``score_batch``, for texts from the preprocessing stage."""
+        return self.score_batch([text.text for text in prepared])
+
+    def warmup(self):
+        # Load any lazily initialized resources before the first real request
+        self.score("Netflix warmup review")
+
+
+class TextBlobBackend(SentimentBackend):
+    """TextBlob's pattern analyzer, one TextBlob per text."""
+
+    name = "textblob"
+
+    def score(self, text: str) -> Tuple[float, float]:
+        sentiment = TextBlob(text).sentiment
+        return sentiment.polarity, sentiment.subjectivity
+
+
+# Tokenizer tables, mirroring textblob._text.find_tokens
+_LEADING = frozenset(PUNCTUATION.replace(".", ""))
+_TRAILING = tuple(PUNCTUATION.replace(".", ""))
+_QUOTES = ("“", "”", "‘", "’", "'", '"')
+# Characters that must be present for any emoticon to match (plus the letter-only "XD")
+_EMOTICON_CHARS = frozenset(c for faces in EMOTICONS.values() for face in faces for c in face if not c.isalnum())
+_RE_LETTER_EMOTICONS = re.compile(r"[Xx] ?D")
+_RE_PARAGRAPH = re.compile(r"\n{2,}")
+_SENTENCE_END = frozenset(("...", ".", "!", "?", EOS))
+_SENTENCE_TAIL = frozenset(("'", '"', "”", "’", "...", ".", "!", "?", ")", EOS))
+
+# Event codes for unknown tokens that still affect the score
+_NEGATION = -2
+_EXCLAMATION = -3
+_SARCASM = -4
+_EMOTICON_BASE = -10
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased tokens exactly as TextBlob's pattern analyzer sees them.
+
+    Same rules as ``textblob._text.find_tokens`` (contractions, quotes,
+    leading/trailing punctuation, abbreviations, sarcasm and emoticons), but
+    words without surrounding punctuation skip the per-character loops and
+    sentences are only split out when a sarcasm or emoticon pattern could match.
+    """
+    for contraction, replacement in CONTRACTIONS.items():
+        if contraction in text:
+            text = text.replace(contraction, replacement)
+    for quote in _QUOTES:
+        if quote in text:
+            text = text.replace(quote, f" {quote} ")
+    if "\n" in text:
+        text = _RE_PARAGRAPH.sub(f" {EOS} ", text.replace("\r\n", "\n"))
+
+    tokens: List[str] = []
+    append = tokens.append
+    for t in text.split():
+        if t[0] not in _LEADING and not t.endswith(_TRAILING) and t[-1] != ".":
+            append(t)
+            continue
+        tail = []
+        while t.startswith(_TRAILING):
+            append(t[0])
+            t = t[1:]
+        while t.endswith(_TRAILING + (".",)):
+            if t.endswith(_TRAILING):
+                tail.append(t[-1])
+                t = t[:-1]
+            if t.endswith("..."):
+                tail.append("...")
+                t = t[:-3].rstrip(".")
+            if t.endswith("."):
+                if t in ABBREVIATIONS or RE_ABBR1.match(t) or RE_ABBR2.match(t) or RE_ABBR3.match(t):
+                    break
+                tail.append(".")
+                t = t[:-1]
+        if t:
+            append(t)
+        tokens.extend(reversed(tail))
+
+    joined = " ".join(tokens)
+    sarcasm = "!" in joined
+    emoticons = not _EMOTICON_CHARS.isdisjoint(joined) or _RE_LETTER_EMOTICONS.search(joined)
+    if not (sarcasm or emoticons):
+        return [t.lower() for t in tokens if t != EOS] if EOS in joined else joined.lower().split()
+
+    sentences = []
+    for sentence in _split_sentences(tokens):
+        if sarcasm:
+            sentence = RE_SARCASM.sub("(!)", sentence)
+        if emoticons:
+            sentence = RE_EMOTICONS.sub(lambda m: m.group(1).replace(" ", "") + m.group(2), sentence)
+        sentences.append(sentence)
+    return " ".join(sentences).lower().split()
+
+
+def _split_sentences(tokens: List[str]) -> List[str]:
+    # Sentence breaks as in find_tokens: closing quotes, brackets and repeated
+    # punctuation stay with the sentence they end, and EOS markers are dropped
+    sentences = []
+    i = j = 0
+    while j < len(tokens):
+        if tokens[j] in _SENTENCE_END:
+            while j < len(tokens) and tokens[j] in _SENTENCE_TAIL and tokens[j] not in ("'", '"'):
+                j += 1
+            sentences.append(" ".join(t for t in tokens[i:j] if t != EOS))
+            i = j
+        j += 1
+    sentences.append(" ".join(tokens[i:j]))
+    return [s for s in sentences if s]
+
+
+def _clamp(value: float) -> float:
+    return -1.0 if value < -1.0 else 1.0 if value > 1.0 else value
+
+
+class LexiconBackend(SentimentBackend):
+    """
+    TextBlob-compatible scorer over a compact, preloaded copy of the pattern lexicon.
+
+    The lexicon is loaded once into a token-to-index table and NumPy arrays of
+    polarity, subjectivity and intensity. Scoring a batch tokenizes every
+    text, looks all tokens up at once and uses prefix sums to find which
+    modifiers and negations survive the words between them. Only tokens that
+    carry sentiment go through the sequential negation/intensifier rules,
+    and per-text averages are computed with ``np.bincount``.
+    """
+
+    name = "lexicon"
+
+    def __init__(self):
+        from textblob.en import sentiment as pattern_lexicon
+
+        if dict.__len__(pattern_lexicon) == 0:
+            pattern_lexicon.load()
+
+        words = list(dict.keys(pattern_lexicon))
+        self.index: Dict[str, int] = {word: code for code, word in enumerate(words)}
+        scores = np.array([dict.__getitem__(pattern_lexicon, w)[None] for w in words], dtype=float)
+        self.polarity = scores[:, 0].tolist()
+        self.subjectivity = scores[:, 1].tolist()
+        self.intensity = scores[:, 2].tolist()
+        modifiers = tuple(pattern_lexicon.modifiers)
+        self.is_modifier = [any(m in dict.__getitem__(pattern_lexicon, w) for m in modifiers) for w in words]
+        self.is_ly = [w.endswith("ly") for w in words]
+        self.negations = frozenset(pattern_lexicon.negations)
+        self.is_negation = [w in self.negations for w in words]
+
+        # Unknown tokens that still trigger a rule share the lookup table via negative codes
+        self.events: Dict[str, int] = {}
+        self.emoticon_polarity: List[float] = []
+        for (_, polarity), faces in EMOTICONS.items():
+            for face in faces:
+                face = face.lower()
+                if face.isalpha() is False and len(face) <= 5 and face not in PUNCTUATION \
+                        and face not in self.index and face not in self.events:
+                    self.events[face] = _EMOTICON_BASE - len(self.emoticon_polarity)
+                    self.emoticon_polarity.append(polarity)
+        for word in self.negations:
+            if word not in self.index:
+                self.events[word] = _NEGATION
+        self.events["!"] = _EXCLAMATION
+        self.events["(!)"] = _SARCASM
+        self.lookup = {**self.events, **self.index}
+
+    def score(self, text: str) -> Tuple[float, float]:
+        polarity, subjectivity = self.score_batch([text])[0]
+        return float(polarity), float(subjectivity)
+
+    def score_batch(self, texts: Sequence[str]) -> np.ndarray:
+        return self._score_tokens([tokenize(text) for text in texts])
+
+    def score_prepared(self, prepared: Sequence[PreparedText]) -> np.ndarray:
+        # The preprocessing stage's tokens are exactly what tokenize() would return
+        return self._score_tokens([text.tokens for text in prepared])
+
+    def _score_tokens(self, token_lists: List[List[str]]) -> np.ndarray:
+        lookup = self.lookup
+        n = len(token_lists)
+        doc_lengths = np.fromiter((len(tokens) for tokens in token_lists), dtype=np.int64, count=n)
+        all_tokens = [token for tokens in token_lists for token in tokens]
+
+        codes = np.fromiter((lookup.get(token, -1) for token in all_tokens), dtype=np.int64, count=len(all_tokens))
+        lengths = np.fromiter((len(token) for token in all_tokens), dtype=np.int64, count=len(all_tokens))
+        doc_ids = np.repeat(np.arange(n), doc_lengths)
+
+        # Plain unknown words reset pending state: any word longer than one
+        # character clears a negation, longer than two clears a modifier
+        plain = codes == -1
+        resets_negation = np.concatenate(([0], np.cumsum(plain & (lengths > 1))))
+        resets_modifier = np.concatenate(([0], np.cumsum(plain & (lengths > 2))))
+
+        event_positions = np.flatnonzero(~plain)
+        previous = np.concatenate(([0], event_positions[:-1] + 1))
+        gap_clears_negation = (resets_negation[event_positions] - resets_negation[previous]) > 0
+        gap_clears_modifier = (resets_modifier[event_positions] - resets_modifier[previous]) > 0
+        event_docs = doc_ids[event_positions]
+
+        assessment_docs, assessment_p, assessment_s = self._assess(
+            codes[event_positions].tolist(), lengths[event_positions].tolist(), event_docs.tolist(),
+            gap_clears_negation.tolist(), gap_clears_modifier.tolist()
+        )
+
+        counts = np.bincount(assessment_docs, minlength=n).astype(float)
+        counts[counts == 0] = 1.0
+        scores = np.zeros((n, 2), dtype=float)
+        scores[:, 0] = np.bincount(assessment_docs, weights=assessment_p, minlength=n) / counts
+        scores[:, 1] = np.bincount(assessment_docs, weights=assessment_s, minlength=n) / counts
+        return scores
+
+    def _assess(self, codes, lengths, docs, gap_clears_negation, gap_clears_modifier):
+        # Same rules as pattern's Sentiment.assessments, visiting only sentiment-bearing tokens.
+        # Each assessment is [polarity, subjectivity, intensity, negated, doc].
+        polarity, subjectivity, intensity = self.polarity, self.subjectivity, self.intensity
+        is_modifier, is_ly, is_negation = self.is_modifier, self.is_ly, self.is_negation
+        assessments: List[list] = []
+        modifier: Optional[int] = None
+        negated = False
+        current_doc = -1
+
+        for k, code in enumerate(codes):
+            doc = docs[k]
+            if doc != current_doc:
+                current_doc = doc
+                modifier = None
+                negated = False
+                doc_start = len(assessments)
+            else:
+                if gap_clears_negation[k]:
+                    negated = False
+                if gap_clears_modifier[k]:
+                    modifier = None
+
+            if code >= 0:
+                if modifier is None:
+                    assessments.append([polarity[code], subjectivity[code], intensity[code], False, doc])
+                else:
+                    last = assessments[-1]
+                    last[0] = _clamp(polarity[code] * last[2])
+                    last[1] = _clamp(subjectivity[code] * last[2])
+                    last[2] = intensity[code]
+                if negated:
+                    last = assessments[-1]
+                    last[2] = 1.0 / last[2]
+                    last[3] = True
+                modifier = code if is_modifier[code] else None
+                negated = is_negation[code]
+                continue
+
+            # Unknown token with a rule of its own
+            length = lengths[k]
+            if code == _NEGATION:
+                negated = True
+            elif negated and length > 1:
+                negated = False
+            if negated and modifier is not None and is_ly[modifier]:
+                assessments[-1][3] = True
+                negated = False
+            elif modifier is not None and length > 2:
+                modifier = None
+            if code == _EXCLAMATION and len(assessments) > doc_start:
+                assessments[-1][0] = _clamp(assessments[-1][0] * 1.25)
+            elif code == _SARCASM:
+                assessments.append([0.0, 1.0, 1.0, False, doc])
+            elif code <= _EMOTICON_BASE:
+                assessments.append([self.emoticon_polarity[_EMOTICON_BASE - code], 1.0, 1.0, False, doc])
+
+        if not assessments:
+            return np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0)
+        table = np.array(assessments, dtype=float)
+        p = np.where(table[:, 3] > 0, table[:, 0] * -0.5, table[:, 0])
+        return table[:, 4].astype(np.int64), p, table[:, 1]
+
+
+SENTIMENT_BACKENDS = {
+    TextBlobBackend.name: TextBlobBackend,
+    LexiconBackend.name: LexiconBackend
+}
+
+
+def get_sentiment_backend(name: str) -> SentimentBackend:
+    try:
+        return SENTIMENT_BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown sentiment backend '{name}', expected one of {sorted(SENTIMENT_BACKENDS)}")
+
+
+def sentiment_backend_from_env() -> SentimentBackend:
+    """Build the backend named by SENTIMENT_BACKEND (default: textblob)."""
+    return get_sentiment_backend(os.getenv("SENTIMENT_BACKEND", TextBlobBackend.name))
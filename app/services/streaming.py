@@ -0,0 +1,83 @@
+import asyncio
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Deque, Optional, TypeVar
+from fastapi.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+async def iter_ndjson_lines(chunks: AsyncIterator[bytes], max_line_bytes: int = 1 << 20) -> AsyncIterator[Optional[bytes]]:
+    """
+    Split a stream of byte chunks into NDJSON lines without buffering the whole body.
+
+    Blank lines are skipped. A line longer than ``max_line_bytes`` is discarded
+    and reported as ``None`` so the caller can emit an error for it, which
+    keeps memory bounded no matter what the client sends.
+    """
+    buffer = bytearray()
+    overflow = False
+    async for chunk in chunks:
+        start = 0
+        while True:
+            newline = chunk.find(b"\n", start)
+            if newline == -1:
+                if not overflow:
+                    buffer += chunk[start:]
+                    if len(buffer) > max_line_bytes:
+                        buffer.clear()
+                        overflow = True
+                break
+            if overflow:
+                overflow = False
+                yield None
+            else:
+                buffer += chunk[start:newline]
+                if len(buffer) > max_line_bytes:
+                    yield None
+                elif buffer.strip():
+                    yield bytes(buffer)
+                buffer.clear()
+            start = newline + 1
+    if overflow:
+        yield None
+    elif buffer.strip():
+        yield bytes(buffer)
+
+
+async def ordered_window(items: AsyncIterator[T], worker: Callable[[T], Awaitable[R]], window: int) -> AsyncIterator[R]:
+    """
+    Run ``worker`` over ``items`` with at most ``window`` calls in flight, yielding results in input order.
+
+    The next item is only pulled once there is room in the window and the
+    consumer has taken the oldest result, so a slow reader throttles how fast
+    input is consumed.
+    """
+    in_flight: Deque["asyncio.Task[R]"] = deque()
+    try:
+        async for item in items:
+            in_flight.append(asyncio.ensure_future(worker(item)))
+            if len(in_flight) >= window:
+                yield await in_flight.popleft()
+        while in_flight:
+            yield await in_flight.popleft()
+    finally:
+        for task in in_flight:
+            task.cancel()
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse for bodies generated while the request body is still being read.
+
+    The stock response listens for client disconnects on ``receive`` while
+    streaming, which steals the request body messages from ``request.stream()``.
+    Here the body generator owns ``receive``; a disconnect surfaces as
+    ``ClientDisconnect`` from the request stream instead.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
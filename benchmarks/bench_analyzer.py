@@ -0,0 +1,97 @@
+"""
+Benchmark each stage of ReviewAnalyzer on the bundled dataset and on synthetic posts of growing length.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_analyzer [--backend lexicon] [--baseline bench_analyzer_old.json]
+
+Times are microseconds per post. Results are saved as JSON; with
+``--baseline`` the run exits non-zero if any stage got slower than the
+threshold.
+"""
+import argparse
+import glob
+import random
+import sys
+from typing import Dict, List
+
+from app.services.analyzer import ReviewAnalyzer
+from app.services.preprocess import preprocessor_from_env
+from app.services.sentiment import get_sentiment_backend, SENTIMENT_BACKENDS
+from benchmarks.bench_keyword_matcher import load_texts
+from benchmarks.common import add_result_arguments, metric, report, time_per_item
+
+SYNTHETIC_LENGTHS = (16, 64, 256, 1024)
+
+
+def synthetic_corpus(texts: List[str], words_per_post: int, posts: int = 50, seed: int = 0) -> List[str]:
+    # Posts of a fixed length drawn from the dataset vocabulary, so keyword
+    # and lexicon hit rates stay realistic as length grows
+    vocabulary = " ".join(texts).split()
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(vocabulary, k=words_per_post)) for _ in range(posts)]
+
+
+def stage_timings(analyzer: ReviewAnalyzer, texts: List[str], source: str = "reddit") -> Dict[str, float]:
+    # Inputs for every stage are computed up front so each one is timed alone.
+    # Stages after preprocessing see the prepared text, as in analyze_record.
+    prepared = {text: analyzer.preprocessor.prepare(text) for text in texts}
+    inputs = {}
+    for text in texts:
+        polarity, _ = analyzer.sentiment_backend.score(prepared[text].text)
+        sentiment = analyzer._map_sentiment(polarity)
+        signals = analyzer._scan(prepared[text])
+        topics = analyzer._extract_topics(prepared[text].lower, signals)
+        response = analyzer._generate_response(sentiment, topics)
+        urgency = analyzer._calculate_urgency(sentiment, prepared[text].lower, source, signals)
+        inputs[text] = (sentiment, abs(polarity), signals, topics, response, urgency)
+
+    batch = [{"text": text, "source": source} for text in texts]
+    return {
+        "preprocess": time_per_item(analyzer.preprocessor.prepare, texts),
+        "sentiment": time_per_item(lambda t: analyzer.sentiment_backend.score(prepared[t].text), texts),
+        "keyword_scan": time_per_item(lambda t: analyzer._scan(prepared[t]), texts),
+        "extract_topics": time_per_item(lambda t: analyzer._extract_topics(prepared[t].lower, inputs[t][2]), texts),
+        "generate_response": time_per_item(lambda t: analyzer._generate_response(inputs[t][0], inputs[t][3]), texts),
+        "calculate_urgency": time_per_item(
+            lambda t: analyzer._calculate_urgency(inputs[t][0], prepared[t].lower, source, inputs[t][2]), texts
+        ),
+        "build_result": time_per_item(
+            lambda t: analyzer._build_result(inputs[t][0], inputs[t][3], inputs[t][4], inputs[t][5], inputs[t][1]),
+            texts
+        ),
+        "analyze": time_per_item(lambda t: analyzer.analyze(t, source=source), texts),
+        "analyze_batch": time_per_item(analyzer.analyze_batch, [batch]) / len(batch),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ReviewAnalyzer stages")
+    parser.add_argument("file", nargs="?", help="Scrape file (defaults to the bundled Netflix dataset)")
+    parser.add_argument("--backend", default="textblob", choices=sorted(SENTIMENT_BACKENDS),
+                        help="Sentiment backend to benchmark (default: textblob)")
+    add_result_arguments(parser)
+    args = parser.parse_args()
+
+    path = args.file or sorted(glob.glob("sentiment_analysis_Netflix_*.json"))[-1]
+    # No result cache, so repeated timing runs measure the analysis itself;
+    # ANALYSIS_MAX_CHARS applies as in the service
+    analyzer = ReviewAnalyzer(sentiment_backend=get_sentiment_backend(args.backend),
+                              preprocessor=preprocessor_from_env())
+    analyzer.warmup()
+
+    texts = load_texts(path)
+    corpora = {"netflix": texts}
+    for length in SYNTHETIC_LENGTHS:
+        corpora[f"synthetic_{length}w"] = synthetic_corpus(texts, length)
+
+    metrics = {}
+    for corpus, corpus_texts in corpora.items():
+        for stage, micros in stage_timings(analyzer, corpus_texts).items():
+            metrics[f"{args.backend}.{corpus}.{stage}"] = metric(micros, "us/post")
+
+    sys.exit(report("analyzer", metrics, args.output, args.baseline, args.threshold))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+End-to-end load test of the API, in process, through an httpx ASGI client.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_http [--concurrency 1 4 16] [--requests 200] [--baseline bench_http_old.json]
+
+Every request goes through routing, auth, validation, the analysis executor
+and response serialization, without network or server noise. The result
+cache is disabled unless ``ANALYSIS_CACHE_SIZE`` is set, so repeated posts
+are really analyzed.
+"""
+import argparse
+import asyncio
+import glob
+import itertools
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+import httpx
+import numpy as np
+
+from benchmarks.bench_keyword_matcher import load_texts
+from benchmarks.common import add_result_arguments, metric, report
+
+
+async def run_load(client: httpx.AsyncClient, url: str, payloads: List[Any], concurrency: int,
+                   headers: Dict[str, str]) -> Dict[str, float]:
+    latencies: List[float] = []
+    errors = 0
+    queue = iter(payloads)
+
+    async def worker():
+        nonlocal errors
+        for payload in queue:
+            start = time.perf_counter()
+            response = await client.post(url, json=payload, headers=headers)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+    return {"req_per_s": len(payloads) / elapsed, "p50_ms": p50, "p95_ms": p95, "p99_ms": p99, "errors": errors}
+
+
+async def run(texts: List[str], levels: List[int], requests: int, batch_size: int) -> Dict[str, Dict[str, Any]]:
+    from app.main import app
+    from app.auth.auth_handler import create_token
+
+    headers = {"Authorization": f"Bearer {create_token({'benchmark': True})}"}
+    reviews = [
+        {"review_id": str(i), "text": text, "metadata": {"source": "reddit"}}
+        for i, text in zip(range(requests * batch_size), itertools.cycle(texts))
+    ]
+    endpoints = {
+        "analyze_review": ("/analyze-review", reviews[:requests], 1),
+        f"analyze_reviews_x{batch_size}": (
+            "/analyze-reviews", [reviews[i:i + batch_size] for i in range(0, len(reviews), batch_size)], batch_size
+        ),
+    }
+
+    metrics = {}
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            # One untimed request per endpoint to start executor workers and warm imports
+            for url, payloads, _ in endpoints.values():
+                await client.post(url, json=payloads[0], headers=headers)
+            for name, (url, payloads, items_per_request) in endpoints.items():
+                for concurrency in levels:
+                    result = await run_load(client, url, payloads, concurrency, headers)
+                    key = f"{name}.c{concurrency}"
+                    metrics[f"{key}.req_per_s"] = metric(result["req_per_s"], "req/s", "higher")
+                    metrics[f"{key}.reviews_per_s"] = metric(result["req_per_s"] * items_per_request, "reviews/s", "higher")
+                    for pct in ("p50_ms", "p95_ms", "p99_ms"):
+                        metrics[f"{key}.{pct}"] = metric(result[pct], "ms")
+                    if result["errors"]:
+                        print(f"Warning: {result['errors']} non-200 responses for {key}")
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the API end to end")
+    parser.add_argument("file", nargs="?", help="Scrape file (defaults to the bundled Netflix dataset)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16],
+                        help="Concurrent clients per run (default: 1 4 16)")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint and level (default: 200)")
+    parser.add_argument("--batch-size", type=int, default=25, help="Reviews per /analyze-reviews request (default: 25)")
+    add_result_arguments(parser)
+    args = parser.parse_args()
+
+    os.environ.setdefault("ANALYSIS_CACHE_SIZE", "0")
+    path = args.file or sorted(glob.glob("sentiment_analysis_Netflix_*.json"))[-1]
+    metrics = asyncio.run(run(load_texts(path), args.concurrency, args.requests, args.batch_size))
+    sys.exit(report("http", metrics, args.output, args.baseline, args.threshold))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark topic/urgency keyword matching against the previous substring scan.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_keyword_matcher [sentiment_analysis_Netflix_*.json]
+"""
+import argparse
+import glob
+import json
+import timeit
+from typing import Callable, List
+
+from app.services.analyzer import ReviewAnalyzer
+
+
+def legacy_scan(analyzer: ReviewAnalyzer, text: str, source: str = "reddit"):
+    # The per-keyword substring scans used before the compiled matcher
+    topics = set()
+    text_lower = text.lower()
+    for keyword, topic in analyzer.reddit_keywords.items():
+        if keyword in text_lower:
+            topics.add(topic)
+    text_lower = text.lower()
+    urgent = any(keyword in text_lower for keyword in analyzer.urgent_keywords)
+    visible = source == "reddit" and any(keyword in text_lower for keyword in analyzer.visibility_keywords)
+    return topics, urgent, visible
+
+
+def matcher_scan(analyzer: ReviewAnalyzer, text: str, source: str = "reddit"):
+    signals = analyzer.keyword_matcher.scan(text)
+    return analyzer._extract_topics(text, signals), analyzer._calculate_urgency("mixed", text, source, signals)
+
+
+def load_texts(path: str) -> List[str]:
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    posts = data["raw_data"]["reddit"]["posts"]
+    return [f"{post['title']}\n\n{post['text']}" if post["text"] else post["title"] for post in posts]
+
+
+def time_per_text(fn: Callable[[str], object], texts: List[str], repeat: int = 5) -> float:
+    number = max(1, 2000 // len(texts))
+    best = min(timeit.repeat(lambda: [fn(t) for t in texts], number=number, repeat=repeat))
+    return best / number / len(texts) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark keyword matching")
+    parser.add_argument("file", nargs="?", help="Scrape file (defaults to the bundled Netflix dataset)")
+    args = parser.parse_args()
+
+    path = args.file or sorted(glob.glob("sentiment_analysis_Netflix_*.json"))[-1]
+    analyzer = ReviewAnalyzer()
+    texts = load_texts(path)
+    corpora = {
+        path: texts,
+        "long posts (10 posts concatenated)": [" ".join(texts[i:i + 10]) for i in range(0, len(texts), 10)],
+    }
+
+    print(f"{'corpus':<50} {'legacy us/text':>15} {'matcher us/text':>16} {'speedup':>8}")
+    for name, corpus in corpora.items():
+        legacy = time_per_text(lambda t: legacy_scan(analyzer, t), corpus)
+        compiled = time_per_text(lambda t: matcher_scan(analyzer, t), corpus)
+        print(f"{name:<50} {legacy:>15.1f} {compiled:>16.1f} {legacy / compiled:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Replay captured API traffic against a running server or the in-process app.
+
+Capture traffic with ``CAPTURE_ENABLED=true`` (see the README), then run from
+the repository root:
+
+    python -m benchmarks.bench_replay captured_requests.jsonl [--url http://localhost:8000]
+        [--speedup 4 | --rate 200] [--concurrency 64] [--baseline bench_replay_old.json]
+
+The load is open loop: each request is sent at its scheduled time, whether
+or not earlier ones have completed. The schedule is either the captured
+arrival times divided by ``--speedup``, or Poisson arrivals at ``--rate``
+requests per second. ``--concurrency`` caps requests in flight; requests
+beyond it wait for a free slot. Latency is measured from the scheduled send
+time, so time spent waiting for a slot or behind a saturated server counts,
+and an overloaded target can't hide its queueing by slowing the client down.
+Without ``--url`` the requests go to ``--app`` (default ``app.main:app``)
+through an httpx ASGI client.
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import random
+import sys
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence
+
+import httpx
+import numpy as np
+
+from benchmarks.common import add_result_arguments, metric, report
+
+
+def load_capture(path: str, paths: Optional[Sequence[str]] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Captured requests with a replayable body, in arrival order."""
+    entries = []
+    skipped = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                skipped += 1
+                continue
+            if not isinstance(entry, dict) or "body" not in entry or "ts" not in entry:
+                skipped += 1
+                continue
+            if paths and entry.get("path") not in paths:
+                continue
+            entries.append(entry)
+    if skipped:
+        print(f"Skipped {skipped} malformed, truncated or invalid-body entries in {path}")
+    entries.sort(key=lambda entry: entry["ts"])
+    return entries[:limit] if limit else entries
+
+
+def schedule(entries: Sequence[Dict[str, Any]], speedup: float = 1.0, rate: Optional[float] = None,
+             seed: int = 0) -> List[float]:
+    """Send offsets in seconds: captured gaps divided by ``speedup``, or Poisson arrivals at ``rate`` per second."""
+    if not entries:
+        return []
+    if rate:
+        rng = random.Random(seed)
+        offsets, now = [], 0.0
+        for _ in entries:
+            offsets.append(now)
+            now += rng.expovariate(rate)
+        return offsets
+    first = entries[0]["ts"]
+    return [(entry["ts"] - first) / speedup for entry in entries]
+
+
+async def replay(client: httpx.AsyncClient, entries: Sequence[Dict[str, Any]], offsets: Sequence[float],
+                 concurrency: Optional[int] = None, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Send every entry at its offset; returns latencies (from the scheduled time), service times and statuses."""
+    headers = {"Content-Type": "application/json", **(headers or {})}
+    slots = asyncio.Semaphore(concurrency) if concurrency else None
+    latencies = np.zeros(len(entries))
+    service = np.zeros(len(entries))
+    statuses: Counter = Counter()
+    loop = asyncio.get_running_loop()
+
+    async def send(i: int, entry: Dict[str, Any], due: float):
+        if slots is not None:
+            await slots.acquire()
+        try:
+            sent = loop.time()
+            url = entry["path"] + (f"?{entry['query']}" if entry.get("query") else "")
+            try:
+                response = await client.request(entry.get("method", "POST"), url,
+                                                content=json.dumps(entry["body"]), headers=headers)
+                statuses[response.status_code] += 1
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+            done = loop.time()
+            latencies[i] = done - due
+            service[i] = done - sent
+        finally:
+            if slots is not None:
+                slots.release()
+
+    start = loop.time()
+    tasks = []
+    for i, (entry, offset) in enumerate(zip(entries, offsets)):
+        delay = start + offset - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(send(i, entry, start + offset)))
+    await asyncio.gather(*tasks)
+    return {
+        "elapsed": loop.time() - start,
+        "offered_seconds": offsets[-1] if offsets else 0.0,
+        "latencies": latencies,
+        "service": service,
+        "statuses": statuses
+    }
+
+
+def summarize(result: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    requests = len(result["latencies"])
+    errors = sum(count for status, count in result["statuses"].items()
+                 if not (isinstance(status, int) and 200 <= status < 300))
+    metrics = {
+        "requests": metric(requests, "requests", "higher"),
+        "offered_req_per_s": metric(requests / result["offered_seconds"] if result["offered_seconds"] else 0.0,
+                                    "req/s", "higher"),
+        "throughput_req_per_s": metric(requests / result["elapsed"] if result["elapsed"] else 0.0, "req/s", "higher"),
+        "error_rate": metric(100.0 * errors / requests if requests else 0.0, "%"),
+    }
+    if requests:
+        for name, values in (("latency", result["latencies"]), ("service", result["service"])):
+            for pct in (50, 90, 95, 99):
+                metrics[f"{name}.p{pct}_ms"] = metric(float(np.percentile(values, pct)) * 1000, "ms")
+            metrics[f"{name}.max_ms"] = metric(float(values.max()) * 1000, "ms")
+    return metrics
+
+
+def load_app(target: str):
+    module, _, attr = target.partition(":")
+    return getattr(importlib.import_module(module), attr or "app")
+
+
+async def run(entries: List[Dict[str, Any]], offsets: List[float], url: Optional[str], app_target: str,
+              concurrency: Optional[int], token: Optional[str], timeout: float) -> Dict[str, Any]:
+    if token is None:
+        from app.auth.auth_handler import create_token
+        token = create_token({"replay": True})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    if url:
+        async with httpx.AsyncClient(base_url=url, timeout=timeout,
+                                     limits=httpx.Limits(max_connections=concurrency)) as client:
+            return await replay(client, entries, offsets, concurrency, headers)
+
+    app = load_app(app_target)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://replay",
+                                     timeout=timeout) as client:
+            return await replay(client, entries, offsets, concurrency, headers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captured API traffic")
+    parser.add_argument("file", help="Capture file written by the request capture middleware")
+    parser.add_argument("--url", help="Base URL of the target server (default: the in-process --app)")
+    parser.add_argument("--app", default="app.main:app", help="In-process ASGI app as module:attribute")
+    pacing = parser.add_mutually_exclusive_group()
+    pacing.add_argument("--speedup", type=float, default=1.0,
+                        help="Divide the captured gaps between requests by this factor (default: 1)")
+    pacing.add_argument("--rate", type=float, help="Ignore captured timing; Poisson arrivals at this many req/s")
+    parser.add_argument("--concurrency", type=int, help="Maximum requests in flight (default: unlimited)")
+    parser.add_argument("--path", action="append", help="Only replay requests to this path (repeatable)")
+    parser.add_argument("--limit", type=int, help="Replay at most this many requests")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay the capture this many times back to back")
+    parser.add_argument("--token", help="Bearer token (default: one signed with this checkout's JWT secret)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds (default: 60)")
+    add_result_arguments(parser)
+    args = parser.parse_args()
+
+    # One INFO line per request from httpx would drown the report
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    entries = load_capture(args.file, args.path, args.limit)
+    if not entries:
+        print(f"No replayable requests in {args.file}")
+        sys.exit(1)
+    offsets = schedule(entries, args.speedup, args.rate)
+    # Back to back: each repetition starts one average gap after the previous one ends
+    gap = offsets[-1] / max(len(offsets) - 1, 1)
+    period = offsets[-1] + gap
+    entries = entries * args.repeat
+    offsets = [offset + k * period for k in range(args.repeat) for offset in offsets]
+
+    result = asyncio.run(run(entries, offsets, args.url, args.app, args.concurrency, args.token, args.timeout))
+    print("Statuses: " + ", ".join(f"{status}={count}" for status, count in result["statuses"].most_common()))
+    sys.exit(report("replay", summarize(result), args.output, args.baseline, args.threshold))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Compare multi-worker startup under uvicorn's own worker manager and the preloading launcher.
+
+Run from the repository root (Linux, reads /proc):
+
+    python -m benchmarks.bench_startup [--workers 4] [--launcher uvicorn preload]
+
+For each launcher this measures the time until every worker answers
+``/ready``, the slowest and median latency of the first analyses (a worker
+that loads its lexicon lazily shows up as a spike), and per-worker RSS and
+PSS once all workers have served traffic. PSS splits shared pages between
+the processes sharing them, so it shows what copy-on-write preloading saves.
+"""
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Set
+
+import numpy as np
+import requests
+
+from app.auth.auth_handler import create_token
+from benchmarks.common import add_result_arguments, metric, report
+
+LAUNCHERS = {
+    "uvicorn": lambda port, workers: [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+                                      "--workers", str(workers), "--log-level", "warning"],
+    "preload": lambda port, workers: [sys.executable, "serve.py", "--host", "127.0.0.1", "--port", str(port),
+                                      "--workers", str(workers), "--log-level", "warning"],
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def descendants(pid: int) -> List[int]:
+    found = []
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            children = [int(child) for child in f.read().split()]
+    except OSError:
+        return found
+    for child in children:
+        found.append(child)
+        found.extend(descendants(child))
+    return found
+
+
+def memory_kb(pid: int) -> Dict[str, int]:
+    usage = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("Rss", "Pss"):
+                usage[key.lower()] = int(value.split()[0])
+    return usage
+
+
+def wait_until_ready(base_url: str, workers: int, timeout: float = 120.0) -> float:
+    # Workers share one socket, so poll /ready until every worker pid has answered
+    start = time.perf_counter()
+    seen: Set[int] = set()
+    while len(seen) < workers:
+        if time.perf_counter() - start > timeout:
+            raise TimeoutError(f"Only {len(seen)}/{workers} workers became ready")
+        try:
+            response = requests.get(f"{base_url}/ready", timeout=5)
+            if response.status_code == 200:
+                seen.add(response.json()["pid"])
+                continue
+            if response.status_code == 404:
+                # Code without /ready: report when the first worker answers /health
+                return time.perf_counter() - start + wait_until_serving(base_url)
+        except (requests.ConnectionError, ValueError, KeyError):
+            pass
+        time.sleep(0.02)
+    return time.perf_counter() - start
+
+
+def wait_until_serving(base_url: str, timeout: float = 120.0) -> float:
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            if requests.get(f"{base_url}/health", timeout=5).status_code == 200:
+                return time.perf_counter() - start
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.02)
+    raise TimeoutError("Server did not start")
+
+
+def bench_launcher(name: str, workers: int, requests_per_worker: int) -> Dict[str, Dict]:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = {**os.environ, "ANALYSIS_CACHE_SIZE": "0"}
+    process = subprocess.Popen(LAUNCHERS[name](port, workers), env=env)
+    try:
+        startup = wait_until_ready(base_url, workers)
+
+        # Fresh connection per request so requests spread over the workers
+        headers = {"Authorization": f"Bearer {create_token({'benchmark': True})}"}
+        latencies = []
+        for i in range(workers * requests_per_worker):
+            payload = {"review_id": str(i), "text": f"Review {i}: great show but the app keeps crashing",
+                       "metadata": {"source": "reddit"}}
+            start = time.perf_counter()
+            requests.post(f"{base_url}/analyze-review", json=payload, headers=headers, timeout=60).raise_for_status()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        worker_pids = [pid for pid in descendants(process.pid) if memory_kb(pid).get("rss", 0) > 20_000]
+        if name == "uvicorn":
+            # uvicorn's supervisor and its helper processes are not workers
+            worker_pids = worker_pids[-workers:]
+        usage = [memory_kb(pid) for pid in worker_pids]
+    finally:
+        process.send_signal(signal.SIGINT)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+    rss = [u["rss"] / 1024 for u in usage]
+    pss = [u["pss"] / 1024 for u in usage]
+    return {
+        f"{name}.startup_s": metric(startup, "s"),
+        f"{name}.first_requests_max_ms": metric(max(latencies[:workers * 2]), "ms"),
+        f"{name}.request_p50_ms": metric(float(np.median(latencies)), "ms"),
+        f"{name}.rss_mb_per_worker": metric(float(np.mean(rss)), "MB"),
+        f"{name}.pss_mb_per_worker": metric(float(np.mean(pss)), "MB"),
+        f"{name}.pss_mb_total": metric(float(np.sum(pss)), "MB"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark multi-worker startup and memory")
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes (default: 4)")
+    parser.add_argument("--launcher", nargs="+", default=list(LAUNCHERS), choices=list(LAUNCHERS))
+    parser.add_argument("--requests-per-worker", type=int, default=10)
+    add_result_arguments(parser)
+    args = parser.parse_args()
+
+    metrics = {}
+    for name in args.launcher:
+        metrics.update(bench_launcher(name, args.workers, args.requests_per_worker))
+    sys.exit(report("startup", metrics, args.output, args.baseline, args.threshold))
+
+
+if __name__ == "__main__":
+    main()
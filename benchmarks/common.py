@@ -0,0 +1,110 @@
+"""
+Shared helpers for the benchmark scripts: timing, result files and regression checks.
+
+A result file is a JSON object::
+
+    {"suite": "analyzer", "environment": {...}, "metrics": {
+        "<name>": {"value": 123.4, "unit": "us", "better": "lower"}, ...}}
+
+Two runs of the same suite can be compared with ``find_regressions``.
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Sequence
+
+
+def time_per_item(fn: Callable[[Any], object], items: Sequence[Any], min_time: float = 0.2, repeat: int = 3) -> float:
+    """Best-of-``repeat`` time in microseconds to call ``fn`` on one item."""
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    once = time.perf_counter() - start
+    number = max(1, int(min_time / once)) if once > 0 else 1
+    best = min(timeit.repeat(lambda: [fn(item) for item in items], number=number, repeat=repeat))
+    return best / number / len(items) * 1e6
+
+
+def metric(value: float, unit: str, better: str = "lower") -> Dict[str, Any]:
+    return {"value": round(value, 3), "unit": unit, "better": better}
+
+
+def environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds")
+    }
+
+
+def save_results(suite: str, metrics: Dict[str, Dict[str, Any]], path: str = None) -> str:
+    path = path or f"bench_{suite}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"suite": suite, "environment": environment(), "metrics": metrics}, f, indent=2)
+    return path
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def find_regressions(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.10) -> List[str]:
+    """
+    Describe every metric that got worse than ``baseline`` by more than ``threshold``.
+
+    Metrics missing from either run are skipped, so suites can grow without
+    invalidating old result files.
+    """
+    regressions = []
+    for name, now in current["metrics"].items():
+        before = baseline["metrics"].get(name)
+        if before is None or not before["value"]:
+            continue
+        change = (now["value"] - before["value"]) / before["value"]
+        worse = change > threshold if now["better"] == "lower" else change < -threshold
+        if worse:
+            regressions.append(
+                f"{name}: {before['value']} -> {now['value']} {now['unit']} ({change:+.1%})"
+            )
+    return regressions
+
+
+def report(suite: str, metrics: Dict[str, Dict[str, Any]], output: str = None,
+           baseline: str = None, threshold: float = 0.10) -> int:
+    """Print and save ``metrics``; return a non-zero exit code if they regressed against ``baseline``."""
+    for name, m in metrics.items():
+        print(f"{name:<60} {m['value']:>12.1f} {m['unit']}")
+    path = save_results(suite, metrics, output)
+    print(f"\nResults saved to {path}")
+
+    if not baseline:
+        return 0
+    regressions = find_regressions(load_results(baseline), {"metrics": metrics}, threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {threshold:.0%} against {baseline}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions over {threshold:.0%} against {baseline}")
+    return 0
+
+
+def add_result_arguments(parser):
+    parser.add_argument("--output", help="Where to save the JSON results (default: bench_<suite>_<timestamp>.json)")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative slowdown reported as a regression (default: 0.10)")
@@ -0,0 +1,38 @@
+"""
+Convert process_reviews JSON or JSONL results to the columnar format.
+
+    python convert_results.py results_<scrape>.json results_columnar [--scrape <scrape>.json]
+
+The output directory holds one memory-mappable file per column plus a
+``header.json`` (see ``app/processing/columnar.py``). Results carry no post
+metadata, so pass the scrape they came from to fill in subreddit and
+created_utc. Both files are streamed, so either can be larger than memory.
+"""
+import argparse
+import logging
+import os
+
+from app.processing.columnar import convert_json_results
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert JSON results to the columnar results format")
+    parser.add_argument("results", help="JSON or JSONL results written by process_reviews.py")
+    parser.add_argument("output", help="Directory for the columnar results")
+    parser.add_argument("--scrape", help="Scrape the results were produced from, for subreddit and created_utc")
+    parser.add_argument("--chunk-size", type=int, default=65536, help="Rows buffered between writes (default: 65536)")
+    args = parser.parse_args()
+
+    columns = convert_json_results(args.results, args.output, args.scrape, args.chunk_size)
+    json_bytes = os.path.getsize(args.results)
+    columnar_bytes = sum(entry.stat().st_size for entry in os.scandir(args.output) if entry.is_file())
+    logger.info(f"{len(columns)} rows: {json_bytes} bytes of JSON -> {columnar_bytes} bytes columnar "
+                f"({json_bytes / max(columnar_bytes, 1):.1f}x smaller)")
+    logger.info(f"Sentiments: {columns.counts('sentiment')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,15 +2,31 @@ import json
 import requests
 import argparse
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional, Iterable, AsyncIterator, Tuple, Any, Union, Deque
 from app.auth.auth_handler import create_token
 import asyncio
 import aiohttp
 from datetime import datetime
+from collections import deque
 import logging
 from concurrent.futures import ThreadPoolExecutor
 import sys
 from app.models.review import SentimentAnalysisInput, RedditPost, ReviewMetadata
+from app.services.cache import AnalysisCache, SQLiteCacheBackend, make_cache_key
+from app.services.dedup import DuplicateClusters
+from app.services.analyzer import ANALYSIS_VERSION, analysis_namespace
+from app.services.preprocess import preprocessor_from_env
+from app.services.sentiment import sentiment_backend_from_env
+from app.services.results_store import ResultsStore
+from app.processing.json_stream import iter_json_array
+from app.processing.throughput import ConcurrencyLimiter, ThroughputStats, backoff_delay
+from app.processing.balancer import EndpointPool
+from app.processing.columnar import ColumnarWriter
+from app.processing.incremental import DEFAULT_EDIT_WINDOW_DAYS, WatermarkState, default_state_file, load_prior_results
+from app.services.executor import init_worker, run_in_worker
+from concurrent.futures import ProcessPoolExecutor
+import os
+import time
 
 # Configure logging
 logging.basicConfig(
@@ -23,58 +39,485 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Location of the posts array inside a scrape file
+POSTS_PATH = ("raw_data", "reddit", "posts")
+# Scrape metadata fields besides the posts
+HEADER_FIELDS = tuple(field for field in SentimentAnalysisInput.model_fields if field != "raw_data")
+
 class ReviewProcessor:
-    def __init__(self, api_url: str, batch_size: int = 10, max_concurrent: int = 5):
-        self.api_url = api_url
+    def __init__(self, api_url: Union[str, List[str]], batch_size: int = 10, max_concurrent: int = 5,
+                 cache_db: Optional[str] = None, adaptive: bool = False, max_retries: int = 3,
+                 request_timeout: float = 60.0, local: bool = False, workers: Optional[int] = None,
+                 chunk_size: int = 32, dedup_threshold: Optional[float] = None,
+                 results_db: Optional[str] = None, balance: str = "least-outstanding",
+                 health_interval: float = 10.0, columnar_dir: Optional[str] = None):
+        # Several analyzer URLs are load balanced; see EndpointPool
+        self.endpoints = EndpointPool([api_url] if isinstance(api_url, str) else api_url,
+                                      strategy=balance, health_interval=health_interval)
+        self.api_url = self.endpoints.endpoints[0].url
         self.batch_size = batch_size
         self.max_concurrent = max_concurrent
+        self.adaptive = adaptive
+        self.max_retries = max_retries
+        self.request_timeout = request_timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        # Local engine: analyze in a process pool instead of calling the API
+        self.local = local
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.limiter: Optional[ConcurrencyLimiter] = None
+        self.stats = ThroughputStats()
+        # Near-duplicate posts are not analyzed when a similarity threshold is set
+        self.dedup_threshold = dedup_threshold
+        self.dedup: Optional[DuplicateClusters] = None
+        # Persistent cache so reruns over overlapping scrapes skip analyzed posts
+        self.cache = AnalysisCache(backend=SQLiteCacheBackend(cache_db)) if cache_db else None
+        # Analysis settings that cached results were produced under, part of every cache key. The
+        # local engine uses this process's settings; the API reports its own on /health.
+        if local:
+            self.cache_namespace = analysis_namespace(sentiment_backend_from_env().name, preprocessor_from_env())
+        else:
+            self.cache_namespace = f"api:analysis-v{ANALYSIS_VERSION}"
+        self._namespace_resolved = local
+        # Queryable SQLite store that every result is also written to
+        self.results_store = ResultsStore(results_db) if results_db else None
+        self._results_flush: Optional[asyncio.Future] = None
+        # Memory-mappable columns that each run's results are also written to
+        self.columnar_dir = columnar_dir
+        self.columnar: Optional[ColumnarWriter] = None
         self.token = create_token({"test": True})
         self.headers = {
             "Authorization": f"Bearer {self.token}",
             "Content-Type": "application/json"
         }
 
-    async def process_post(self, session: aiohttp.ClientSession, post_dict: Dict) -> Dict:
-        """Process a single Reddit post."""
-        try:
-            # Convert dictionary to RedditPost model
-            post = RedditPost(**post_dict)
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the long-lived HTTP session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            # One pooled connection per concurrent request, reused across the whole run,
+            # plus one per endpoint so health checks never queue behind analysis requests
+            limit = self.max_concurrent + (len(self.endpoints) if len(self.endpoints) > 1 else 0)
+            connector = aiohttp.TCPConnector(limit=limit, ttl_dns_cache=300, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout)
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+        if self.results_store is not None:
+            if self._results_flush is not None:
+                await asyncio.wait([self._results_flush])
+            await asyncio.get_running_loop().run_in_executor(None, self.results_store.flush)
+
+    def _begin_run(self):
+        self.limiter = ConcurrencyLimiter(self.max_concurrent, adaptive=self.adaptive)
+        self.stats = ThroughputStats()
+        self.dedup = DuplicateClusters(self.dedup_threshold) if self.dedup_threshold is not None else None
+        self.endpoints.reset_stats()
+        self.columnar = ColumnarWriter(self.columnar_dir) if self.columnar_dir else None
+
+    def _finish_run(self) -> Dict:
+        self.stats.finish()
+        report = self.stats.report()
+        if self.columnar is not None:
+            self.columnar.close()
+            logger.info(f"Wrote {self.columnar.rows} results to columnar directory {self.columnar_dir}")
+        if self.limiter is not None:
+            report["concurrency_limit"] = self.limiter.limit
+            report["peak_concurrency_limit"] = self.limiter.peak_limit
+        if self.dedup is not None:
+            report["duplicates_skipped"] = self.dedup.saved
+            logger.info(f"Dedup: {self.dedup.index.duplicates} of {self.dedup.index.checked} posts were "
+                        f"near-duplicates, saving {self.dedup.saved} analyses")
+        if len(self.endpoints) > 1 and not self.local:
+            report["endpoints"] = self.endpoints.report()
+            for endpoint in report["endpoints"]:
+                logger.info(
+                    f"Endpoint {endpoint['url']}: {endpoint['ok']} ok, {endpoint['failed']} failed "
+                    f"({endpoint['posts_per_s']} posts/s), p50={endpoint.get('p50_ms')}ms "
+                    f"p95={endpoint.get('p95_ms')}ms, ejections={endpoint['ejections']}"
+                )
+        logger.info(
+            f"Throughput: {report['posts']} posts in {report['elapsed_s']}s "
+            f"({report['posts_per_s']} posts/s), "
+            f"p50={report.get('p50_ms')}ms p95={report.get('p95_ms')}ms p99={report.get('p99_ms')}ms, "
+            f"retries={report['retries']}, outcomes={report['outcomes']}"
+        )
+        return report
+
+    async def _send(self, session: aiohttp.ClientSession, review_data: Dict) -> Tuple[Optional[int], Any]:
+        """
+        POST a review, retrying 429/5xx responses and connection errors.
+        
+        With several endpoints, a failed attempt is retried at once on an
+        endpoint this review hasn't tried yet; jittered backoff only starts
+        once every endpoint has failed it.
+        """
+        tried = set()
+        for attempt in range(self.max_retries + 1):
+            endpoint = self.endpoints.choose(review_data.get("review_id"), exclude=tried)
+            endpoint.outstanding += 1
+            started = time.perf_counter()
+            retry_after = None
+            try:
+                async with session.post(endpoint.url, json=review_data, headers=self.headers) as response:
+                    status = response.status
+                    retry_after = response.headers.get("Retry-After")
+                    body = await response.text()
+                try:
+                    result = json.loads(body)
+                except ValueError:
+                    result = body
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                status, result = None, f"{type(e).__name__}: {str(e)}"
+            finally:
+                endpoint.outstanding -= 1
             
-            # Combine title and text for sentiment analysis
-            combined_text = f"{post.title}\n\n{post.text}" if post.text else post.title
+            if status == 200:
+                latency = time.perf_counter() - started
+                self.endpoints.on_success(endpoint, latency)
+                if self.limiter is not None:
+                    self.limiter.on_success(latency)
+                return status, result
             
-            # Create metadata
-            metadata = ReviewMetadata(
-                source="reddit",
-                subreddit=post.subreddit,
-                score=post.score,
-                upvote_ratio=post.upvote_ratio,
-                num_comments=post.num_comments,
-                created_utc=post.created_utc
-            )
+            retryable = status is None or status == 429 or status >= 500
+            if retryable and status != 429:
+                # A 429 is the endpoint shedding load, not failing; it stays in the pool
+                self.endpoints.on_failure(endpoint)
+            if retryable and self.limiter is not None:
+                self.limiter.on_overload()
+            if not retryable or attempt == self.max_retries:
+                return status, result
             
-            review_data = {
-                "review_id": post.id,
-                "text": combined_text,
-                "metadata": metadata.dict()
-            }
+            self.stats.retries += 1
+            tried.add(endpoint)
+            if len(tried) < len(self.endpoints):
+                continue
+            tried.clear()
+            delay = backoff_delay(attempt)
+            if retry_after:
+                try:
+                    delay = max(delay, float(retry_after))
+                except ValueError:
+                    pass
+            await asyncio.sleep(delay)
+
+    def _prepare_post(self, post_dict: Dict) -> Tuple[Dict, Optional[str], Optional[Dict]]:
+        """
+        Validate a post and build its API payload.
+        
+        Returns (review_data, cache_key, cached_result); cached_result is set
+        when the post was already analyzed and needs no request.
+        """
+        # Convert dictionary to RedditPost model; anything else fails validation
+        post = RedditPost.model_validate(post_dict)
+        
+        # Combine title and text for sentiment analysis
+        combined_text = f"{post.title}\n\n{post.text}" if post.text else post.title
+        
+        # Create metadata
+        metadata = ReviewMetadata(
+            source="reddit",
+            subreddit=post.subreddit,
+            score=post.score,
+            upvote_ratio=post.upvote_ratio,
+            num_comments=post.num_comments,
+            created_utc=post.created_utc
+        )
+        
+        review_data = {
+            "review_id": post.id,
+            "text": combined_text,
+            "metadata": metadata.model_dump()
+        }
+        
+        cache_key = None
+        if self.cache is not None:
+            cache_key = make_cache_key(combined_text, metadata.source, self.cache_namespace)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return review_data, cache_key, {"review_id": post.id, **cached}
+        return review_data, cache_key, None
+
+    def _store_result(self, cache_key: Optional[str], result: Dict):
+        if cache_key is not None:
+            self.cache.set(cache_key, {
+                "analysis": result["analysis"],
+                "confidence_scores": result["confidence_scores"]
+            })
+
+    async def process_post(self, session: aiohttp.ClientSession, post_dict: Dict) -> Dict:
+        """Process a single Reddit post."""
+        started = time.perf_counter()
+        try:
+            review_data, cache_key, cached = self._prepare_post(post_dict)
+            if cached is not None:
+                self.stats.record(time.perf_counter() - started, "cached")
+                return cached
             
-            async with session.post(self.api_url, json=review_data, headers=self.headers) as response:
-                result = await response.json()
-                if response.status != 200:
-                    logger.error(f"Error processing post {post.id}: {result}")
-                    return {"review_id": post.id, "error": result}
-                return result
+            status, result = await self._send(session, review_data)
+            self.stats.record(time.perf_counter() - started, str(status) if status else "connection_error")
+            if status != 200:
+                logger.error(f"Error processing post {review_data['review_id']}: {result}")
+                return {"review_id": review_data["review_id"], "error": result}
+            self._store_result(cache_key, result)
+            return result
         except Exception as e:
-            post_id = post_dict.get('id', 'unknown')
+            post_id = post_dict.get('id', 'unknown') if isinstance(post_dict, dict) else 'unknown'
+            self.stats.record(time.perf_counter() - started, "exception")
             logger.error(f"Exception processing post {post_id}: {str(e)}")
             return {"review_id": post_id, "error": str(e)}
 
+    async def process_posts(self, posts: Iterable[Dict]) -> AsyncIterator[Tuple[int, Dict]]:
+        """
+        Process posts in a sliding window, yielding (index, result) as each completes.
+        
+        A new post starts as soon as any in-flight post finishes, up to the
+        limiter's current concurrency, so one slow post never holds back the
+        others. Posts are pulled from ``posts`` lazily. With a dedup threshold,
+        near-duplicates of earlier posts are not analyzed (see
+        ``_process_posts_deduplicated``).
+        """
+        if self.limiter is None:
+            self._begin_run()
+        in_flight: Dict[int, Dict] = {}
+        saving = self.results_store is not None or self.columnar is not None
+        if saving:
+            posts = self._track_posts(posts, in_flight)
+        if self.dedup is not None:
+            stage = self._process_posts_deduplicated(posts)
+        else:
+            stage = self._analyze_posts(posts)
+        try:
+            async for index, result in stage:
+                if saving:
+                    self._save_result(result, in_flight.pop(index, None))
+                yield index, result
+        except BaseException:
+            # Like the JSONL output, the columns keep every result saved before the failure
+            if self.columnar is not None:
+                self.columnar.close(complete=False)
+                logger.warning(f"Run failed; {self.columnar.rows} results kept in columnar directory "
+                               f"{self.columnar_dir}, marked incomplete")
+            raise
+
+    def _track_posts(self, posts: Iterable[Dict], in_flight: Dict[int, Dict]) -> Iterable[Dict]:
+        # Keep each post until its result comes back, for the metadata stored with it
+        for index, post_dict in enumerate(posts):
+            in_flight[index] = post_dict
+            yield post_dict
+
+    def _save_result(self, result: Dict, post_dict: Optional[Dict]):
+        post_dict = post_dict if isinstance(post_dict, dict) else {}
+        metadata = {"source": "reddit", "subreddit": post_dict.get("subreddit"), "created_utc": post_dict.get("created_utc")}
+        if self.columnar is not None:
+            self.columnar.add(result, metadata)
+        if self.results_store is not None and self.results_store.add(result, metadata):
+            self._flush_results()
+
+    def _flush_results(self):
+        # Write the batch from a thread, one flush at a time; rows added meanwhile
+        # stay buffered until the next add finds a batch due
+        if self._results_flush is not None and not self._results_flush.done():
+            return
+        self._results_flush = asyncio.get_running_loop().run_in_executor(None, self.results_store.flush)
+        self._results_flush.add_done_callback(self._log_flush_error)
+
+    @staticmethod
+    def _log_flush_error(future: asyncio.Future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Error flushing results store: {str(future.exception())}")
+
+    async def _analyze_posts(self, posts: Iterable[Dict]) -> AsyncIterator[Tuple[int, Dict]]:
+        if self.local:
+            async for item in self._process_posts_local(posts):
+                yield item
+            return
+        limiter = self.limiter
+        session = await self._get_session()
+        if self.cache is not None and not self._namespace_resolved:
+            await self._resolve_cache_namespace(session)
+        health = None
+        if len(self.endpoints) > 1 and self.endpoints.health_interval > 0:
+            health = asyncio.create_task(self.endpoints.health_loop(session))
+        
+        async def run(index: int, post_dict: Dict) -> Tuple[int, Dict]:
+            try:
+                return index, await self.process_post(session, post_dict)
+            finally:
+                await limiter.release()
+        
+        pending = set()
+        try:
+            for index, post_dict in enumerate(posts):
+                await limiter.acquire()
+                pending.add(asyncio.create_task(run(index, post_dict)))
+                finished = [task for task in pending if task.done()]
+                for task in finished:
+                    pending.remove(task)
+                    yield task.result()
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            if health is not None:
+                health.cancel()
+
+    async def _resolve_cache_namespace(self, session: aiohttp.ClientSession):
+        # Key cached results by the server's analysis settings; a server that
+        # doesn't report them keeps the version-only namespace
+        self._namespace_resolved = True
+        endpoint = self.endpoints.endpoints[0]
+        try:
+            async with session.get(endpoint.health_url,
+                                   timeout=aiohttp.ClientTimeout(total=self.endpoints.health_timeout)) as response:
+                body = await response.json() if response.status == 200 else {}
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            logger.warning(f"Could not read analysis settings from {endpoint.health_url}: {str(e)}")
+            return
+        if isinstance(body, dict) and isinstance(body.get("analysis"), str):
+            self.cache_namespace = f"api:{body['analysis']}"
+
+    async def _process_posts_deduplicated(self, posts: Iterable[Dict]) -> AsyncIterator[Tuple[int, Dict]]:
+        """
+        Dedup stage in front of the analysis.
+        
+        Only the first post of each cluster of near-duplicates (MinHash over
+        title + text) is analyzed. The others get a copy of its result with
+        ``duplicate_of`` set to its review id, as soon as that result exists.
+        If that analysis fails, the next post of the cluster is analyzed
+        instead (see ``DuplicateClusters``).
+        """
+        clusters = self.dedup
+        held: Dict[int, Dict] = {}  # index in ``posts`` -> post waiting for its cluster's result
+        retry: Deque[Tuple[int, Dict]] = deque()
+        
+        def admitted() -> Iterable[Tuple[int, Dict]]:
+            for index_in_posts, post_dict in enumerate(posts):
+                while retry:
+                    yield retry.popleft()
+                title = post_dict.get("title") if isinstance(post_dict, dict) else None
+                # Posts without a title can't be compared; they fail validation downstream
+                if isinstance(title, str) and not clusters.admit(index_in_posts, f"{title}\n\n{post_dict.get('text') or ''}"):
+                    held[index_in_posts] = post_dict
+                    continue
+                yield index_in_posts, post_dict
+        
+        def forward(source: Iterable[Tuple[int, Dict]], forwarded: Dict[int, int]) -> Iterable[Dict]:
+            # Numbered the way _analyze_posts numbers its input
+            for analyzed_index, (index_in_posts, post_dict) in enumerate(source):
+                forwarded[analyzed_index] = index_in_posts
+                yield post_dict
+        
+        source: Iterable[Tuple[int, Dict]] = admitted()
+        while True:
+            forwarded: Dict[int, int] = {}  # index in the analyzed stream -> index in ``posts``
+            async for analyzed_index, result in self._analyze_posts(forward(source, forwarded)):
+                index_in_posts = forwarded.pop(analyzed_index)
+                yield index_in_posts, result
+                member = clusters.finish(index_in_posts, result)
+                if member is not None:
+                    retry.append((member, held.pop(member)))
+                for member, _, shared in clusters.take_ready():
+                    yield member, self._duplicate_result(held.pop(member).get("id"), shared)
+            # Members taking over from a failed post after the input ran out get another round
+            if not retry:
+                break
+            source, retry = list(retry), deque()
+        for member, _, shared in clusters.take_ready():
+            yield member, self._duplicate_result(held.pop(member).get("id"), shared)
+
+    def _duplicate_result(self, post_id: Optional[str], representative: Dict) -> Dict:
+        self.stats.record(0.0, "duplicate")
+        return {**representative, "review_id": post_id, "duplicate_of": representative.get("review_id")}
+
+    async def _process_posts_local(self, posts: Iterable[Dict]) -> AsyncIterator[Tuple[int, Dict]]:
+        """
+        Analyze posts in a local process pool, without HTTP or JWT.
+        
+        Posts are sent to workers in chunks of ``chunk_size`` to amortize
+        inter-process overhead, with at most two chunks per worker in flight.
+        Results have the same shape as API responses.
+        """
+        loop = asyncio.get_running_loop()
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker)
+        pool = self._pool
+        
+        async def run_chunk(chunk: List[Tuple[int, Dict, Optional[str]]]) -> List[Tuple[int, Dict]]:
+            started = time.perf_counter()
+            items = [{"text": data["text"], "source": data["metadata"]["source"]} for _, data, _ in chunk]
+            analyses = await loop.run_in_executor(pool, run_in_worker, "analyze_batch_records", (items,), {})
+            elapsed = time.perf_counter() - started
+            
+            output = []
+            for (index, data, cache_key), analysis in zip(chunk, analyses):
+                if isinstance(analysis, dict):
+                    self.stats.record(elapsed, "error")
+                    logger.error(f"Error processing post {data['review_id']}: {analysis['error']}")
+                    output.append((index, {"review_id": data["review_id"], "error": analysis["error"]}))
+                    continue
+                result = {"review_id": data["review_id"], **analysis.to_dict()}
+                self._store_result(cache_key, result)
+                self.stats.record(elapsed, "local")
+                output.append((index, result))
+            return output
+        
+        pending = set()
+        chunk: List[Tuple[int, Dict, Optional[str]]] = []
+        try:
+            for index, post_dict in enumerate(posts):
+                try:
+                    review_data, cache_key, cached = self._prepare_post(post_dict)
+                except Exception as e:
+                    post_id = post_dict.get('id', 'unknown') if isinstance(post_dict, dict) else 'unknown'
+                    self.stats.record(0.0, "exception")
+                    logger.error(f"Exception processing post {post_id}: {str(e)}")
+                    yield index, {"review_id": post_id, "error": str(e)}
+                    continue
+                if cached is not None:
+                    self.stats.record(0.0, "cached")
+                    yield index, cached
+                    continue
+                
+                chunk.append((index, review_data, cache_key))
+                if len(chunk) < self.chunk_size:
+                    continue
+                pending.add(asyncio.ensure_future(run_chunk(chunk)))
+                chunk = []
+                if len(pending) >= 2 * self.workers:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        for item in task.result():
+                            yield item
+            if chunk:
+                pending.add(asyncio.ensure_future(run_chunk(chunk)))
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    for item in task.result():
+                        yield item
+        finally:
+            for task in pending:
+                task.cancel()
+
     async def process_batch(self, posts: List[Dict]) -> List[Dict]:
-        """Process a batch of Reddit posts concurrently."""
-        async with aiohttp.ClientSession() as session:
-            tasks = [self.process_post(session, post) for post in posts]
-            return await asyncio.gather(*tasks)
+        """Process a batch of Reddit posts concurrently, returning results in input order."""
+        results: List[Optional[Dict]] = [None] * len(posts)
+        async for index, result in self.process_posts(posts):
+            results[index] = result
+        return results
 
     def validate_input(self, data: Dict) -> bool:
         """Validate input data structure."""
@@ -98,14 +541,23 @@ class ReviewProcessor:
             # Extract posts from the Reddit data
             posts = data["raw_data"]["reddit"]["posts"]
             
-            # Process in batches
-            results = []
-            for i in range(0, len(posts), self.batch_size):
-                batch = posts[i:i + self.batch_size]
-                batch_results = await self.process_batch(batch)
-                results.extend(batch_results)
-                logger.info(f"Processed batch {i//self.batch_size + 1}/{(len(posts) + self.batch_size - 1)//self.batch_size}")
+            # Process posts in a sliding window, keeping results in input order
+            self._begin_run()
+            results: List[Optional[Dict]] = [None] * len(posts)
+            completed = 0
+            try:
+                async for index, result in self.process_posts(posts):
+                    results[index] = result
+                    completed += 1
+                    if completed % self.batch_size == 0 or completed == len(posts):
+                        logger.info(f"Processed {completed}/{len(posts)} posts")
+            finally:
+                await self.close()
+            throughput = self._finish_run()
 
+            if self.cache is not None:
+                logger.info(f"Cache stats: {self.cache.stats()}")
+            
             # Save results
             output_file = f"results_{Path(file_path).stem}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
             with open(output_file, 'w', encoding='utf-8') as f:
@@ -119,7 +571,8 @@ class ReviewProcessor:
             return {
                 "total_posts": len(posts),
                 "processed_posts": len(results),
-                "output_file": output_file
+                "output_file": output_file,
+                "throughput": throughput
             }
 
         except json.JSONDecodeError:
@@ -129,23 +582,284 @@ class ReviewProcessor:
             logger.error(f"Error processing file {file_path}: {str(e)}")
             raise
 
+    async def process_file_incremental(self, file_path: str, state_file: Optional[str] = None,
+                                       edit_window_days: float = DEFAULT_EDIT_WINDOW_DAYS) -> Dict:
+        """
+        Analyze only the posts that are new or edited since earlier runs over the same query.
+        
+        A per-query ``WatermarkState`` records what was analyzed. Posts whose
+        text fingerprint is unchanged, and analyzed posts that have since aged
+        past the state's edit window, are skipped. The output holds the previous run's results with
+        this run's merged in, so each output is the full history.
+        """
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if not self.validate_input(data):
+            raise ValueError("Invalid input data structure")
+        
+        state_file = state_file or default_state_file(data["query"])
+        state = WatermarkState.load(state_file, data["query"], edit_window_days)
+        posts = data["raw_data"]["reddit"]["posts"]
+        pending, counts = state.partition(posts)
+        logger.info(
+            f"Incremental run over {len(posts)} posts: {counts['new']} new, {counts['edited']} edited, "
+            f"skipping {counts['unchanged']} unchanged and {counts['settled']} settled "
+            f"(watermark {state.watermark})"
+        )
+        
+        self._begin_run()
+        merged = load_prior_results(state.output_file)
+        failed = 0
+        try:
+            async for index, result in self.process_posts(pending):
+                post_dict = pending[index]
+                if "error" in result:
+                    # Left out of the state, so the next run tries it again
+                    failed += 1
+                    merged.setdefault(post_dict.get("id"), result)
+                    continue
+                merged[post_dict["id"]] = result
+                state.mark(post_dict)
+        finally:
+            await self.close()
+        throughput = self._finish_run()
+        
+        output_file = f"results_{Path(file_path).stem}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                "query": data["query"],
+                "timestamp": data["timestamp"],
+                "platforms": data["platforms"],
+                "results": list(merged.values())
+            }, f, indent=2)
+        state.output_file = os.path.abspath(output_file)
+        state.save()
+        
+        return {
+            "total_posts": len(posts),
+            "processed_posts": len(pending),
+            "skipped_posts": counts["unchanged"] + counts["settled"],
+            "new_posts": counts["new"],
+            "edited_posts": counts["edited"],
+            "failed_posts": failed,
+            "merged_results": len(merged),
+            "output_file": output_file,
+            "state_file": state_file,
+            "throughput": throughput
+        }
+
+    async def process_file_streaming(self, file_path: str, output_file: Optional[str] = None) -> Dict:
+        """
+        Process posts as they are parsed, appending results to a JSONL file.
+        
+        Only the posts in flight are held in memory. A checkpoint file next to the
+        output records progress, so rerunning after a crash resumes with the
+        posts that have no result yet.
+        """
+        output_file = output_file or f"results_{Path(file_path).stem}.jsonl"
+        checkpoint_file = f"{os.path.splitext(output_file)[0]}.checkpoint.json"
+        
+        checkpoint = self._load_checkpoint(checkpoint_file)
+        resuming = (
+            checkpoint is not None
+            and not checkpoint.get("completed")
+            and checkpoint.get("input_file") == os.path.abspath(file_path)
+            and os.path.exists(output_file)
+        )
+        done_ids = self._load_done_ids(output_file) if resuming else set()
+        if resuming:
+            logger.info(f"Resuming {file_path}: {len(done_ids)} posts already processed")
+        
+        header: Dict = {}
+        counts = {"total": 0, "skipped": 0}
+        processed_posts = 0
+        
+        def save_progress(completed: bool = False, **extra):
+            self._save_checkpoint(checkpoint_file, {
+                "input_file": os.path.abspath(file_path),
+                "output_file": os.path.abspath(output_file),
+                "posts_seen": counts["total"],
+                "completed": completed,
+                **extra
+            })
+        
+        def pending_posts(f_in) -> Iterable[Dict]:
+            for post_dict in iter_json_array(f_in, POSTS_PATH, header):
+                if not counts["total"] and all(field in header for field in HEADER_FIELDS):
+                    # Metadata written before the posts can be checked before anything is analyzed
+                    self._validate_header(header)
+                counts["total"] += 1
+                if isinstance(post_dict, dict) and post_dict.get("id") in done_ids:
+                    counts["skipped"] += 1
+                    continue
+                yield post_dict
+        
+        try:
+            self._begin_run()
+            with open(file_path, 'r', encoding='utf-8') as f_in, \
+                    open(output_file, 'a' if resuming else 'w', encoding='utf-8') as f_out:
+                try:
+                    async for _, result in self.process_posts(pending_posts(f_in)):
+                        f_out.write(json.dumps(result) + "\n")
+                        processed_posts += 1
+                        if processed_posts % self.batch_size == 0:
+                            f_out.flush()
+                            save_progress()
+                            logger.info(f"Processed {processed_posts} posts ({counts['total']} read)")
+                finally:
+                    f_out.flush()
+                    await self.close()
+            throughput = self._finish_run()
+            total_posts = counts["total"]
+            skipped_posts = counts["skipped"]
+            
+            # Metadata after the posts (or with no posts at all) is only known now
+            self._validate_header(header)
+            
+            save_progress(
+                completed=True,
+                query=header["query"],
+                timestamp=header["timestamp"],
+                platforms=header["platforms"]
+            )
+            
+            if self.cache is not None:
+                logger.info(f"Cache stats: {self.cache.stats()}")
+            
+            return {
+                "total_posts": total_posts,
+                "processed_posts": processed_posts,
+                "skipped_posts": skipped_posts,
+                "output_file": output_file,
+                "checkpoint_file": checkpoint_file,
+                "throughput": throughput
+            }
+        
+        except (json.JSONDecodeError, ValueError) as e:
+            logger.error(f"Invalid JSON file {file_path}: {str(e)}")
+            raise
+        except Exception as e:
+            logger.error(f"Error processing file {file_path}: {str(e)}")
+            raise
+
+    def _validate_header(self, header: Dict):
+        # Validate the scrape metadata with the regular input model
+        if not self.validate_input({**header, "raw_data": {"reddit": {"posts": []}}}):
+            raise ValueError("Invalid input data structure")
+
+    def _load_checkpoint(self, checkpoint_file: str) -> Optional[Dict]:
+        try:
+            with open(checkpoint_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _save_checkpoint(self, checkpoint_file: str, state: Dict):
+        # Write then rename, so a crash never leaves a half-written checkpoint
+        state = {**state, "updated_at": datetime.now().isoformat()}
+        tmp_file = f"{checkpoint_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_file, checkpoint_file)
+
+    def _load_done_ids(self, output_file: str) -> set:
+        """
+        Collect review ids already written to a JSONL output, dropping a torn last line.
+        
+        Error results are dropped from the file too and their ids left out,
+        so a resumed run retries those posts.
+        """
+        done_ids = set()
+        valid_bytes = 0
+        failed_lines = 0
+        with open(output_file, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    result = json.loads(line)
+                    if result.get("error"):
+                        failed_lines += 1
+                    else:
+                        done_ids.add(result["review_id"])
+                except (json.JSONDecodeError, KeyError, TypeError, AttributeError):
+                    break
+                valid_bytes += len(line)
+        if failed_lines:
+            logger.info(f"Retrying {failed_lines} failed posts from {output_file}")
+            tmp_file = f"{output_file}.tmp"
+            with open(output_file, 'rb') as f, open(tmp_file, 'wb') as out:
+                remaining = valid_bytes
+                for line in f:
+                    if remaining <= 0:
+                        break
+                    remaining -= len(line)
+                    if not json.loads(line).get("error"):
+                        out.write(line)
+            os.replace(tmp_file, output_file)
+        elif valid_bytes < os.path.getsize(output_file):
+            logger.warning(f"Truncating incomplete results in {output_file} at byte {valid_bytes}")
+            with open(output_file, 'rb+') as f:
+                f.truncate(valid_bytes)
+        return done_ids
+
 def main():
     parser = argparse.ArgumentParser(description="Process Reddit posts for sentiment analysis")
     parser.add_argument("file", help="JSON file containing Reddit posts")
-    parser.add_argument("--batch-size", type=int, default=10, help="Number of posts to process in each batch")
+    parser.add_argument("--batch-size", type=int, default=10, help="Number of posts between progress reports and checkpoints")
     parser.add_argument("--max-concurrent", type=int, default=5, help="Maximum number of concurrent requests")
-    parser.add_argument("--api-url", default="http://localhost:8000/analyze-review", help="API endpoint URL")
+    parser.add_argument("--adaptive", action="store_true", help="Adjust concurrency (up to --max-concurrent) from observed latency and 429/5xx responses")
+    parser.add_argument("--max-retries", type=int, default=3, help="Retries for 429/5xx responses and connection errors")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds")
+    parser.add_argument("--local", action="store_true", help="Analyze in a local process pool instead of calling the API")
+    parser.add_argument("--workers", type=int, help="Worker processes for --local (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=32, help="Posts sent to a worker per task with --local")
+    parser.add_argument("--api-url", nargs="+", default=["http://localhost:8000/analyze-review"],
+                        help="API endpoint URL; give several to spread posts across analyzer servers")
+    parser.add_argument("--balance", choices=["least-outstanding", "hash"], default="least-outstanding",
+                        help="How posts are spread over several --api-url endpoints: to the one with the fewest requests in flight, or by consistent hash of the post id so reruns hit the same server's cache (default: least-outstanding)")
+    parser.add_argument("--health-interval", type=float, default=10.0,
+                        help="Seconds between /health checks of each endpoint when several are given; 0 disables them (default: 10)")
+    parser.add_argument("--cache-db", help="SQLite file caching results across runs; cached posts are not re-sent to the API")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--stream", action="store_true", help="Parse posts incrementally and append results to a resumable JSONL file")
+    mode.add_argument("--incremental", action="store_true", help="Analyze only posts that are new or edited since earlier runs over the same query, and merge them with those runs' results")
+    parser.add_argument("--output", help="Output file for --stream (default: results_<input>.jsonl)")
+    parser.add_argument("--state-file", help="Watermark state for --incremental (default: state_<query>.json)")
+    parser.add_argument("--edit-window-days", type=float, default=DEFAULT_EDIT_WINDOW_DAYS,
+                        help="With --incremental, posts this much older than the newest post seen are no longer checked for edits (default: 30)")
+    parser.add_argument("--columnar", help="Directory to also write this run's results to as memory-mappable columns (see app/processing/columnar.py)")
+    parser.add_argument("--results-db", help="SQLite results store to also write every result to (queryable with GET /results)")
+    parser.add_argument("--dedup", action="store_true", help="Analyze one post per cluster of near-duplicates and copy its result to the others")
+    parser.add_argument("--dedup-threshold", type=float, default=0.8, help="Similarity (0-1) above which posts count as near-duplicates with --dedup (default: 0.8)")
     
     args = parser.parse_args()
     
     processor = ReviewProcessor(
         api_url=args.api_url,
         batch_size=args.batch_size,
-        max_concurrent=args.max_concurrent
+        max_concurrent=args.max_concurrent,
+        cache_db=args.cache_db,
+        adaptive=args.adaptive,
+        max_retries=args.max_retries,
+        request_timeout=args.timeout,
+        local=args.local,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        dedup_threshold=args.dedup_threshold if args.dedup else None,
+        results_db=args.results_db,
+        balance=args.balance,
+        health_interval=args.health_interval,
+        columnar_dir=args.columnar
     )
     
     try:
-        result = asyncio.run(processor.process_file(args.file))
+        if args.stream:
+            result = asyncio.run(processor.process_file_streaming(args.file, args.output))
+        elif args.incremental:
+            result = asyncio.run(processor.process_file_incremental(args.file, args.state_file, args.edit_window_days))
+        else:
+            result = asyncio.run(processor.process_file(args.file))
         logger.info(f"Processing completed: {result}")
     except Exception as e:
         logger.error(f"Processing failed: {str(e)}")
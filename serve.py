@@ -0,0 +1,132 @@
+"""
+Preloading launcher for multi-worker deployments.
+
+Imports the API and warms the analyzer once in the parent process, then forks
+the workers. Each worker starts with the sentiment lexicon, keyword matcher
+and models already loaded, and shares those pages copy-on-write with its
+siblings instead of loading a private copy on its first request.
+
+    python serve.py [--host 0.0.0.0] [--port 8000] [--workers 4]
+
+Defaults come from HOST, PORT and WORKERS (see env.example). POSIX only.
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict
+
+import uvicorn
+from dotenv import load_dotenv
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# A worker that dies sooner than this after starting is restarted with a delay
+MIN_WORKER_LIFETIME = 1.0
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(api, sock: socket.socket, log_level: str):
+    # SQLite connections must not be shared with the parent
+    if api.cache is not None and api.cache.backend is not None:
+        api.cache.backend.reopen()
+    if api.results_store is not None:
+        api.results_store.reopen()
+    if api.aggregates is not None:
+        api.aggregates.reopen()
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    config = uvicorn.Config(api.app, log_level=log_level)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def spawn(api, sock: socket.socket, log_level: str) -> int:
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            run_worker(api, sock, log_level)
+        except BaseException as e:
+            logger.error(f"Worker {os.getpid()} failed: {str(e)}")
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Run the API with a preloaded analyzer shared by forked workers")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"), help="Bind address (default: HOST or 0.0.0.0)")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")), help="Port (default: PORT or 8000)")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WORKERS", "1")), help="Worker processes (default: WORKERS or 1)")
+    parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "info").lower(), help="uvicorn log level")
+    args = parser.parse_args()
+
+    if not hasattr(os, "fork"):
+        logger.error("serve.py needs os.fork; use `uvicorn app.main:app --workers N` on this platform")
+        sys.exit(1)
+
+    # Build and warm everything the workers need before forking
+    start = time.perf_counter()
+    from app import main as api
+    api.analyzer.warmup()
+    preload_seconds = time.perf_counter() - start
+
+    sock = bind_socket(args.host, args.port)
+
+    # Move everything loaded so far out of the collector's reach, so garbage
+    # collections in the workers don't write to (and un-share) those pages
+    gc.collect()
+    gc.freeze()
+
+    logger.info(f"Preloaded analyzer in {preload_seconds:.2f}s; starting {args.workers} workers on {args.host}:{args.port}")
+
+    workers: Dict[int, float] = {}
+    for _ in range(args.workers):
+        workers[spawn(api, sock, args.log_level)] = time.monotonic()
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while workers:
+        pid, status = os.wait()
+        started_at = workers.pop(pid, None)
+        if started_at is None or stopping:
+            continue
+        logger.warning(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}, restarting")
+        if time.monotonic() - started_at < MIN_WORKER_LIFETIME:
+            time.sleep(MIN_WORKER_LIFETIME)
+        workers[spawn(api, sock, args.log_level)] = time.monotonic()
+
+    sock.close()
+    logger.info("All workers stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import asyncio
+import os
+import time
+
+import numpy as np
+from fastapi.testclient import TestClient
+import app.main as api
+from app.auth.auth_handler import create_token
+from app.models.review import AnalysisRecord
+from app.services.aggregates import Aggregates, RunningStats
+
+headers = {"Authorization": f"Bearer {create_token({'test': True})}"}
+
+def make_record(polarity, topics=("streaming",), urgency=3):
+    sentiment = "positive" if polarity > 0.1 else "negative" if polarity < -0.1 else "mixed"
+    return AnalysisRecord(sentiment=sentiment, key_topics=list(topics), response_recommendation="",
+                          urgency_score=urgency, sentiment_confidence=abs(polarity), polarity=polarity)
+
+def test_merged_running_stats_match_batch_statistics():
+    polarities = np.random.default_rng(0).uniform(-1, 1, 101)
+    left, right = RunningStats(), RunningStats()
+    for i, polarity in enumerate(polarities):
+        (left if i < 40 else right).add("mixed", i % 5 + 1, float(polarity))
+
+    left.merge(right)
+
+    assert left.count == 101 and left.urgency == [21, 20, 20, 20, 20]
+    assert np.isclose(left.polarity_mean, polarities.mean())
+    assert np.isclose(left.polarity_variance, polarities.var(ddof=1))
+
+def test_query_rolls_up_without_double_counting_topics():
+    aggregates = Aggregates(bucket_seconds=60)
+    aggregates.add(make_record(-0.5, ("streaming", "technical"), urgency=5), "netflix", 0)
+    aggregates.add(make_record(0.5, ("content",), urgency=1), "netflix", 70)
+    aggregates.add(make_record(-0.3, ("streaming",)), "movies", 10)
+
+    by_bucket = aggregates.query(subreddit="netflix", group_by=["bucket"])
+    by_topic = aggregates.query(group_by=["topic"])
+
+    assert [(g["bucket"], g["count"]) for g in by_bucket] == [(0, 1), (60, 1)]
+    assert by_bucket[0]["urgency_histogram"]["5"] == 1 and by_bucket[0]["sentiment"]["negative"] == 1
+    assert {g["topic"]: g["count"] for g in by_topic} == {"content": 1, "streaming": 2, "technical": 1}
+    assert aggregates.query(group_by=[])[0]["count"] == 3
+    assert np.isclose(aggregates.query(topic="streaming", group_by=[])[0]["polarity"]["mean"], -0.4)
+
+def test_workers_merge_through_snapshots(tmp_path):
+    worker_a = Aggregates(snapshot_dir=str(tmp_path))
+    worker_b = Aggregates(snapshot_dir=str(tmp_path))
+    worker_a.add(make_record(0.2), "netflix", 0)
+    worker_b.add(make_record(-0.2), "netflix", 0)
+    worker_b.add(make_record(-0.4), "netflix", 0)
+
+    worker_b.snapshot()
+
+    assert worker_a.query(group_by=[])[0]["count"] == 3
+    assert worker_b.query(group_by=[])[0]["count"] == 2
+
+def on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+def test_aggregates_endpoint(monkeypatch):
+    aggregates = Aggregates()
+    query = aggregates.query
+    calls = []
+    monkeypatch.setattr(aggregates, "query", lambda **kwargs: calls.append(on_event_loop()) or query(**kwargs))
+    monkeypatch.setattr(api, "aggregates", aggregates)
+    with TestClient(api.app) as client:
+        client.post("/analyze-reviews", headers=headers, json=[
+            {"review_id": str(i), "text": "Streaming keeps buffering, awful quality",
+             "metadata": {"source": "reddit", "subreddit": "netflix", "created_utc": 7200.0}}
+            for i in range(3)
+        ])
+        response = client.get("/aggregates", params={"topic": "streaming", "group_by": "subreddit"},
+                              headers=headers)
+        invalid = client.get("/aggregates", params={"group_by": "author"}, headers=headers)
+
+    assert response.status_code == 200
+    groups = response.json()["groups"]
+    assert groups == [{"subreddit": "netflix", **groups[0]}] and groups[0]["count"] == 3
+    assert groups[0]["polarity"]["count"] == 3
+    assert invalid.status_code == 400
+    # Queries read snapshot files, so they run in a thread rather than on the event loop
+    assert calls == [False, False]
+
+def test_query_rereads_only_changed_snapshots(tmp_path, monkeypatch):
+    worker_a = Aggregates(snapshot_dir=str(tmp_path))
+    worker_b = Aggregates(snapshot_dir=str(tmp_path))
+    worker_b.add(make_record(-0.2), "netflix", 0)
+    worker_b.snapshot()
+    worker_a.query(group_by=[])
+
+    reads = []
+    read = worker_a._read_snapshot
+    monkeypatch.setattr(worker_a, "_read_snapshot", lambda path: reads.append(path) or read(path))
+    assert worker_a.query(group_by=[])[0]["count"] == 1
+    assert reads == []
+
+    worker_b.add(make_record(-0.4), "netflix", 0)
+    worker_b.snapshot()
+    assert worker_a.query(group_by=[])[0]["count"] == 2
+    assert len(reads) == 1
+
+def test_stale_snapshots_are_compacted_into_the_archive(tmp_path):
+    for polarity in (0.2, -0.2, -0.4):
+        gone = Aggregates(snapshot_dir=str(tmp_path))
+        gone.add(make_record(polarity), "netflix", 0)
+        gone.snapshot()
+    # Those workers have stopped; a snapshot only a second old still counts as alive
+    for path in tmp_path.glob("aggregates-*.json"):
+        os.utime(path, (time.time() - 600, time.time() - 600))
+    alive = Aggregates(snapshot_dir=str(tmp_path))
+    alive.add(make_record(0.6), "movies", 0)
+    alive.snapshot()
+
+    restarted = Aggregates(snapshot_dir=str(tmp_path))
+
+    files = sorted(path.name for path in tmp_path.glob("aggregates-*.json"))
+    assert files == sorted(["aggregates-archive.json", os.path.basename(alive._snapshot_path)])
+    assert {g["subreddit"]: g["count"] for g in restarted.query(group_by=["subreddit"])} == {"netflix": 3, "movies": 1}
+    # Compacting again doesn't count anything twice
+    Aggregates(snapshot_dir=str(tmp_path), stale_seconds=0)
+    assert restarted.query(group_by=[])[0]["count"] == 4
@@ -43,4 +43,30 @@ def test_confidence_scores():
     confidence = result["confidence_scores"]
     assert isinstance(confidence, ConfidenceScores)
     assert 0 <= confidence.sentiment <= 1
-    assert 0 <= confidence.topic_accuracy <= 1 
\ No newline at end of file
+    assert 0 <= confidence.topic_accuracy <= 1 
+
+def test_analyze_batch_matches_single_analysis():
+    analyzer = ReviewAnalyzer()
+    texts = [
+        "The new Netflix show is amazing! Great storyline and excellent acting.",
+        "Netflix's new interface is terrible. Can't find anything anymore.",
+    ]
+    results = analyzer.analyze_batch([{"text": t, "source": "reddit"} for t in texts])
+    
+    assert len(results) == len(texts)
+    for text, result in zip(texts, results):
+        single = analyzer.analyze(text, source="reddit")
+        assert result["analysis"].sentiment == single["analysis"].sentiment
+        assert set(result["analysis"].key_topics) == set(single["analysis"].key_topics)
+        assert result["analysis"].urgency_score == single["analysis"].urgency_score
+        assert result["confidence_scores"].sentiment == single["confidence_scores"].sentiment
+
+def test_analyze_batch_reports_errors_inline():
+    analyzer = ReviewAnalyzer()
+    results = analyzer.analyze_batch([
+        {"text": "Love the new season!", "source": "reddit"},
+        {"source": "reddit"},
+    ])
+    
+    assert "analysis" in results[0]
+    assert "error" in results[1]
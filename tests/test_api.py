@@ -0,0 +1,77 @@
+import json
+from fastapi.testclient import TestClient
+from app.main import app
+from app.auth.auth_handler import create_token
+
+client = TestClient(app)
+headers = {"Authorization": f"Bearer {create_token({'test': True})}"}
+
+def test_analyze_reviews_batch():
+    payload = [
+        {"review_id": "r1", "text": "The app keeps crashing, totally broken.", "metadata": {"source": "reddit"}},
+        {"review_id": "r2", "text": "Great documentary, loved it!", "metadata": {"source": "reddit"}},
+    ]
+    response = client.post("/analyze-reviews", json=payload, headers=headers)
+    
+    assert response.status_code == 200
+    results = response.json()
+    assert [r["review_id"] for r in results] == ["r1", "r2"]
+    assert all(r["error"] is None for r in results)
+    assert "technical" in results[0]["analysis"]["key_topics"]
+
+def test_analyze_reviews_invalid_item_does_not_fail_batch():
+    payload = [
+        {"review_id": "r1", "text": "Great documentary, loved it!", "metadata": {"source": "reddit"}},
+        {"review_id": "r2", "metadata": {"source": "reddit"}},
+    ]
+    response = client.post("/analyze-reviews", json=payload, headers=headers)
+    
+    assert response.status_code == 200
+    results = response.json()
+    assert results[0]["analysis"] is not None
+    assert results[1]["review_id"] == "r2"
+    assert results[1]["error"]
+
+def test_analyze_reviews_non_object_items_only_fail_their_slot():
+    payload = [5, {"review_id": "r1", "text": "Great documentary, loved it!", "metadata": {"source": "reddit"}}, "abc"]
+    response = client.post("/analyze-reviews", json=payload, headers=headers)
+    
+    assert response.status_code == 200
+    results = response.json()
+    assert results[0]["error"] and results[2]["error"]
+    assert results[1]["review_id"] == "r1" and results[1]["error"] is None
+
+def test_analyze_reviews_requires_valid_token():
+    response = client.post("/analyze-reviews", json=[], headers={"Authorization": "Bearer invalid"})
+    assert response.status_code == 401
+
+def test_analyze_reviews_stream_ndjson():
+    lines = [
+        '{"review_id": "r1", "text": "Great documentary, loved it!", "metadata": {"source": "reddit"}}',
+        '',
+        'not json',
+        '{"review_id": "r2", "text": "The app keeps crashing", "metadata": {"source": "reddit"}}',
+    ]
+    response = client.post("/analyze-reviews/stream", content="\n".join(lines).encode(), headers=headers)
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["review_id"] for r in results] == ["r1", None, "r2"]
+    assert results[1]["error"]
+    assert "technical" in results[2]["analysis"]["key_topics"]
+
+def test_ready_only_after_warmup():
+    assert TestClient(app).get("/ready").status_code == 503
+    
+    with TestClient(app) as started:
+        response = started.get("/ready")
+        assert response.status_code == 200
+        assert response.json()["status"] == "ready"
+        assert started.get("/health").status_code == 200
+
+def test_stats_endpoints_require_token():
+    for path in ("/executor/stats", "/cache/stats", "/jobs"):
+        assert client.get(path).status_code in (401, 403), path
+        assert client.get(path, headers={"Authorization": "Bearer invalid"}).status_code == 401, path
+        assert client.get(path, headers=headers).status_code == 200, path
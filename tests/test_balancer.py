@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+from app.processing.balancer import EndpointPool
+
+URLS = ["http://a:8000/analyze-review", "http://b:8000/analyze-review", "http://c:8000/analyze-review"]
+
+def test_hash_strategy_keeps_post_affinity():
+    pool = EndpointPool(URLS, strategy="hash")
+    keys = [f"post{i}" for i in range(600)]
+
+    placement = {key: pool.choose(key).url for key in keys}
+
+    assert placement == {key: pool.choose(key).url for key in keys}
+    assert EndpointPool(URLS, strategy="hash").choose("post7").url == placement["post7"]
+    # Every endpoint gets a fair share
+    counts = [list(placement.values()).count(url) for url in URLS]
+    assert min(counts) > 100
+
+    # Ejecting one endpoint only moves the posts it owned
+    down = pool.endpoints[1]
+    for _ in range(pool.failure_threshold):
+        pool.on_failure(down)
+    assert not down.healthy
+    moved = {key for key in keys if pool.choose(key).url != placement[key]}
+    assert moved == {key for key in keys if placement[key] == down.url}
+
+def test_least_outstanding_prefers_idle_endpoints():
+    pool = EndpointPool(URLS)
+    a, b, c = pool.endpoints
+    a.outstanding, b.outstanding, c.outstanding = 2, 0, 1
+
+    assert pool.choose() is b
+    assert pool.choose(exclude=[b]) is c
+    # Ties rotate instead of piling onto the first endpoint
+    b.outstanding = c.outstanding = 2
+    assert {pool.choose().url for _ in range(6)} == set(URLS)
+
+def test_ejected_endpoint_is_retried_after_eject_seconds():
+    pool = EndpointPool(URLS[:2], failure_threshold=2, eject_seconds=0.05, health_interval=0)
+    a, b = pool.endpoints
+
+    pool.on_failure(a)
+    pool.on_success(a, 0.01)
+    pool.on_failure(a)
+    assert a.healthy
+    pool.on_failure(a)
+    assert not a.healthy and a.ejections == 1
+    assert {pool.choose().url for _ in range(4)} == {b.url}
+
+    time.sleep(0.06)
+    a.outstanding = -1
+    assert pool.choose() is a
+    report = {entry["url"]: entry for entry in pool.report()}
+    assert report[a.url]["failed"] == 3 and report[a.url]["ok"] == 1
+
+class FakeHealthResponse:
+    status = 200
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+class FakeHealthSession:
+    def get(self, url, timeout=None):
+        return FakeHealthResponse()
+
+def test_health_check_waits_out_ejection():
+    pool = EndpointPool(URLS[:2], failure_threshold=1, eject_seconds=0.05)
+    a, _ = pool.endpoints
+    pool.on_failure(a)
+    assert not a.healthy
+
+    # /health answers, but the endpoint was just ejected for failing requests
+    asyncio.run(pool.check_health(FakeHealthSession()))
+    assert not a.healthy
+
+    time.sleep(0.06)
+    asyncio.run(pool.check_health(FakeHealthSession()))
+    assert a.healthy and a.consecutive_failures == 0
@@ -0,0 +1,31 @@
+from benchmarks.bench_analyzer import synthetic_corpus
+from benchmarks.common import find_regressions, metric
+
+def test_find_regressions_respects_direction_and_threshold():
+    baseline = {"metrics": {
+        "analyze": metric(100.0, "us/post"),
+        "req_per_s": metric(500.0, "req/s", "higher"),
+        "build_result": metric(10.0, "us/post"),
+    }}
+    current = {"metrics": {
+        "analyze": metric(125.0, "us/post"),          # 25% slower
+        "req_per_s": metric(400.0, "req/s", "higher"),  # 20% less throughput
+        "build_result": metric(10.5, "us/post"),      # within threshold
+        "new_stage": metric(1.0, "us/post"),          # not in baseline
+    }}
+    
+    regressions = find_regressions(baseline, current, threshold=0.10)
+    
+    assert len(regressions) == 2
+    assert regressions[0].startswith("analyze:")
+    assert regressions[1].startswith("req_per_s:")
+    assert find_regressions(baseline, current, threshold=0.30) == []
+
+def test_synthetic_corpus_is_deterministic():
+    texts = ["Netflix app keeps crashing", "Great show, loved the new season"]
+    
+    corpus = synthetic_corpus(texts, words_per_post=64, posts=5)
+    
+    assert corpus == synthetic_corpus(texts, words_per_post=64, posts=5)
+    assert len(corpus) == 5
+    assert all(len(post.split()) == 64 for post in corpus)
@@ -0,0 +1,61 @@
+import time
+from app.services.cache import AnalysisCache, SQLiteCacheBackend, make_cache_key
+from app.services.analyzer import ReviewAnalyzer
+from app.services.preprocess import TextPreprocessor
+
+def test_cache_key_normalizes_whitespace_and_includes_source():
+    assert make_cache_key("Netflix is down\n\n again ", "reddit") == make_cache_key("Netflix is down again", "reddit")
+    assert make_cache_key("Netflix is down", "reddit") != make_cache_key("Netflix is down", "app_store")
+
+def test_lru_eviction_and_counters():
+    cache = AnalysisCache(max_size=2)
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})
+    assert cache.get("a") == {"v": 1}  # "a" becomes most recently used
+    cache.set("c", {"v": 3})
+    
+    assert cache.get("b") is None
+    assert cache.get("c") == {"v": 3}
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (2, 1, 1)
+
+def test_ttl_expiry():
+    cache = AnalysisCache(ttl=0.01)
+    cache.set("a", {"v": 1})
+    time.sleep(0.02)
+    assert cache.get("a") is None
+
+def test_sqlite_backend_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.db")
+    AnalysisCache(backend=SQLiteCacheBackend(path)).set("a", {"v": 1})
+    
+    cache = AnalysisCache(backend=SQLiteCacheBackend(path))
+    assert cache.get("a") == {"v": 1}
+    assert cache.hits == 1
+
+def test_sqlite_backend_reopen_keeps_entries(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / "cache.db"))
+    backend.set("a", {"v": 1}, 1.0)
+    
+    backend.reopen()
+    
+    assert backend.get("a") == ({"v": 1}, 1.0)
+
+def test_analyzer_serves_repeated_text_from_cache():
+    analyzer = ReviewAnalyzer(cache=AnalysisCache())
+    first = analyzer.analyze("The app keeps crashing!", source="reddit")
+    second = analyzer.analyze("The app keeps  crashing!\n", source="reddit")
+    
+    assert analyzer.cache.hits == 1
+    assert second["analysis"] == first["analysis"]
+    assert second["analysis"] is not first["analysis"]
+
+def test_cache_is_not_shared_across_preprocessing_settings():
+    cache = AnalysisCache()
+    text = "Love the show. " * 20 + "But the app keeps crashing and buffering, it is awful."
+    full = ReviewAnalyzer(cache=cache).analyze_record(text, "reddit")
+    ReviewAnalyzer(cache=cache, preprocessor=TextPreprocessor(max_chars=40)).analyze_record(text, "reddit")
+
+    assert cache.stats()["hits"] == 0 and len(cache) == 2
+    assert ReviewAnalyzer(cache=cache).analyze_record(text, "reddit").to_dict() == full.to_dict()
+    assert cache.stats()["hits"] == 1
@@ -0,0 +1,86 @@
+import asyncio
+import json
+
+import httpx
+from fastapi.testclient import TestClient
+from app.main import app
+from app.auth.auth_handler import create_token
+from app.services.capture import RequestCapture, RequestCaptureMiddleware, sanitize_payload
+from benchmarks.bench_replay import load_capture, replay, schedule, summarize
+
+def auth_headers():
+    return {"Authorization": f"Bearer {create_token({'test': True})}"}
+
+def test_sanitize_payload_keeps_analysis_inputs_only():
+    payload = {
+        "review_id": "t3_abc",
+        "text": "Ask u/netflix_fan or mail jane.doe@example.org, 555-123-4567. The app keeps crashing",
+        "metadata": {"source": "reddit", "subreddit": "netflix", "author": "jane", "created_utc": 1.0},
+        "api_key": "secret"
+    }
+
+    sanitized = sanitize_payload(payload)
+
+    assert set(sanitized) == {"review_id", "text", "metadata"}
+    assert sanitized["review_id"].startswith("cap_") and "abc" not in sanitized["review_id"]
+    assert sanitized["review_id"] == sanitize_payload(payload)["review_id"]
+    assert sanitized["text"] == ("Ask u/redacted or mail user@example.com, 000-000-0000. "
+                                 "The app keeps crashing")
+    assert sanitized["metadata"] == {"source": "reddit", "subreddit": "netflix", "created_utc": 1.0}
+
+def test_middleware_captures_matching_requests(tmp_path):
+    path = tmp_path / "captured.jsonl"
+    capture = RequestCapture(str(path), paths=["/analyze-review"])
+    review = {"review_id": "r1", "text": "Love the new season", "metadata": {"source": "reddit"}}
+
+    with TestClient(RequestCaptureMiddleware(app, capture)) as client:
+        assert client.post("/analyze-review", json=review, headers=auth_headers()).status_code == 200
+        assert client.post("/analyze-review", content=b"{not json", headers=auth_headers()).status_code == 422
+        client.get("/health")
+        client.post("/analyze-reviews", json=[review], headers=auth_headers())
+    capture.close()
+
+    entries = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [(e["path"], e["status"]) for e in entries] == [("/analyze-review", 200), ("/analyze-review", 422)]
+    assert entries[0]["body"]["text"] == "Love the new season"
+    assert entries[0]["duration_ms"] > 0
+    assert entries[1]["invalid_body_bytes"] == 9
+    assert "Bearer" not in path.read_text()
+
+def test_schedule_speedup_and_rate():
+    entries = [{"ts": 100.0}, {"ts": 101.0}, {"ts": 104.0}]
+
+    assert schedule(entries, speedup=2.0) == [0.0, 0.5, 2.0]
+    offsets = schedule(entries * 1000, rate=100.0)
+    assert offsets[0] == 0.0 and all(b >= a for a, b in zip(offsets, offsets[1:]))
+    # Poisson arrivals average out to the requested rate
+    assert 27.0 < offsets[-1] < 33.0
+
+def test_replay_reports_throughput_errors_and_latency(tmp_path):
+    path = tmp_path / "captured.jsonl"
+    lines = [
+        {"ts": 10.0 + i * 0.01, "method": "POST", "path": "/analyze-review", "status": 200,
+         "body": {"review_id": f"r{i}", "text": "The app crashed", "metadata": {"source": "reddit"}}}
+        for i in range(20)
+    ]
+    lines[5]["body"] = {"review_id": "bad"}
+    path.write_text("\n".join(json.dumps(line) for line in lines) + "\n{truncated\n")
+
+    entries = load_capture(str(path))
+    assert len(entries) == 20
+
+    async def run():
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://replay") as client:
+                return await replay(client, entries, schedule(entries, speedup=10.0), concurrency=4,
+                                    headers=auth_headers())
+
+    result = asyncio.run(run())
+    metrics = summarize(result)
+
+    assert result["statuses"] == {200: 19, 422: 1}
+    assert metrics["requests"]["value"] == 20
+    assert metrics["error_rate"]["value"] == 5.0
+    assert metrics["throughput_req_per_s"]["value"] > 0
+    assert metrics["latency.p99_ms"]["value"] >= metrics["service.p50_ms"]["value"]
@@ -0,0 +1,66 @@
+import json
+
+import numpy as np
+from app.processing.columnar import ColumnarResults, ColumnarWriter, convert_json_results
+
+def make_result(i, sentiment="negative", topics=("technical",), urgency=4):
+    return {
+        "review_id": f"p{i}",
+        "analysis": {
+            "sentiment": sentiment,
+            "key_topics": list(topics),
+            "response_recommendation": f"Template for {sentiment}",
+            "urgency_score": urgency
+        },
+        "confidence_scores": {"sentiment": 0.5, "topic_accuracy": 0.85}
+    }
+
+def test_columns_round_trip_through_memmap(tmp_path):
+    path = tmp_path / "columns"
+    with ColumnarWriter(str(path), chunk_size=3, metadata={"query": "Netflix"}) as writer:
+        for i in range(10):
+            positive = i % 2 == 0
+            writer.add(make_result(i, "positive" if positive else "negative",
+                                   ("content",) if positive else ("technical", "ui"), 2 if positive else 5),
+                       {"subreddit": "netflix" if i < 7 else "cordcutters", "created_utc": 1700000000.0 + i})
+        writer.add({"review_id": "p10", "error": "timeout"}, {"subreddit": "netflix"})
+
+    results = ColumnarResults(str(path))
+
+    assert len(results) == 11 and results.header["query"] == "Netflix"
+    assert isinstance(results["urgency"], np.memmap)
+    assert results["urgency"].nbytes == 11 and results["created_utc"].nbytes == 88
+    urgent = (results["urgency"] >= 4) & results.has_topic("technical")
+    assert results.review_ids(urgent) == ["p1", "p3", "p5", "p7", "p9"]
+    assert results.counts("subreddit", urgent) == {"netflix": 3, "cordcutters": 2}
+    assert results.counts("sentiment") == {"positive": 5, "negative": 5, "mixed": 0}
+    assert results.counts("topic") == {"content": 5, "technical": 5, "ui": 5}
+    assert np.isnan(results["created_utc"][10]) and results["sentiment"][10] == -1
+
+    row = results.row(3)
+    assert row["analysis"] == make_result(3, topics=("technical", "ui"), urgency=5)["analysis"]
+    assert row["metadata"] == {"subreddit": "netflix", "created_utc": 1700000003.0}
+    assert results.row(10)["error"]
+
+def test_convert_json_results_with_scrape_metadata(tmp_path):
+    results_file = tmp_path / "results.json"
+    results = [make_result(i) for i in range(4)] + [{"review_id": "p4", "error": "boom"}]
+    results_file.write_text(json.dumps({"query": "Netflix", "timestamp": "t", "platforms": ["reddit"],
+                                        "results": results}, indent=2))
+    scrape = tmp_path / "scrape.json"
+    scrape.write_text(json.dumps({"query": "Netflix", "raw_data": {"reddit": {"posts": [
+        {"id": f"p{i}", "subreddit": "netflix", "created_utc": 100.0 + i} for i in range(5)
+    ]}}}))
+
+    columns = convert_json_results(str(results_file), str(tmp_path / "columns"), str(scrape), chunk_size=2)
+
+    assert len(columns) == 5 and columns.header["errors"] == 1
+    assert columns.header["query"] == "Netflix"
+    assert columns["created_utc"].tolist() == [100.0, 101.0, 102.0, 103.0, 104.0]
+    assert columns.review_ids() == [f"p{i}" for i in range(5)]
+    # Rows are a fraction of the indented JSON
+    assert sum(f.stat().st_size for f in (tmp_path / "columns").glob("*.bin")) < results_file.stat().st_size / 4
+
+    # The legacy bare-array format converts too
+    legacy = convert_json_results("results_example_reviews_20250605_180401.json", str(tmp_path / "legacy"))
+    assert len(legacy) == 3 and legacy.review_ids()[0] == "rev_001"
@@ -0,0 +1,77 @@
+import pytest
+import numpy as np
+from app.services.analyzer import ReviewAnalyzer
+from app.services.dedup import NearDuplicateIndex, find_near_duplicates
+
+def test_near_duplicates_point_at_first_post():
+    texts = [
+        "Is Netflix down?",
+        "The new season of Stranger Things is amazing, best show on the platform right now",
+        "is netflix DOWN??",
+        "the new season of stranger things is amazing! best show on the platform right now.",
+        "Why does the price keep going up every year",
+    ]
+
+    assert find_near_duplicates(texts) == [None, None, 0, 1, None]
+
+def test_threshold_is_configurable():
+    a = "Netflix app keeps crashing on my TV after the update"
+    b = "Netflix app keeps crashing on my phone after the update"
+
+    assert find_near_duplicates([a, b], threshold=0.5) == [None, 0]
+    assert find_near_duplicates([a, b], threshold=0.95) == [None, None]
+    with pytest.raises(ValueError):
+        NearDuplicateIndex(threshold=0)
+
+def test_index_reports_saved_analyses():
+    index = NearDuplicateIndex()
+    for i, text in enumerate(["Is Netflix down?", "is netflix down", "Loved the finale"] * 3):
+        index.add(i, text)
+
+    assert index.stats() == {"checked": 9, "duplicates": 7, "representatives": 2}
+
+def test_short_and_empty_texts_are_never_duplicates():
+    assert find_near_duplicates(["", "   ", "!!!", "", "ok"]) == [None] * 5
+
+def test_signature_of_long_text_matches_unchunked_minhash():
+    index = NearDuplicateIndex()
+    text = " ".join(f"word{i}" for i in range(5000))
+    shingles = index.shingles(text)
+    expected = ((index._a[:, None] * shingles[None, :] + index._b[:, None]) >> np.uint64(32)).min(axis=1)
+
+    assert len(shingles) > 4096
+    assert np.array_equal(index.signature(text), expected)
+
+def test_analyzer_copies_representative_results():
+    items = [
+        {"text": "The app keeps crashing, fix it!", "source": "reddit"},
+        {"text": "the app keeps crashing - fix it", "source": "reddit"},
+        {"text": "the app keeps crashing - fix it", "source": "twitter"},
+        {"source": "reddit"},
+    ]
+
+    results, duplicate_of, saved = ReviewAnalyzer().analyze_batch_deduplicated(items)
+
+    assert duplicate_of == [None, 0, None, None] and saved == 1
+    assert results[1] is results[0]
+    assert "error" in results[3]
+
+def test_failed_representative_hands_cluster_to_next_member():
+    analyzer = ReviewAnalyzer()
+    original = analyzer.analyze_batch_records
+    calls = []
+
+    def flaky(items):
+        calls.append(len(items))
+        records = original(items)
+        # The first representative fails, as on a transient error
+        return [{"error": "unavailable"}] + records[1:] if len(calls) == 1 else records
+
+    analyzer.analyze_batch_records = flaky
+    items = [{"text": "Is Netflix down for everyone?", "source": "reddit"} for _ in range(3)]
+
+    results, duplicate_of, saved = analyzer.analyze_batch_deduplicated(items)
+
+    assert calls == [1, 1]
+    assert results[0] == {"error": "unavailable"}
+    assert duplicate_of == [None, None, 1] and results[2] is results[1] and saved == 1
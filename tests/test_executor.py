@@ -0,0 +1,48 @@
+import asyncio
+import time
+import pytest
+from app.services.analyzer import ReviewAnalyzer
+from app.services.executor import AnalysisExecutor, ExecutorSaturated
+
+class SlowAnalyzer:
+    def analyze(self, text, source=None):
+        time.sleep(0.2)
+        return text
+
+def test_thread_mode_keeps_event_loop_responsive():
+    async def scenario():
+        executor = AnalysisExecutor(SlowAnalyzer(), mode="thread", workers=1)
+        task = asyncio.create_task(executor.run("analyze", "slow"))
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        loop_delay = time.perf_counter() - start
+        assert await task == "slow"
+        executor.shutdown()
+        return loop_delay
+    
+    assert asyncio.run(scenario()) < 0.1
+
+def test_saturated_executor_rejects_submissions():
+    async def scenario():
+        executor = AnalysisExecutor(SlowAnalyzer(), mode="thread", workers=1, queue_limit=1)
+        task = asyncio.create_task(executor.run("analyze", "first"))
+        await asyncio.sleep(0)
+        with pytest.raises(ExecutorSaturated):
+            await executor.run("analyze", "second")
+        await task
+        executor.shutdown()
+        return executor.stats()
+    
+    assert asyncio.run(scenario())["rejected"] == 1
+
+def test_process_mode_runs_analysis_in_worker():
+    async def scenario():
+        executor = AnalysisExecutor(ReviewAnalyzer(), mode="process", workers=1)
+        executor.start()
+        try:
+            return await executor.run("analyze", text="The app keeps crashing", source="reddit")
+        finally:
+            executor.shutdown()
+    
+    result = asyncio.run(scenario())
+    assert "technical" in result["analysis"].key_topics
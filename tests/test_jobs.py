@@ -0,0 +1,92 @@
+import asyncio
+import time
+from fastapi.testclient import TestClient
+from app.main import app
+from app.auth.auth_handler import create_token
+from app.models.review import ReviewRequest
+from app.services.analyzer import ReviewAnalyzer
+from app.services.executor import AnalysisExecutor
+from app.services.jobs import JobQueue, JobQueueFull
+
+headers = {"Authorization": f"Bearer {create_token({'test': True})}"}
+
+def review(review_id, text):
+    return ReviewRequest(review_id=review_id, text=text, metadata={"source": "reddit"})
+
+def test_urgent_items_jump_the_queue():
+    analyzer = ReviewAnalyzer()
+    order = []
+    original = analyzer.analyze_batch_records
+    analyzer.analyze_batch_records = lambda items: order.extend(item["text"] for item in items) or original(items)
+
+    async def scenario():
+        queue = JobQueue(AnalysisExecutor(analyzer, mode="inline"), analyzer.estimate_urgency,
+                         workers=1, batch_size=2, max_pending=6)
+        routine = await queue.submit([review(f"r{i}", f"Loved episode {i}") for i in range(4)])
+        urgent = await queue.submit([review("u", "Netflix is down for everyone, app keeps crashing")])
+        try:
+            await queue.submit([review(f"x{i}", "Another review") for i in range(2)])
+        except JobQueueFull:
+            rejected = True
+        queue.start()
+        while routine.finished_at is None or urgent.finished_at is None:
+            await asyncio.sleep(0.01)
+        await queue.stop()
+        return routine, urgent, rejected
+
+    routine, urgent, rejected = asyncio.run(scenario())
+    assert order[0] == "Netflix is down for everyone, app keeps crashing"
+    assert order[1:] == [f"Loved episode {i}" for i in range(4)]
+    assert rejected
+    assert urgent.to_dict()["urgency"] == {"3": 1}
+    assert routine.to_dict()["progress"] == {"total": 4, "completed": 4, "failed": 0, "pending": 0, "percent": 100.0}
+
+def test_jobs_endpoints():
+    with TestClient(app) as client:
+        submitted = client.post("/jobs", headers=headers, json=[
+            {"review_id": "a", "text": "The app keeps crashing", "metadata": {"source": "reddit"}},
+            {"review_id": "bad"}
+        ])
+        job_id = submitted.json()["job_id"]
+        deadline = time.time() + 10
+        while True:
+            job = client.get(f"/jobs/{job_id}", headers=headers).json()
+            if job["status"] == "completed" or time.time() > deadline:
+                break
+            time.sleep(0.02)
+        missing = client.get("/jobs/unknown", headers=headers)
+
+    assert submitted.status_code == 202 and "results" not in submitted.json()
+    assert job["status"] == "completed" and job["progress"]["failed"] == 1
+    assert job["results"][0]["analysis"]["urgency_score"] >= 3
+    assert job["results"][1]["review_id"] == "bad" and job["results"][1]["error"]
+    assert missing.status_code == 404
+
+def test_empty_jobs_are_rejected_or_complete():
+    with TestClient(app) as client:
+        response = client.post("/jobs", headers=headers, json=[])
+
+    async def scenario():
+        analyzer = ReviewAnalyzer()
+        queue = JobQueue(AnalysisExecutor(analyzer, mode="inline"), analyzer.estimate_urgency)
+        return await queue.submit([]), queue
+
+    job, queue = asyncio.run(scenario())
+    assert response.status_code == 422
+    assert job.status == "completed" and job.finished_at is not None
+    assert queue.active_jobs == 0
+
+def test_concurrent_submits_respect_max_pending():
+    analyzer = ReviewAnalyzer()
+
+    async def scenario():
+        queue = JobQueue(AnalysisExecutor(analyzer, mode="inline"), analyzer.estimate_urgency, max_pending=4)
+        outcomes = await asyncio.gather(
+            *(queue.submit([review(f"{n}-{i}", "Loved it") for i in range(3)]) for n in range(3)),
+            return_exceptions=True
+        )
+        return queue, outcomes
+
+    queue, outcomes = asyncio.run(scenario())
+    assert sum(isinstance(outcome, JobQueueFull) for outcome in outcomes) == 2
+    assert queue.pending == 3 and len(queue.jobs) == 1
@@ -0,0 +1,34 @@
+import io
+import json
+import pytest
+from app.processing.json_stream import iter_json_array
+
+def test_iter_json_array_matches_json_load():
+    with open("sentiment_analysis_Netflix_20250529_234817.json", encoding="utf-8") as f:
+        data = json.load(f)
+    
+    header = {}
+    with open("sentiment_analysis_Netflix_20250529_234817.json", encoding="utf-8") as f:
+        posts = list(iter_json_array(f, ("raw_data", "reddit", "posts"), header, chunk_size=64))
+    
+    assert posts == data["raw_data"]["reddit"]["posts"]
+    assert header["query"] == data["query"]
+    assert header["platforms"] == data["platforms"]
+
+def test_iter_json_array_handles_numbers_at_chunk_edges():
+    document = json.dumps({"raw_data": {"reddit": {"posts": [123456, 7.5, {"id": "a"}]}}, "query": "x"})
+    header = {}
+    items = list(iter_json_array(io.StringIO(document), ("raw_data", "reddit", "posts"), header, chunk_size=1))
+    
+    assert items == [123456, 7.5, {"id": "a"}]
+    assert header == {"query": "x"}
+
+def test_iter_json_array_rejects_truncated_documents():
+    document = '{"raw_data": {"reddit": {"posts": [{"id": "a"}, {"id": '
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO(document), ("raw_data", "reddit", "posts")))
+
+def test_iter_json_array_streams_top_level_array():
+    items = list(iter_json_array(io.StringIO('[{"id": "a"}, 2, [3]]'), (), chunk_size=2))
+    
+    assert items == [{"id": "a"}, 2, [3]]
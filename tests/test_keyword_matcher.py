@@ -0,0 +1,35 @@
+from app.services.keyword_matcher import KeywordMatcher
+from app.services.analyzer import ReviewAnalyzer
+
+def test_matcher_respects_word_boundaries():
+    matcher = KeywordMatcher([("app", "ui"), ("ads", "subscription")])
+    
+    assert matcher.scan("So happy it loads fast") == set()
+    assert matcher.scan("The app shows too many ads") == {"ui", "subscription"}
+
+def test_matcher_matches_inflections_and_phrases():
+    matcher = KeywordMatcher([("crash", "technical"), ("freeze", "technical"),
+                              ("not working", "urgent"), ("down", "down"), ("down for all", "visibility")],
+                             inflections={"crash": ["crashing"], "freeze": ["freezing"]})
+    
+    assert matcher.scan("It keeps crashing") == {"technical"}
+    assert matcher.scan("Playback is FREEZING again") == {"technical"}
+    assert matcher.scan("Search is not\n  working") == {"urgent"}
+    # A phrase also signals the shorter keywords it contains
+    assert matcher.scan("Netflix is down for all of us") == {"down", "visibility"}
+
+def test_analyzer_urgency_uses_shared_signals():
+    analyzer = ReviewAnalyzer()
+    text = "Is Netflix down for everyone? The app keeps crashing"
+    
+    assert set(analyzer._extract_topics(text)) == {"ui", "technical"}
+    assert analyzer._calculate_urgency("negative", text, "reddit") == 5
+    assert analyzer._calculate_urgency("negative", text, "app_store") == 4
+
+def test_analyzer_topics_ignore_unrelated_derived_words():
+    analyzer = ReviewAnalyzer()
+    
+    for text in ("Watched it in the shower", "My helper set it up", "A lifelong supporter",
+                 "Filmed on my phone", "A seasoned reviewer"):
+        assert analyzer._extract_topics(text) == ["general"], text
+    assert set(analyzer._extract_topics("Episodes keep buffering and the app crashed")) == {"content", "streaming", "ui", "technical"}
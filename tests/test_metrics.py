@@ -0,0 +1,69 @@
+import asyncio
+from fastapi.testclient import TestClient
+from app.main import app
+from app.auth.auth_handler import create_token
+from app.services.analyzer import ReviewAnalyzer
+from app.services.executor import AnalysisExecutor
+from app.services.metrics import Histogram, Metrics
+
+headers = {"Authorization": f"Bearer {create_token({'test': True})}"}
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("stage_seconds", "Stage time", ("stage",), buckets=(0.01, 0.1))
+    for value in (0.005, 0.05, 0.05, 5.0):
+        histogram.observe(value, "sentiment")
+
+    lines = histogram.render()
+
+    assert 'stage_seconds_bucket{stage="sentiment",le="0.01"} 1' in lines
+    assert 'stage_seconds_bucket{stage="sentiment",le="0.1"} 3' in lines
+    assert 'stage_seconds_bucket{stage="sentiment",le="+Inf"} 4' in lines
+    assert 'stage_seconds_count{stage="sentiment"} 4' in lines
+
+def test_analyzer_reports_every_stage():
+    samples = []
+    analyzer = ReviewAnalyzer(stage_observer=lambda stage, seconds: samples.append(stage))
+
+    analyzer.analyze("The app keeps crashing", source="reddit")
+
+    assert samples == ["preprocess", "sentiment", "keyword_scan", "extract_topics", "generate_response",
+                       "calculate_urgency", "build_result"]
+
+def test_disabled_metrics_are_no_ops():
+    metrics = Metrics(enabled=False)
+
+    with metrics.stage("auth"):
+        pass
+
+    assert metrics.render() == "\n"
+
+def test_metrics_endpoint_and_server_timing_header():
+    with TestClient(app) as client:
+        response = client.post(
+            "/analyze-review",
+            json={"review_id": "m1", "text": "Great show, loved it!", "metadata": {"source": "reddit"}},
+            headers=headers
+        )
+        body = client.get("/metrics").text
+
+    assert response.status_code == 200
+    timing = response.headers["server-timing"]
+    assert "auth;dur=" in timing and "analysis;dur=" in timing and "total;dur=" in timing
+    assert 'http_requests_total{handler="analyze_review",method="POST",status="200"}' in body
+    assert 'analyzer_stage_seconds_count{stage="sentiment"}' in body
+    assert "analysis_queue_depth 0" in body
+
+def test_process_mode_relays_worker_stage_timings():
+    samples = []
+
+    async def scenario():
+        analyzer = ReviewAnalyzer(stage_observer=lambda stage, seconds: samples.append(stage))
+        executor = AnalysisExecutor(analyzer, mode="process", workers=1)
+        executor.start()
+        try:
+            await executor.run("analyze", text="The app keeps crashing", source="reddit")
+        finally:
+            executor.shutdown()
+
+    asyncio.run(scenario())
+    assert "sentiment" in samples and "keyword_scan" in samples
@@ -0,0 +1,77 @@
+import time
+
+import pytest
+from app.services.analyzer import ReviewAnalyzer
+from app.services.preprocess import TextPreprocessor, sample_sentences, strip_markup
+from app.services.sentiment import LexiconBackend
+
+def test_strip_markup_removes_markdown_and_urls():
+    text = (
+        "# Netflix is down?\n\n"
+        "**Nothing** loads &amp; the [status page](https://help.netflix.com/is-netflix-down) says fine "
+        "![screenshot](https://preview.redd.it/abc.png?width=640)\n\n"
+        "&gt; same here\n"
+        "- see https://www.reddit.com/r/netflix/comments/abc/ for more\n\n"
+        "&amp;#x200B;"
+    )
+
+    assert strip_markup(text) == (
+        "Netflix is down?\n\n"
+        "Nothing loads & the status page says fine screenshot\n\n"
+        "same here\n"
+        "see for more"
+    )
+
+def test_plain_text_is_unchanged():
+    text = "Is it just me or is the new season great? I can't stop watching!"
+
+    assert strip_markup(text) == text
+    assert TextPreprocessor().prepare(text).lower == text.lower()
+
+def test_sample_sentences_spreads_over_long_text():
+    text = " ".join(f"Sentence number {i} is here." for i in range(200))
+
+    sampled = sample_sentences(text, 300)
+
+    assert len(sampled) <= 300
+    assert sampled.startswith("Sentence number 0 is here.")
+    assert sampled.endswith("Sentence number 199 is here.")
+    # Without sentence breaks the text is cut at a word boundary
+    assert set(sample_sentences("word " * 100, 22).split()) == {"word"}
+
+def test_prepared_text_is_shared_by_every_stage():
+    prepared = TextPreprocessor(max_chars=200).prepare(
+        "The [app](https://example.com/app-crashing) keeps CRASHING. " * 30
+    )
+
+    assert prepared.truncated
+    assert len(prepared.text) <= 200
+    assert "http" not in prepared.lower
+    assert prepared.tokens[:5] == ["the", "app", "keeps", "crashing", "."]
+
+    with pytest.raises(ValueError):
+        TextPreprocessor(max_chars=0)
+
+def test_analyzer_ignores_link_targets():
+    analyzer = ReviewAnalyzer()
+
+    # "crash" and "billing" only appear in the URLs
+    result = analyzer.analyze("Loving it, [details](https://example.com/crash-billing-error)", source="reddit")
+
+    assert result["analysis"].key_topics == ["general"]
+    assert result["analysis"].sentiment == "positive"
+
+def test_length_cap_bounds_analysis_cost():
+    sentence = "The app crashed again and support was useless, but the new season is great. "
+    analyzer = ReviewAnalyzer(sentiment_backend=LexiconBackend(), preprocessor=TextPreprocessor(max_chars=2000))
+    analyzer.warmup()
+
+    timings = []
+    for repeats in (30, 3000):
+        started = time.perf_counter()
+        result = analyzer.analyze_record(sentence * repeats, source="reddit")
+        timings.append(time.perf_counter() - started)
+        assert set(result.key_topics) == {"ui", "technical", "customer_service", "content"}
+
+    # 100x the text, but both posts are analyzed from at most 2000 characters
+    assert timings[1] < timings[0] * 10 + 0.05
@@ -0,0 +1,386 @@
+import asyncio
+import importlib
+import json
+import pytest
+
+@pytest.fixture(scope="module")
+def process_reviews(tmp_path_factory):
+    # process_reviews writes its log file to the working directory on import
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(tmp_path_factory.mktemp("logs"))
+        return importlib.import_module("process_reviews")
+
+def make_post(i, text="The app keeps crashing"):
+    return {
+        "id": f"p{i}", "title": f"Post {i}", "text": text, "score": 1,
+        "upvote_ratio": 1.0, "num_comments": 0, "created_utc": 1700000000.0 + i,
+        "subreddit": "netflix", "author": "a", "url": "u", "permalink": "p", "platform": "reddit"
+    }
+
+def write_scrape(path, n_posts):
+    posts = [make_post(i) for i in range(n_posts)]
+    path.write_text(json.dumps({
+        "query": "Netflix", "timestamp": "2025-05-29T23:47:43", "platforms": ["reddit"],
+        "raw_data": {"reddit": {"posts": posts}}
+    }))
+
+def test_streaming_mode_resumes_after_crash(process_reviews, tmp_path):
+    source = tmp_path / "scrape.json"
+    output = tmp_path / "results.jsonl"
+    write_scrape(source, 7)
+    
+    processor = process_reviews.ReviewProcessor(api_url="http://unused", batch_size=3, max_concurrent=1)
+    crash = {"at": "p3"}
+    
+    async def fake_post(session, post):
+        if post["id"] == crash["at"]:
+            raise RuntimeError("simulated crash")
+        return {"review_id": post["id"], "analysis": {}}
+    
+    processor.process_post = fake_post
+    with pytest.raises(RuntimeError):
+        asyncio.run(processor.process_file_streaming(str(source), str(output)))
+    
+    crash["at"] = None
+    result = asyncio.run(processor.process_file_streaming(str(source), str(output)))
+    
+    ids = [json.loads(line)["review_id"] for line in output.read_text().splitlines()]
+    assert sorted(ids) == [f"p{i}" for i in range(7)]
+    assert result["skipped_posts"] == 3
+    checkpoint = json.loads((tmp_path / "results.checkpoint.json").read_text())
+    assert checkpoint["completed"] and checkpoint["query"] == "Netflix"
+
+def test_streaming_resume_retries_failed_posts(process_reviews, tmp_path):
+    source = tmp_path / "scrape.json"
+    output = tmp_path / "results.jsonl"
+    write_scrape(source, 6)
+    
+    processor = process_reviews.ReviewProcessor(api_url="http://unused", batch_size=2, max_concurrent=1)
+    attempts = []
+    failing = {"p1", "p4"}
+    
+    async def fake_post(session, post):
+        attempts.append(post["id"])
+        if post["id"] in failing:
+            failing.discard(post["id"])
+            if post["id"] == "p4":
+                raise RuntimeError("simulated crash")
+            return {"review_id": post["id"], "error": "HTTP 503"}
+        return {"review_id": post["id"], "analysis": {}}
+    
+    processor.process_post = fake_post
+    with pytest.raises(RuntimeError):
+        asyncio.run(processor.process_file_streaming(str(source), str(output)))
+    
+    attempts.clear()
+    asyncio.run(processor.process_file_streaming(str(source), str(output)))
+    
+    assert sorted(attempts) == ["p1", "p4", "p5"]
+    results = [json.loads(line) for line in output.read_text().splitlines()]
+    assert sorted(r["review_id"] for r in results) == [f"p{i}" for i in range(6)]
+    assert not any("error" in r for r in results)
+
+def test_streaming_rejects_bad_header_before_analyzing(process_reviews, tmp_path):
+    source = tmp_path / "scrape.json"
+    source.write_text(json.dumps({
+        "query": "Netflix", "timestamp": "not a time", "platforms": ["reddit"],
+        "raw_data": {"reddit": {"posts": [make_post(i) for i in range(4)]}}
+    }))
+    processor = process_reviews.ReviewProcessor(api_url="http://unused", max_concurrent=1)
+    analyzed = []
+    
+    async def fake_post(session, post):
+        analyzed.append(post["id"])
+        return {"review_id": post["id"], "analysis": {}}
+    
+    processor.process_post = fake_post
+    with pytest.raises(ValueError):
+        asyncio.run(processor.process_file_streaming(str(source), str(tmp_path / "results.jsonl")))
+    assert analyzed == []
+
+def test_streaming_turns_non_object_posts_into_errors(process_reviews, tmp_path):
+    source = tmp_path / "scrape.json"
+    output = tmp_path / "results.jsonl"
+    write_scrape(source, 2)
+    data = json.loads(source.read_text())
+    data["raw_data"]["reddit"]["posts"][1:1] = [7, "post", None]
+    source.write_text(json.dumps(data))
+    processor = process_reviews.ReviewProcessor(api_url="http://unused", max_concurrent=1)
+    
+    async def fake_send(session, review_data):
+        return 200, {"review_id": review_data["review_id"], "analysis": {}}
+    
+    processor._send = fake_send
+    summary = asyncio.run(processor.process_file_streaming(str(source), str(output)))
+    
+    results = [json.loads(line) for line in output.read_text().splitlines()]
+    assert summary["total_posts"] == 5 and len(results) == 5
+    assert sorted(r["review_id"] for r in results if "error" not in r) == ["p0", "p1"]
+    assert sum("error" in r for r in results) == 3
+
+def test_sliding_window_honors_max_concurrent(process_reviews):
+    processor = process_reviews.ReviewProcessor(api_url="http://unused", max_concurrent=3)
+    in_flight = 0
+    peak = 0
+    
+    async def fake_post(session, post):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.001 * (post["n"] % 4))
+        in_flight -= 1
+        return {"review_id": str(post["n"])}
+    
+    processor.process_post = fake_post
+    
+    async def run():
+        try:
+            return await processor.process_batch([{"n": n} for n in range(20)])
+        finally:
+            await processor.close()
+    
+    results = asyncio.run(run())
+    assert [r["review_id"] for r in results] == [str(n) for n in range(20)]
+    assert peak == 3
+
+def test_local_engine_matches_api_result_shape(process_reviews):
+    processor = process_reviews.ReviewProcessor(api_url="http://unused", local=True, workers=1, chunk_size=2)
+    posts = [make_post(0), make_post(1, "Loved the new season!"), {"id": "bad"}, make_post(3)]
+    
+    async def run():
+        try:
+            return await processor.process_batch(posts)
+        finally:
+            await processor.close()
+    
+    results = asyncio.run(run())
+    assert [r["review_id"] for r in results] == ["p0", "p1", "bad", "p3"]
+    assert "technical" in results[0]["analysis"]["key_topics"]
+    assert results[1]["analysis"]["sentiment"] == "positive"
+    assert "error" in results[2]
+    assert set(results[3]) == {"review_id", "analysis", "confidence_scores"}
+
+def test_dedup_stage_analyzes_one_post_per_cluster(process_reviews):
+    processor = process_reviews.ReviewProcessor(api_url="http://unused", max_concurrent=2, dedup_threshold=0.8)
+    analyzed = []
+    
+    async def fake_post(session, post):
+        analyzed.append(post["id"])
+        await asyncio.sleep(0.001)
+        return {"review_id": post["id"], "analysis": {"sentiment": "negative"}}
+    
+    processor.process_post = fake_post
+    posts = [
+        make_post(0, "Is Netflix down for everyone?"),
+        make_post(1, "The app keeps crashing"),
+        make_post(2, "is netflix down for everyone"),
+        make_post(3, "Is Netflix down for everyone??"),
+    ]
+    for post in posts:
+        post["title"] = "Netflix"
+    
+    async def run():
+        try:
+            return await processor.process_batch(posts)
+        finally:
+            await processor.close()
+    
+    results = asyncio.run(run())
+    assert analyzed == ["p0", "p1"]
+    assert [r["review_id"] for r in results] == ["p0", "p1", "p2", "p3"]
+    assert results[2] == {"review_id": "p2", "analysis": {"sentiment": "negative"}, "duplicate_of": "p0"}
+    assert results[3]["duplicate_of"] == "p0" and "duplicate_of" not in results[1]
+    assert processor._finish_run()["duplicates_skipped"] == 2
+
+def test_dedup_retries_cluster_when_representative_fails(process_reviews):
+    processor = process_reviews.ReviewProcessor(api_url="http://unused", max_concurrent=1, dedup_threshold=0.8)
+    analyzed = []
+    
+    async def fake_post(session, post):
+        analyzed.append(post["id"])
+        if post["id"] == "p0":
+            return {"review_id": "p0", "error": "HTTP 503"}
+        return {"review_id": post["id"], "analysis": {"sentiment": "negative"}}
+    
+    processor.process_post = fake_post
+    posts = [make_post(i, "Is Netflix down for everyone?") for i in range(3)]
+    for post in posts:
+        post["title"] = "Netflix"
+    
+    async def run():
+        try:
+            return await processor.process_batch(posts)
+        finally:
+            await processor.close()
+    
+    results = asyncio.run(run())
+    assert analyzed == ["p0", "p1"]
+    assert results[0] == {"review_id": "p0", "error": "HTTP 503"}
+    assert "duplicate_of" not in results[1] and results[2]["duplicate_of"] == "p1"
+    report = processor._finish_run()
+    assert report["duplicates_skipped"] == 1
+
+class FakeResponse:
+    def __init__(self, status, body):
+        self.status = status
+        self.headers = {}
+        self.body = body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def text(self):
+        return json.dumps(self.body)
+    
+    async def json(self):
+        return self.body
+
+def test_failed_endpoint_is_retried_elsewhere_and_ejected(process_reviews):
+    urls = ["http://down:8000/analyze-review", "http://up:8000/analyze-review"]
+    processor = process_reviews.ReviewProcessor(api_url=urls, max_retries=1, balance="hash")
+    calls = []
+    
+    class FakeSession:
+        def post(self, url, json, headers):
+            calls.append(url)
+            if url == urls[0]:
+                return FakeResponse(503, {"detail": "unavailable"})
+            return FakeResponse(200, {"review_id": json["review_id"], "analysis": {}})
+    
+    async def run():
+        processor._begin_run()
+        results = [await processor._send(FakeSession(), {"review_id": f"p{i}"}) for i in range(30)]
+        return results, processor._finish_run()
+    
+    results, report = asyncio.run(run())
+    
+    assert all(status == 200 for status, _ in results)
+    # Three failures eject the endpoint; after that every post goes straight to the healthy one
+    assert calls.count(urls[0]) == 3
+    assert report["retries"] == 3
+    endpoints = {entry["url"]: entry for entry in report["endpoints"]}
+    assert endpoints[urls[0]]["ejections"] == 1 and not endpoints[urls[0]]["healthy"]
+    assert endpoints[urls[1]]["ok"] == 30
+
+def test_cache_keys_follow_analysis_settings(process_reviews, tmp_path):
+    from app.services.analyzer import ReviewAnalyzer
+    cache_db = str(tmp_path / "cache.db")
+    
+    class FakeSession:
+        def __init__(self, analysis):
+            self.analysis = analysis
+        
+        def get(self, url, timeout=None):
+            return FakeResponse(200, {"status": "healthy", "analysis": self.analysis})
+    
+    def prepared(processor, analysis):
+        asyncio.run(processor._resolve_cache_namespace(FakeSession(analysis)))
+        return processor._prepare_post(make_post(0))
+    
+    first = process_reviews.ReviewProcessor(api_url="http://api:8000/analyze-review", cache_db=cache_db)
+    _, key, _ = prepared(first, "analysis-v1:textblob:preprocess-v1:max_chars=0")
+    first._store_result(key, {"review_id": "p0", "analysis": {}, "confidence_scores": {}})
+    
+    same = process_reviews.ReviewProcessor(api_url="http://api:8000/analyze-review", cache_db=cache_db)
+    capped = process_reviews.ReviewProcessor(api_url="http://api:8000/analyze-review", cache_db=cache_db)
+    assert prepared(same, "analysis-v1:textblob:preprocess-v1:max_chars=0")[2] is not None
+    assert prepared(capped, "analysis-v1:textblob:preprocess-v1:max_chars=2000")[2] is None
+    # The local engine keys results like an analyzer built from the same environment
+    local = process_reviews.ReviewProcessor(api_url="http://unused", cache_db=cache_db, local=True)
+    assert local.cache_namespace == ReviewAnalyzer().cache_namespace
+
+def test_incremental_mode_analyzes_only_new_and_edited_posts(process_reviews, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    source = tmp_path / "scrape.json"
+    processor = process_reviews.ReviewProcessor(api_url="http://unused", max_concurrent=2)
+    analyzed = []
+    
+    async def fake_post(session, post):
+        analyzed.append(post["id"])
+        return {"review_id": post["id"], "analysis": {"text": post["text"]}}
+    
+    processor.process_post = fake_post
+    write_scrape(source, 5)
+    first = asyncio.run(processor.process_file_incremental(str(source)))
+    assert first["processed_posts"] == 5 and first["state_file"] == "state_netflix.json"
+    
+    # The next scrape overlaps: p3 is edited, p5 and p6 are new, and p9 is a never-seen post older than the edit window
+    posts = [make_post(i) for i in range(2, 7)]
+    posts[1]["text"] = "Edited: the app works now"
+    posts.append({**make_post(9), "created_utc": 1700000000.0 - 90 * 86400})
+    data = json.loads(source.read_text())
+    data["raw_data"]["reddit"]["posts"] = posts
+    source.write_text(json.dumps(data))
+    analyzed.clear()
+    second = asyncio.run(processor.process_file_incremental(str(source)))
+    
+    assert sorted(analyzed) == ["p3", "p5", "p6", "p9"]
+    assert (second["new_posts"], second["edited_posts"], second["skipped_posts"]) == (3, 1, 2)
+    results = {r["review_id"]: r for r in json.loads((tmp_path / second["output_file"]).read_text())["results"]}
+    assert sorted(results) == [f"p{i}" for i in range(7)] + ["p9"]
+    assert results["p3"]["analysis"]["text"] == "Edited: the app works now"
+    
+    state = json.loads((tmp_path / "state_netflix.json").read_text())
+    assert state["watermark"] == 1700000006.0
+    assert sorted(state["posts"]) == [f"p{i}" for i in range(7)]
+    # p9 was analyzed but is past the edit window, so only its id is kept and it is not analyzed again
+    assert state["settled"] == ["p9"]
+    data["raw_data"]["reddit"]["posts"] = [make_post(9), make_post(0)]
+    data["raw_data"]["reddit"]["posts"][0]["created_utc"] = 1700000000.0 - 90 * 86400
+    source.write_text(json.dumps(data))
+    analyzed.clear()
+    third = asyncio.run(processor.process_file_incremental(str(source)))
+    assert analyzed == [] and third["skipped_posts"] == 2
+
+def test_columnar_output_holds_every_result(process_reviews, tmp_path):
+    from app.processing.columnar import ColumnarResults
+    
+    processor = process_reviews.ReviewProcessor(api_url="http://unused", columnar_dir=str(tmp_path / "columns"))
+    
+    async def fake_post(session, post):
+        return {"review_id": post["id"], "analysis": {"sentiment": "negative", "key_topics": ["technical"],
+                                                      "response_recommendation": "r", "urgency_score": 4},
+                "confidence_scores": {"sentiment": 0.4, "topic_accuracy": 0.85}}
+    
+    processor.process_post = fake_post
+    
+    async def run():
+        processor._begin_run()
+        results = [result async for result in processor.process_posts([make_post(i) for i in range(6)])]
+        processor._finish_run()
+        return results
+    
+    assert len(asyncio.run(run())) == 6
+    columns = ColumnarResults(str(tmp_path / "columns"))
+    assert sorted(columns.review_ids()) == [f"p{i}" for i in range(6)]
+    assert columns.counts("subreddit") == {"netflix": 6}
+    assert columns["created_utc"].min() == 1700000000.0
+
+def test_columnar_output_is_finalized_when_a_run_fails(process_reviews, tmp_path):
+    from app.processing.columnar import ColumnarResults
+    
+    processor = process_reviews.ReviewProcessor(api_url="http://unused", max_concurrent=1,
+                                                columnar_dir=str(tmp_path / "columns"))
+    
+    async def fake_post(session, post):
+        if post["id"] == "p3":
+            raise RuntimeError("simulated crash")
+        return {"review_id": post["id"], "analysis": {"sentiment": "positive", "key_topics": [],
+                                                      "response_recommendation": "r", "urgency_score": 1}}
+    
+    processor.process_post = fake_post
+    
+    async def run():
+        try:
+            return await processor.process_batch([make_post(i) for i in range(6)])
+        finally:
+            await processor.close()
+    
+    with pytest.raises(RuntimeError):
+        asyncio.run(run())
+    columns = ColumnarResults(str(tmp_path / "columns"))
+    assert columns.header["complete"] is False
+    assert sorted(columns.review_ids()) == ["p0", "p1", "p2"]
@@ -0,0 +1,32 @@
+import json
+from app.models.review import AnalysisRecord, ReviewResponse, BatchReviewResult
+from app.services import responses
+from app.services.analyzer import ReviewAnalyzer
+from app.services.responses import FastJSONResponse, batch_result, review_response
+
+def test_record_round_trip_matches_models():
+    record = ReviewAnalyzer().analyze_record("The app keeps crashing, fix it!", source="reddit")
+
+    data = record.to_dict()
+    models = record.to_models()
+
+    assert "polarity" not in data["analysis"]
+    assert AnalysisRecord.from_dict({**data, "polarity": record.polarity}) == record
+    assert models["analysis"].model_dump() == data["analysis"]
+    assert models["confidence_scores"].model_dump() == data["confidence_scores"]
+
+def test_fast_responses_match_response_models():
+    record = ReviewAnalyzer().analyze_record("Great show, loved it!", source="reddit")
+
+    single = json.loads(FastJSONResponse(review_response("r1", record)).body)
+    ok = json.loads(FastJSONResponse(batch_result("r2", record)).body)
+    failed = json.loads(FastJSONResponse(batch_result("r3", error="bad input")).body)
+
+    assert single == json.loads(ReviewResponse.model_validate(single).model_dump_json())
+    assert ok == BatchReviewResult.model_validate(ok).model_dump()
+    assert failed == {"review_id": "r3", "analysis": None, "confidence_scores": None, "error": "bad input"}
+
+def test_dumps_without_orjson(monkeypatch):
+    monkeypatch.setattr(responses, "orjson", None)
+
+    assert responses.dumps({"text": "café", "n": [1, 2.5]}) == '{"text":"café","n":[1,2.5]}'.encode()
@@ -0,0 +1,95 @@
+import pytest
+from fastapi.testclient import TestClient
+import app.main as api
+from app.auth.auth_handler import create_token
+from app.services.results_store import ResultsStore
+
+headers = {"Authorization": f"Bearer {create_token({'test': True})}"}
+
+def make_result(i, sentiment="negative", topics=("streaming",), urgency=4):
+    return {
+        "review_id": f"r{i}",
+        "analysis": {"sentiment": sentiment, "key_topics": list(topics),
+                     "response_recommendation": "We're on it.", "urgency_score": urgency},
+        "confidence_scores": {"sentiment": 0.5, "topic_accuracy": 0.85}
+    }
+
+def fill(store):
+    for i in range(10):
+        store.add(make_result(i, topics=("streaming", "technical") if i % 2 else ("content",),
+                              urgency=5 if i >= 5 else 2),
+                  {"source": "reddit", "subreddit": "netflix" if i < 8 else "movies", "created_utc": 1000.0 + i})
+    store.add({"review_id": "failed", "error": "boom"})
+
+def test_query_filters_and_keyset_pages(tmp_path):
+    store = ResultsStore(str(tmp_path / "results.db"), batch_size=4)
+    fill(store)
+
+    page, cursor = store.query(topic="streaming", min_urgency=4, subreddit="netflix", limit=1)
+    rest, last = store.query(topic="streaming", min_urgency=4, subreddit="netflix", limit=1, cursor=cursor)
+
+    assert [r["review_id"] for r in page] == ["r7"] and cursor is not None
+    assert [r["review_id"] for r in rest] == ["r5"] and last is None
+    assert page[0]["analysis"]["key_topics"] == ["streaming", "technical"]
+    assert page[0]["metadata"] == {"source": "reddit", "subreddit": "netflix", "created_utc": 1007.0}
+    assert [r["review_id"] for r in store.query(since=1003, until=1006)[0]] == ["r5", "r4", "r3"]
+    assert store.count() == 10
+
+def test_replacing_a_result_replaces_its_topics(tmp_path):
+    store = ResultsStore(str(tmp_path / "results.db"))
+    fill(store)
+
+    store.add(make_result(1, sentiment="positive", topics=("ui",)), {"created_utc": 1001.0})
+
+    assert [r["review_id"] for r in store.query(topic="ui")[0]] == ["r1"]
+    assert "r1" not in [r["review_id"] for r in store.query(topic="streaming")[0]]
+    with pytest.raises(ValueError):
+        store.query(cursor="not-a-cursor")
+
+def test_results_endpoint(tmp_path, monkeypatch):
+    store = ResultsStore(str(tmp_path / "results.db"))
+    monkeypatch.setattr(api, "results_store", store)
+    with TestClient(api.app) as client:
+        client.post("/analyze-review", headers=headers, json={
+            "review_id": "live", "text": "The app keeps crashing, nothing works",
+            "metadata": {"source": "reddit", "subreddit": "netflix", "created_utc": 2000.0}
+        })
+        response = client.get("/results", params={"subreddit": "netflix", "limit": 1}, headers=headers)
+        bad_cursor = client.get("/results", params={"cursor": "x"}, headers=headers)
+        unauthorized = client.get("/results")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["results"][0]["review_id"] == "live" and body["next_cursor"] is None
+    assert bad_cursor.status_code == 400
+    assert unauthorized.status_code == 403
+
+def test_api_flushes_one_batch_at_a_time_and_logs_errors(tmp_path, monkeypatch, caplog):
+    store = ResultsStore(str(tmp_path / "results.db"), batch_size=1)
+    running, overlaps, calls = [0], [], []
+    write = store._write
+
+    def slow_failing_write(rows):
+        running[0] += 1
+        overlaps.append(running[0])
+        calls.append(len(rows))
+        try:
+            if len(calls) == 1:
+                raise RuntimeError("disk full")
+            write(rows)
+        finally:
+            running[0] -= 1
+
+    monkeypatch.setattr(store, "_write", slow_failing_write)
+    monkeypatch.setattr(api, "results_store", store)
+    with TestClient(api.app) as client:
+        for i in range(20):
+            client.post("/analyze-review", headers=headers, json={
+                "review_id": f"live{i}", "text": "The app keeps crashing",
+                "metadata": {"source": "reddit", "subreddit": "netflix", "created_utc": 2000.0 + i}
+            })
+
+    assert max(overlaps) == 1
+    assert "Error flushing results store: disk full" in caplog.text
+    # Everything but the failed batch reached the store, the rest at shutdown at the latest
+    assert len(store.query(limit=100)[0]) == 20 - calls[0]
@@ -0,0 +1,75 @@
+import json
+import numpy as np
+import pytest
+from textblob import TextBlob
+from app.services.analyzer import ReviewAnalyzer
+from app.services.sentiment import LexiconBackend, TextBlobBackend, get_sentiment_backend, tokenize
+from textblob._text import find_tokens
+from app.services.preprocess import TextPreprocessor
+
+@pytest.fixture(scope="module")
+def netflix_texts():
+    with open("sentiment_analysis_Netflix_20250529_234817.json", encoding="utf-8") as f:
+        posts = json.load(f)["raw_data"]["reddit"]["posts"]
+    texts = []
+    for post in posts:
+        texts.append(post["title"])
+        texts.append(f"{post['title']}\n\n{post['text']}")
+    return texts
+
+@pytest.fixture(scope="module")
+def lexicon():
+    return LexiconBackend()
+
+def test_lexicon_backend_matches_textblob_on_netflix_dataset(netflix_texts, lexicon):
+    scores = lexicon.score_batch(netflix_texts)
+
+    for text, (polarity, subjectivity) in zip(netflix_texts, scores):
+        expected = TextBlob(text).sentiment
+        assert polarity == pytest.approx(expected.polarity, abs=1e-9)
+        assert subjectivity == pytest.approx(expected.subjectivity, abs=1e-9)
+
+def test_lexicon_backend_follows_textblob_rules(lexicon):
+    texts = [
+        "not very good!!!",            # negation, intensifier, exclamation
+        "really not bad...",
+        "not extremely happy",         # negated -ly modifier
+        "I don't like it :) (!)",      # emoticon and sarcasm
+        "U.S. service is great. e.g. this",
+        "so so sad :-( \n\n) and 8\n\n) o.O",
+        "",
+    ]
+    for text in texts:
+        expected = TextBlob(text).sentiment
+        assert lexicon.score(text) == pytest.approx((expected.polarity, expected.subjectivity), abs=1e-9)
+        assert tokenize(text) == [w.lower() for w in " ".join(find_tokens(text)).split()]
+
+def test_get_sentiment_backend():
+    assert isinstance(get_sentiment_backend("textblob"), TextBlobBackend)
+    assert isinstance(get_sentiment_backend("lexicon"), LexiconBackend)
+    with pytest.raises(ValueError):
+        get_sentiment_backend("vader")
+
+def test_analyzer_with_lexicon_backend_matches_default(netflix_texts, lexicon):
+    items = [{"text": text, "source": "reddit"} for text in netflix_texts[:20]] + [{"text": None}]
+
+    default = ReviewAnalyzer().analyze_batch(items)
+    fast = ReviewAnalyzer(sentiment_backend=lexicon).analyze_batch(items)
+
+    for expected, result in zip(default[:-1], fast[:-1]):
+        assert result["analysis"] == expected["analysis"]
+        assert result["confidence_scores"] == expected["confidence_scores"]
+    assert "error" in fast[-1]
+
+def test_lexicon_backend_scores_shared_tokens(netflix_texts, lexicon, monkeypatch):
+    import app.services.sentiment as sentiment
+    prepared = [TextPreprocessor().prepare(text) for text in netflix_texts[:40]]
+    assert np.array_equal(lexicon.score_prepared(prepared), lexicon.score_batch([p.text for p in prepared]))
+
+    # Each text is tokenized once by the preprocessing stage, not again per scoring call
+    calls = []
+    monkeypatch.setattr(sentiment, "tokenize", lambda text: calls.append(text) or tokenize(text))
+    fresh = TextPreprocessor().prepare(netflix_texts[1])
+    lexicon.score_prepared([fresh])
+    lexicon.score_prepared([fresh])
+    assert len(calls) == 1 and fresh.tokens == tokenize(fresh.text)
@@ -0,0 +1,36 @@
+import asyncio
+from app.services.streaming import iter_ndjson_lines, ordered_window
+
+async def chunked(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+async def collect(iterator):
+    return [item async for item in iterator]
+
+def test_lines_split_across_chunks():
+    lines = asyncio.run(collect(iter_ndjson_lines(chunked(b'{"a":', b' 1}\n\n{"b"', b': 2}'))))
+    assert lines == [b'{"a": 1}', b'{"b": 2}']
+
+def test_overlong_line_is_reported_and_skipped():
+    lines = asyncio.run(collect(iter_ndjson_lines(chunked(b"x" * 10, b"x" * 10 + b"\nok\n"), max_line_bytes=15)))
+    assert lines == [None, b"ok"]
+
+def test_ordered_window_preserves_order_and_bounds_concurrency():
+    in_flight = 0
+    peak = 0
+    
+    async def worker(n):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01 * (5 - n))
+        in_flight -= 1
+        return n
+    
+    async def numbers():
+        for n in range(5):
+            yield n
+    
+    assert asyncio.run(collect(ordered_window(numbers(), worker, window=2))) == [0, 1, 2, 3, 4]
+    assert peak <= 2
@@ -0,0 +1,72 @@
+import asyncio
+from app.processing.throughput import ConcurrencyLimiter, ThroughputStats, backoff_delay
+
+def test_fixed_limiter_keeps_max_limit():
+    limiter = ConcurrencyLimiter(8)
+    limiter.on_overload()
+    assert limiter.limit == 8
+
+def test_adaptive_limiter_grows_on_healthy_and_halves_on_overload():
+    async def scenario():
+        limiter = ConcurrencyLimiter(16, adaptive=True, cooldown=0)
+        start = limiter.limit
+        for _ in range(start):
+            limiter.on_success(0.01)
+        grown = limiter.limit
+        limiter.on_overload()
+        return start, grown, limiter.limit
+    
+    start, grown, halved = asyncio.run(scenario())
+    assert grown == start + 1
+    assert halved == grown // 2
+
+def test_adaptive_limiter_backs_off_on_latency_spikes():
+    limiter = ConcurrencyLimiter(32, adaptive=True, cooldown=0)
+    for _ in range(10):
+        limiter.on_success(0.01)
+    before = limiter.limit
+    limiter.on_success(0.5)
+    assert limiter.limit == before - 1
+
+def test_adaptive_limiter_ignores_one_fast_outlier():
+    async def scenario():
+        limiter = ConcurrencyLimiter(16, adaptive=True, cooldown=0)
+        start = limiter.limit
+        limiter.on_success(0.001)
+        for _ in range(200):
+            limiter.on_success(0.05)
+        return start, limiter.limit
+    
+    start, limit = asyncio.run(scenario())
+    assert limit > start
+
+def test_adaptive_limiter_baseline_follows_a_slower_server():
+    async def scenario():
+        limiter = ConcurrencyLimiter(16, adaptive=True, cooldown=0, baseline_window=50)
+        for _ in range(50):
+            limiter.on_success(0.01)
+        for _ in range(50):
+            limiter.on_success(0.05)
+        # The window now only holds the new latencies, so they count as healthy again
+        before = limiter.limit
+        for _ in range(100):
+            limiter.on_success(0.05)
+        return before, limiter.limit
+    
+    before, after = asyncio.run(scenario())
+    assert after > before
+
+def test_backoff_is_jittered_and_capped():
+    delays = [backoff_delay(10, base=0.25, cap=2.0) for _ in range(100)]
+    assert all(0 <= d <= 2.0 for d in delays)
+    assert len(set(delays)) > 1
+
+def test_throughput_report_percentiles():
+    stats = ThroughputStats()
+    for ms in range(1, 101):
+        stats.record(ms / 1000, "200")
+    stats.finish()
+    report = stats.report()
+    assert report["posts"] == 100
+    assert report["outcomes"] == {"200": 100}
+    assert 49 <= report["p50_ms"] <= 51 and report["p99_ms"] >= 99